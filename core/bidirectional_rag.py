@@ -5,13 +5,19 @@ Designed for high-stakes technical documents requiring precision and auditabilit
 """
 
 import os
+import re
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Any, Optional, Tuple
 import torch
 
+from core.embedding_cache import get_embedding_cache, text_hash
+from core.keyword_automaton import KeywordAutomaton
+
 class SpecializedRAG:
     """
     Individual RAG system with specialized embedding model
@@ -24,7 +30,8 @@ class SpecializedRAG:
         self.vector_dim = vector_dim
         self.index = None
         self.chunk_metadata = []
-        self.embeddings_cache = {}
+        self.chunk_rows = {}  # (chunk_id, content hash) -> index row; chunk_ids repeat across documents
+        self.embeddings_cache = get_embedding_cache(model_name)
         
     def _initialize_model(self):
         """Lazy load the embedding model"""
@@ -45,30 +52,47 @@ class SpecializedRAG:
                 test_embedding = self.model.encode(["test"])
                 self.vector_dim = test_embedding.shape[1]
                 
-            # Initialize FAISS index
-            self.index = faiss.IndexFlatL2(self.vector_dim)
+            # Initialize FAISS index (kept when restored from a snapshot)
+            if self.index is None:
+                self.index = faiss.IndexFlatL2(self.vector_dim)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Snapshot state for pickling (used when RAGSystemManager spills a system to disk)
+        
+        The model is reloaded lazily, the shared embedding cache (a lock and a sqlite
+        connection) is looked up again, and the FAISS index is stored serialized.
+        """
+        state = self.__dict__.copy()
+        state['model'] = None
+        state['embeddings_cache'] = None
+        if self.index is not None:
+            state['index'] = faiss.serialize_index(self.index)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        """Restore a snapshot taken by __getstate__"""
+        if state.get('index') is not None:
+            state['index'] = faiss.deserialize_index(state['index'])
+        self.__dict__.update(state)
+        self.embeddings_cache = get_embedding_cache(self.model_name)
             
     def embed_text(self, text: str) -> np.ndarray:
         """Embed a single text"""
-        self._initialize_model()
-        return self.model.encode(text, convert_to_tensor=False)
+        return self.embed_batch([text])[0]
     
     def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[np.ndarray]:
-        """Embed multiple texts efficiently"""
-        self._initialize_model()
-        embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i+batch_size]
-            batch_embeddings = self.model.encode(
-                batch,
+        """Embed multiple texts efficiently, encoding only texts missing from the cache"""
+        def encode_missing(missing_texts: List[str]) -> np.ndarray:
+            self._initialize_model()
+            return self.model.encode(
+                missing_texts,
                 convert_to_tensor=False,
                 batch_size=batch_size,
-                show_progress_bar=len(texts) > 100
+                show_progress_bar=len(missing_texts) > 100
             )
-            embeddings.extend(batch_embeddings)
-            
-        return embeddings
+        
+        return list(self.embeddings_cache.encode(texts, encode_missing))
     
     def add_chunks(self, chunks: List[Dict[str, Any]]) -> None:
         """Add chunks to this specialized RAG index"""
@@ -89,36 +113,92 @@ class SpecializedRAG:
             chunk_with_embedding = chunk.copy()
             chunk_with_embedding['embedding'] = embeddings[i]
             chunk_with_embedding['rag_domain'] = self.domain
+            chunk_with_embedding['index_row'] = len(self.chunk_metadata)
+            if chunk.get('chunk_id') is not None:
+                self.chunk_rows[self._row_key(chunk)] = len(self.chunk_metadata)
             self.chunk_metadata.append(chunk_with_embedding)
             
         print(f"📚 Added {len(chunks)} chunks to {self.domain} RAG")
     
+    @staticmethod
+    def _row_key(chunk: Dict[str, Any]) -> Tuple[Any, str]:
+        """Index key of a chunk: ids like "chunk_1" repeat across documents, so the content is part of it"""
+        return chunk.get('chunk_id'), text_hash(chunk.get('content', ''))
+    
+    def get_chunk_embeddings(self, chunks: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Stack this RAG's embeddings for the given chunks
+        
+        Chunks are looked up by (chunk_id, content) in this index, falling back to an
+        attached 'embedding' of matching dimension (e.g. chunks returned by another RAG).
+        
+        Returns:
+            Tuple of (float32 matrix of found embeddings, positions in chunks they belong to)
+        """
+        vectors = []
+        positions = []
+        for position, chunk in enumerate(chunks):
+            row = self.chunk_rows.get(self._row_key(chunk))
+            if row is not None:
+                vectors.append(self.chunk_metadata[row]['embedding'])
+            elif 'embedding' in chunk and len(chunk['embedding']) == self.vector_dim:
+                vectors.append(chunk['embedding'])
+            else:
+                continue
+            positions.append(position)
+        
+        if not vectors:
+            return np.zeros((0, self.vector_dim or 0), dtype='float32'), []
+        return np.vstack(vectors).astype('float32', copy=False), positions
+    
     def find_similar_chunks(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Find most similar chunks for a query"""
-        if not self.chunk_metadata:
-            return []
+        return self.find_similar_chunks_batch([query], k)[0]
+    
+    def find_similar_chunks_batch(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Find most similar chunks for many queries with one embedding call and one index search
+        
+        Returns:
+            List of result lists, aligned with queries
+        """
+        if not self.chunk_metadata or not queries:
+            return [[] for _ in queries]
             
         self._initialize_model()
         
-        # Embed query
-        query_embedding = self.embed_text(query)
+        # Embed all queries together and search with an (n_queries, dim) matrix
+        query_embeddings = np.vstack(self.embed_batch(queries))
+        return self.search_by_embeddings(query_embeddings, k)
+    
+    def search_by_embeddings(self, query_embeddings: np.ndarray, k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Search the index with precomputed query embeddings from this RAG's model
         
-        # Search FAISS index
-        distances, indices = self.index.search(
-            np.array([query_embedding]).astype('float32'), 
-            min(k, len(self.chunk_metadata))
-        )
+        Returns:
+            List of result lists, one per embedding row
+        """
+        query_embeddings = np.atleast_2d(np.asarray(query_embeddings, dtype='float32'))
+        if not self.chunk_metadata:
+            return [[] for _ in range(len(query_embeddings))]
+            
+        self._initialize_model()
+        distances, indices = self.index.search(query_embeddings, min(k, len(self.chunk_metadata)))
+        similarities = 1.0 / (1.0 + distances)  # Convert distance to similarity
         
         # Return chunks with similarity scores
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.chunk_metadata):
-                chunk = self.chunk_metadata[idx].copy()
-                chunk['similarity_score'] = float(1.0 / (1.0 + distances[0][i]))  # Convert distance to similarity
-                chunk['search_rank'] = i + 1
-                results.append(chunk)
+        all_results = []
+        for row_indices, row_similarities in zip(indices, similarities):
+            results = []
+            for rank, (idx, similarity) in enumerate(zip(row_indices, row_similarities)):
+                if 0 <= idx < len(self.chunk_metadata):
+                    chunk = self.chunk_metadata[idx].copy()
+                    chunk['similarity_score'] = float(similarity)
+                    chunk['search_rank'] = rank + 1
+                    results.append(chunk)
+            all_results.append(results)
                 
-        return results
+        return all_results
 
 
 class DocumentTypeDetector:
@@ -146,20 +226,24 @@ class DocumentTypeDetector:
                 "equipment", "system", "configuration", "parameter", "protocol"
             ]
         }
+        
+        # One automaton scores every domain in a single pass
+        self.keyword_automaton = KeywordAutomaton(
+            keyword for keywords in self.type_keywords.values() for keyword in keywords
+        )
     
     def detect_document_type(self, text: str, chunk_metadata: List[Dict] = None) -> str:
         """
         Detect the primary document type based on content analysis
         """
-        text_lower = text.lower()
+        keyword_counts = self.keyword_automaton.count(text)
         
         # Score each document type
         scores = {}
         for doc_type, keywords in self.type_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
+            score = sum(1 for keyword in keywords if keyword in keyword_counts)
             # Weight by keyword frequency
-            for keyword in keywords:
-                score += text_lower.count(keyword) * 0.5
+            score += sum(keyword_counts.get(keyword, 0) for keyword in keywords) * 0.5
             scores[doc_type] = score
         
         # Check chunk metadata for additional context
@@ -196,6 +280,11 @@ class SafetyAuditor:
             "recommended dose", "maximum dose", "contraindicated in", "not recommended",
             "should not be used", "avoid in patients", "caution in", "monitor for"
         ]
+        
+        # Risk keywords and verification phrases are matched in one pass
+        self.risk_automaton = KeywordAutomaton(
+            self.high_risk_keywords + self.verification_required_phrases
+        )
     
     def audit_response(self, response: str, source_chunks: List[Dict[str, Any]], 
                       similarity_threshold: float = 0.7) -> Dict[str, Any]:
@@ -203,13 +292,14 @@ class SafetyAuditor:
         Audit a response against source chunks for safety and accuracy
         """
         response_lower = response.lower()
+        risk_terms_found = self.risk_automaton.present(response_lower, lowercase=False)
         
         # Check for high-risk content
         high_risk_score = sum(1 for keyword in self.high_risk_keywords 
-                             if keyword in response_lower)
+                             if keyword in risk_terms_found)
         
         # Check for verification-required phrases
-        verification_needed = any(phrase in response_lower 
+        verification_needed = any(phrase in risk_terms_found 
                                 for phrase in self.verification_required_phrases)
         
         # Calculate content similarity to source chunks
@@ -280,6 +370,15 @@ class BidirectionalRAGSystem:
         # Track all processed chunks for audit
         self.all_chunks = []
         
+        # Worker pool for concurrent backup searches (created on first use)
+        self._search_executor = None
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Snapshot state for pickling; the search worker pool is recreated on first use"""
+        state = self.__dict__.copy()
+        state['_search_executor'] = None
+        return state
+        
     def add_document_chunks(self, chunks: List[Dict[str, Any]]) -> None:
         """
         Process and route document chunks to appropriate RAG systems
@@ -324,24 +423,40 @@ class BidirectionalRAGSystem:
         
         print(f"🎯 Routing to {primary_rag} RAG system")
         
-        # Get results from primary RAG
-        primary_results = self.rag_systems[primary_rag].find_similar_chunks(query, max_chunks)
+        # Get results from primary RAG, keeping its query embedding for reuse
+        primary_system = self.rag_systems[primary_rag]
+        start_time = time.perf_counter()
+        query_embeddings = {}
+        if primary_system.chunk_metadata:
+            query_embeddings[primary_system.model_name] = primary_system.embed_text(query)
+            primary_results = primary_system.search_by_embeddings(
+                query_embeddings[primary_system.model_name], max_chunks
+            )[0]
+        else:
+            primary_results = []
+        domain_latency_ms = {primary_rag: (time.perf_counter() - start_time) * 1000}
         
-        # If primary results are insufficient, try backup systems
+        # If primary results are insufficient, search backup systems concurrently
         backup_results = []
         if len(primary_results) < max_chunks:
             remaining_slots = max_chunks - len(primary_results)
+            backup_names = [name for name, rag in self.rag_systems.items()
+                            if name != primary_rag and rag.chunk_metadata]
+            backup_chunks_by_domain = self._search_backup_domains(
+                query, backup_names, remaining_slots, query_embeddings, domain_latency_ms
+            )
             
-            for rag_name, rag_system in self.rag_systems.items():
-                if rag_name != primary_rag and remaining_slots > 0:
-                    backup_chunks = rag_system.find_similar_chunks(query, remaining_slots)
-                    # Filter out duplicates
-                    for chunk in backup_chunks:
-                        if not any(c.get('chunk_id') == chunk.get('chunk_id') for c in primary_results):
-                            backup_results.append(chunk)
-                            remaining_slots -= 1
-                            if remaining_slots <= 0:
-                                break
+            # Filter out duplicates, filling slots in domain order
+            seen_ids = {c.get('chunk_id') for c in primary_results}
+            for rag_name in backup_names:
+                for chunk in backup_chunks_by_domain.get(rag_name, []):
+                    if remaining_slots <= 0:
+                        break
+                    if chunk.get('chunk_id') in seen_ids:
+                        continue
+                    seen_ids.add(chunk.get('chunk_id'))
+                    backup_results.append(chunk)
+                    remaining_slots -= 1
         
         # Combine and rank results
         all_results = primary_results + backup_results
@@ -356,14 +471,159 @@ class BidirectionalRAGSystem:
             "total_results_found": len(all_results),
             "routing_info": {
                 "primary_results": len(primary_results),
-                "backup_results": len(backup_results)
+                "backup_results": len(backup_results),
+                "domain_latency_ms": domain_latency_ms
             }
         }
     
+    def _search_backup_domains(self, query: str, backup_names: List[str], k: int,
+                               query_embeddings: Dict[str, np.ndarray],
+                               domain_latency_ms: Dict[str, float]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Search backup RAG systems concurrently
+        
+        Domains are grouped by model so the query is embedded once per model; each
+        model group runs on its own worker thread (encode and FAISS release the GIL).
+        
+        Args:
+            query: Query text
+            backup_names: Backup domains to search
+            k: Results to request from each domain
+            query_embeddings: model name -> query embedding, reused and filled in
+            domain_latency_ms: domain -> latency in milliseconds, filled in
+        """
+        if not backup_names:
+            return {}
+        
+        model_groups = {}
+        for rag_name in backup_names:
+            model_groups.setdefault(self.rag_systems[rag_name].model_name, []).append(rag_name)
+        
+        def search_group(model_name: str, rag_names: List[str]) -> Dict[str, Tuple[List[Dict[str, Any]], float]]:
+            group_results = {}
+            embedding = query_embeddings.get(model_name)
+            for rag_name in rag_names:
+                start_time = time.perf_counter()
+                rag_system = self.rag_systems[rag_name]
+                if embedding is None:
+                    embedding = rag_system.embed_text(query)
+                results = rag_system.search_by_embeddings(embedding, k)[0]
+                group_results[rag_name] = (results, (time.perf_counter() - start_time) * 1000)
+            return group_results
+        
+        if self._search_executor is None:
+            self._search_executor = ThreadPoolExecutor(
+                max_workers=len(self.rag_systems), thread_name_prefix="rag-backup"
+            )
+        
+        futures = [self._search_executor.submit(search_group, model_name, rag_names)
+                   for model_name, rag_names in model_groups.items()]
+        
+        results_by_domain = {}
+        for future in futures:
+            for rag_name, (results, latency) in future.result().items():
+                results_by_domain[rag_name] = results
+                domain_latency_ms[rag_name] = latency
+        
+        return results_by_domain
+    
+    def query_batch(self, queries: List[str], max_chunks: int = 5,
+                    preferred_domain: str = None) -> List[Dict[str, Any]]:
+        """
+        Query the system with many queries at once
+        
+        Queries are routed like query_with_routing, then grouped by domain so each
+        RAG system embeds its queries in one model call and runs one index search.
+        
+        Returns:
+            List of results in the query_with_routing format, aligned with queries
+        """
+        if not queries:
+            return []
+            
+        print(f"🔍 Processing batch of {len(queries)} queries...")
+        
+        # Route every query
+        if preferred_domain and preferred_domain in self.rag_systems:
+            routes = np.full(len(queries), preferred_domain, dtype=object)
+        else:
+            detected = [self.document_detector.detect_document_type(query) for query in queries]
+            routes = np.array([d if d in self.rag_systems else "technical" for d in detected], dtype=object)
+        
+        # Primary search: one batched search per routed domain
+        primary_results = [[] for _ in queries]
+        for rag_name, rag_system in self.rag_systems.items():
+            positions = np.flatnonzero(routes == rag_name)
+            if positions.size == 0:
+                continue
+            print(f"🎯 Routing {positions.size} queries to {rag_name} RAG system")
+            domain_results = rag_system.find_similar_chunks_batch([queries[i] for i in positions], max_chunks)
+            for i, results in zip(positions, domain_results):
+                primary_results[i] = results
+        
+        # Backup search only for queries whose primary results are insufficient
+        backup_results = [[] for _ in queries]
+        counts = np.array([len(results) for results in primary_results])
+        backup_counts = np.zeros(len(queries), dtype=int)
+        short_positions = np.flatnonzero(counts < max_chunks)
+        
+        if short_positions.size:
+            seen_ids = {i: {c.get('chunk_id') for c in primary_results[i]} for i in short_positions}
+            for rag_name, rag_system in self.rag_systems.items():
+                still_short = counts[short_positions] + backup_counts[short_positions] < max_chunks
+                positions = short_positions[(routes[short_positions] != rag_name) & still_short]
+                if positions.size == 0:
+                    continue
+                domain_results = rag_system.find_similar_chunks_batch([queries[i] for i in positions], max_chunks)
+                for i, results in zip(positions, domain_results):
+                    remaining_slots = max_chunks - counts[i] - backup_counts[i]
+                    for chunk in results:
+                        if remaining_slots <= 0:
+                            break
+                        if chunk.get('chunk_id') in seen_ids[i]:
+                            continue
+                        seen_ids[i].add(chunk.get('chunk_id'))
+                        backup_results[i].append(chunk)
+                        backup_counts[i] += 1
+                        remaining_slots -= 1
+        
+        # Merge and rank each query's results
+        batch_results = []
+        for i, query in enumerate(queries):
+            all_results = primary_results[i] + backup_results[i]
+            scores = np.array([c.get('similarity_score', 0) for c in all_results], dtype=float)
+            order = np.argsort(-scores, kind='stable')
+            all_results = [all_results[j] for j in order]
+            primary_rag = routes[i]
+            
+            batch_results.append({
+                "query": query,
+                "primary_rag_used": primary_rag,
+                "model_used": self.rag_systems[primary_rag].model_name,
+                "domain_detected": primary_rag,
+                "results": all_results[:max_chunks],
+                "total_results_found": len(all_results),
+                "routing_info": {
+                    "primary_results": len(primary_results[i]),
+                    "backup_results": len(backup_results[i])
+                }
+            })
+        
+        return batch_results
+    
     def audit_external_response(self, response: str, source_chunks: List[Dict[str, Any]], 
-                               query: str) -> Dict[str, Any]:
+                               query: str, top_k: int = 3,
+                               sentence_support: bool = False) -> Dict[str, Any]:
         """
         Audit an external API response against source chunks
+        
+        Args:
+            response: External response text
+            source_chunks: Chunks the response should be grounded in
+            query: Original query
+            top_k: Number of best-supporting chunks to report
+            sentence_support: Also score each response sentence against the sources
+                (one extra embedding call, included in similarity_time_ms)
         """
         print(f"🔍 Auditing external response...")
         
@@ -372,20 +632,41 @@ class BidirectionalRAGSystem:
         
         # Additional embedding-based similarity check (using technical RAG as baseline)
         technical_rag = self.rag_systems["technical"]
+        similarity_details = {}
         if technical_rag.model is not None:
             response_embedding = technical_rag.embed_text(response)
             
-            # Compare with source chunk embeddings
-            chunk_similarities = []
-            for chunk in source_chunks:
-                if 'embedding' in chunk:
-                    chunk_embedding = np.array(chunk['embedding'])
-                    similarity = np.dot(response_embedding, chunk_embedding) / (
-                        np.linalg.norm(response_embedding) * np.linalg.norm(chunk_embedding)
+            # Stack source embeddings once and score them in one matrix-vector product
+            chunk_matrix, positions = technical_rag.get_chunk_embeddings(source_chunks)
+            if positions:
+                start_time = time.perf_counter()
+                chunk_norms = np.linalg.norm(chunk_matrix, axis=1)
+                chunk_norms[chunk_norms == 0] = 1.0
+                normalized_chunks = chunk_matrix / chunk_norms[:, None]
+                response_vector = np.asarray(response_embedding, dtype='float32')
+                response_vector = response_vector / (np.linalg.norm(response_vector) or 1.0)
+                chunk_similarities = normalized_chunks @ response_vector
+                
+                avg_similarity = float(chunk_similarities.mean())
+                top_order = np.argsort(-chunk_similarities)[:top_k]
+                similarity_details = {
+                    "max_embedding_similarity": float(chunk_similarities.max()),
+                    "top_supporting_chunks": [
+                        {
+                            "chunk_id": source_chunks[positions[j]].get('chunk_id'),
+                            "similarity": float(chunk_similarities[j])
+                        }
+                        for j in top_order
+                    ]
+                }
+                
+                if sentence_support:
+                    similarity_details["sentence_support"] = self._score_sentence_support(
+                        response, normalized_chunks, [source_chunks[p] for p in positions], top_k
                     )
-                    chunk_similarities.append(similarity)
-            
-            avg_similarity = np.mean(chunk_similarities) if chunk_similarities else 0.0
+                similarity_details["similarity_time_ms"] = (time.perf_counter() - start_time) * 1000
+            else:
+                avg_similarity = 0.0
         else:
             avg_similarity = safety_audit['content_similarity']
         
@@ -396,6 +677,7 @@ class BidirectionalRAGSystem:
             "source_chunks_count": len(source_chunks),
             "safety_audit": safety_audit,
             "embedding_similarity": float(avg_similarity),
+            **similarity_details,
             "overall_confidence": self._calculate_confidence(safety_audit, avg_similarity),
             "timestamp": "now",  # You'd use actual timestamp
             "audit_passed": safety_audit["audit_passed"] and avg_similarity > 0.6
@@ -403,6 +685,43 @@ class BidirectionalRAGSystem:
         
         return audit_result
     
+    def _score_sentence_support(self, response: str, normalized_chunks: np.ndarray,
+                                chunks: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Score how well each response sentence is supported by the source chunks
+        
+        Args:
+            response: Response text
+            normalized_chunks: Unit-length source embeddings, one row per chunk
+            chunks: Source chunks aligned with normalized_chunks rows
+            top_k: Number of supporting chunks to report per sentence
+        """
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+|\n+', response) if len(s.strip()) > 3]
+        if not sentences:
+            return []
+        
+        # All sentences in one embedding call, all supports in one matrix product
+        sentence_matrix = np.vstack(self.rag_systems["technical"].embed_batch(sentences)).astype('float32')
+        sentence_norms = np.linalg.norm(sentence_matrix, axis=1)
+        sentence_norms[sentence_norms == 0] = 1.0
+        support = (sentence_matrix / sentence_norms[:, None]) @ normalized_chunks.T
+        
+        k = min(top_k, support.shape[1])
+        top_indices = np.argpartition(-support, k - 1, axis=1)[:, :k]
+        
+        results = []
+        for i, sentence in enumerate(sentences):
+            row_top = top_indices[i][np.argsort(-support[i, top_indices[i]])]
+            results.append({
+                "sentence": sentence,
+                "max_support": float(support[i, row_top[0]]),
+                "top_chunks": [
+                    {"chunk_id": chunks[j].get('chunk_id'), "support": float(support[i, j])}
+                    for j in row_top
+                ]
+            })
+        return results
+    
     def _calculate_confidence(self, safety_audit: Dict, embedding_similarity: float) -> str:
         """Calculate overall confidence in the response"""
         if safety_audit["risk_level"] == "high":
@@ -427,7 +746,8 @@ class BidirectionalRAGSystem:
                 "model": rag.model_name,
                 "chunks_indexed": len(rag.chunk_metadata),
                 "vector_dimension": rag.vector_dim,
-                "model_loaded": rag.model is not None
+                "model_loaded": rag.model is not None,
+                "embedding_cache": rag.embeddings_cache.get_stats()
             }
         
         return info
@@ -0,0 +1,232 @@
+"""
+BM25 Inverted Index for CognitiveLattice
+Ranked keyword and literal retrieval built at ingest time, fused with vector search via reciprocal rank fusion
+Query cost depends on the postings of the query terms, not on the size of the corpus
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokenization shared by indexing and querying"""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring
+
+    Documents are appended incrementally; postings are kept as Python lists while
+    ingesting and packed into numpy arrays the first time a term is queried.
+    Every vocabulary term is also indexed by its character 1-3 grams, so literal
+    search can find the terms a partial word occurs in without scanning documents.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[Hashable] = []  # position -> external document id
+        self.doc_texts_lower: List[str] = []  # kept for exact literal verification
+        self.doc_lengths: List[int] = []
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}  # term -> (positions, term freqs)
+        self._packed: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._term_grams: Dict[str, Set[str]] = {}  # character 1-3 gram -> vocabulary terms containing it
+        self._lengths_array: Optional[np.ndarray] = None
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add_documents(self, documents: Iterable[Tuple[Hashable, str]]) -> None:
+        """
+        Index documents
+
+        Args:
+            documents: Iterable of (document id, text)
+        """
+        self._lengths_array = None
+        for doc_id, text in documents:
+            position = len(self.doc_ids)
+            tokens = tokenize(text)
+            self.doc_ids.append(doc_id)
+            self.doc_texts_lower.append((text or "").lower())
+            self.doc_lengths.append(len(tokens))
+            self._total_length += len(tokens)
+
+            for term, freq in Counter(tokens).items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = ([], [])
+                    self._add_term_grams(term)
+                positions, freqs = postings
+                positions.append(position)
+                freqs.append(freq)
+                self._packed.pop(term, None)
+
+    def _add_term_grams(self, term: str) -> None:
+        for size in (1, 2, 3):
+            for start in range(len(term) - size + 1):
+                self._term_grams.setdefault(term[start:start + size], set()).add(term)
+
+    def _terms_containing(self, fragment: str, starts_word: bool, ends_word: bool) -> List[str]:
+        """
+        Vocabulary terms containing a word fragment
+
+        Args:
+            fragment: Lower-case word characters
+            starts_word: The term must start with the fragment
+            ends_word: The term must end with the fragment
+        """
+        if starts_word and ends_word:
+            return [fragment] if fragment in self._postings else []
+        if len(fragment) <= 3:
+            terms = self._term_grams.get(fragment, ())
+        else:
+            gram_sets = sorted((self._term_grams.get(fragment[i:i + 3], set()) for i in range(len(fragment) - 2)),
+                               key=len)
+            terms = gram_sets[0].intersection(*gram_sets[1:])
+        return [term for term in terms
+                if fragment in term
+                and (not starts_word or term.startswith(fragment))
+                and (not ends_word or term.endswith(fragment))]
+
+    def _get_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Packed (positions, term freqs) for a term, or None if unseen"""
+        packed = self._packed.get(term)
+        if packed is None:
+            postings = self._postings.get(term)
+            if postings is None:
+                return None
+            packed = (np.asarray(postings[0], dtype=np.int64), np.asarray(postings[1], dtype=np.float32))
+            self._packed[term] = packed
+        return packed
+
+    def search(self, query: str, k: int = 10,
+               candidate_mask: Optional[np.ndarray] = None,
+               candidate_positions: Optional[np.ndarray] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Rank documents containing any query term by BM25
+
+        Args:
+            query: Query text
+            k: Number of documents to return
+            candidate_mask: Optional boolean mask over document positions; only
+                documents where it is True are scored (corpus statistics are unchanged)
+            candidate_positions: Optional sorted document positions to score instead of a mask
+
+        Returns:
+            List of (document id, score), best first
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms or not self.doc_ids:
+            return []
+
+        n_docs = len(self.doc_ids)
+        avg_length = self._total_length / n_docs if n_docs else 0.0
+        if self._lengths_array is None:
+            self._lengths_array = np.asarray(self.doc_lengths, dtype=np.float32)
+        doc_lengths = self._lengths_array
+
+        candidate_parts = []
+        score_parts = []
+        for term in query_terms:
+            postings = self._get_postings(term)
+            if postings is None:
+                continue
+            positions, freqs = postings
+            idf = math.log(1 + (n_docs - len(positions) + 0.5) / (len(positions) + 0.5))
+            if candidate_mask is not None or candidate_positions is not None:
+                keep = candidate_mask[positions] if candidate_mask is not None else \
+                    np.isin(positions, candidate_positions, assume_unique=True)
+                positions, freqs = positions[keep], freqs[keep]
+                if positions.size == 0:
+                    continue
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[positions] / (avg_length or 1.0))
+            candidate_parts.append(positions)
+            score_parts.append(idf * freqs * (self.k1 + 1) / (freqs + norm))
+
+        if not candidate_parts:
+            return []
+
+        # Sum per-term contributions over the candidate set only
+        candidates, inverse = np.unique(np.concatenate(candidate_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.doc_ids[candidates[i]], float(scores[i])) for i in top]
+
+    def literal_search(self, phrase: str, k: int = 10) -> List[Tuple[Hashable, float]]:
+        """
+        Documents containing the phrase as a substring (case-insensitive), ranked by BM25
+
+        The phrase may start or end inside a word ("mg" matches "10mg", "pediatr" matches
+        "pediatric"). Each word of the phrase narrows the candidates through the postings
+        of the vocabulary terms it can be part of: whole words inside the phrase match one
+        term, the edge words match the terms ending / starting with them (found through the
+        term n-gram index). Only punctuation-only phrases ("$") check every document.
+        Matches without a BM25 score (partial-word phrases) follow the scored ones in
+        document order.
+        """
+        phrase_lower = (phrase or "").lower()
+        if not phrase_lower.strip() or not self.doc_ids:
+            return []
+
+        words = list(_TOKEN_RE.finditer(phrase_lower))
+        if words:
+            # Whole words first: they are the cheapest and usually the most selective
+            constraints = sorted(
+                ((match.group(0), match.start() > 0, match.end() < len(phrase_lower)) for match in words),
+                key=lambda constraint: not (constraint[1] and constraint[2])
+            )
+            candidate_positions = None
+            for fragment, starts_word, ends_word in constraints:
+                terms = self._terms_containing(fragment, starts_word, ends_word)
+                if not terms:
+                    return []
+                positions = np.unique(np.concatenate([self._get_postings(term)[0] for term in terms]))
+                candidate_positions = positions if candidate_positions is None else np.intersect1d(
+                    candidate_positions, positions, assume_unique=True
+                )
+                if candidate_positions.size == 0:
+                    return []
+        else:
+            candidate_positions = range(len(self.doc_ids))
+
+        matching = [int(p) for p in candidate_positions if phrase_lower in self.doc_texts_lower[p]]
+        if not matching:
+            return []
+
+        ranked = self.search(phrase_lower, len(matching), candidate_positions=np.asarray(matching, dtype=np.int64))
+        scored = {doc_id for doc_id, _ in ranked}
+        ranked.extend((self.doc_ids[p], 0.0) for p in matching if self.doc_ids[p] not in scored)
+        return ranked[:k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Hashable]], k: int = 60,
+                           weights: Optional[List[float]] = None) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse several ranked id lists with reciprocal rank fusion
+
+    Args:
+        rankings: Ranked lists of document ids, best first
+        k: RRF damping constant
+        weights: Optional per-ranking weights
+
+    Returns:
+        List of (document id, fused score), best first
+    """
+    fused: Dict[Hashable, float] = {}
+    for ranking_index, ranking in enumerate(rankings):
+        weight = weights[ranking_index] if weights else 1.0
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
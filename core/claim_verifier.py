@@ -0,0 +1,132 @@
+"""
+Claim Verifier for CognitiveLattice
+Checks numbers and quoted phrases in an LLM response against the chunks it cited
+Only the cited chunks are indexed (as number values and token n-grams), so cost does not depend on corpus size
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from core.bm25_index import tokenize
+
+# A number (not part of an identifier such as json_record_15) with an optional unit
+_NUMBER_RE = re.compile(
+    r'(?<![\w.])(\d+(?:[.,]\d+)*)(?:\s*(%|(?:mg|mcg|g|kg|ml|l|units?|hours?|days?|weeks?|months?|years?)\b))?'
+)
+_QUOTE_RE = re.compile(r'"([^"\n]{12,300})"|“([^”\n]{12,300})”')
+_THOUSANDS_RE = re.compile(r'\d{1,3}(?:,\d{3})+(?:\.\d+)?')
+
+
+class NGramIndex:
+    """Set of all token n-grams (length 1..n) of a few source texts"""
+
+    def __init__(self, texts: Iterable[str], n: int = 3):
+        self.n = n
+        self._grams: Set[Tuple[str, ...]] = set()
+        for text in texts:
+            tokens = tokenize(text)
+            for size in range(1, n + 1):
+                self._grams.update(zip(*(tokens[offset:] for offset in range(size))))
+
+    def contains(self, tokens: List[str]) -> bool:
+        """True if the token sequence occurs in a source (approximated by its n-grams when longer than n)"""
+        if not tokens:
+            return False
+        if len(tokens) <= self.n:
+            return tuple(tokens) in self._grams
+        return self.coverage(tokens) == 1.0
+
+    def coverage(self, tokens: List[str]) -> float:
+        """Fraction of the sequence's n-grams found in the sources"""
+        size = min(self.n, len(tokens))
+        grams = list(zip(*(tokens[offset:] for offset in range(size))))
+        if not grams:
+            return 0.0
+        return sum(1 for gram in grams if gram in self._grams) / len(grams)
+
+
+def normalize_number(number: str) -> str:
+    """
+    Canonical form of a number: thousands separators dropped, a decimal comma
+    read as a point, trailing zeros removed ("1,500" -> "1500", "0,50" -> "0.5")
+    """
+    if _THOUSANDS_RE.fullmatch(number):
+        number = number.replace(',', '')
+    else:
+        number = number.replace(',', '.')
+    try:
+        return format(Decimal(number).normalize(), 'f')
+    except InvalidOperation:
+        return number
+
+
+def normalize_unit(unit: str) -> str:
+    """Singular, lowercase unit ('' when the number has none)"""
+    unit = (unit or '').lower()
+    return unit[:-1] if len(unit) > 2 and unit.endswith('s') else unit
+
+
+def extract_numeric_values(text: str) -> List[Tuple[str, str]]:
+    """Every number in the text as a normalized (value, unit) pair, in order"""
+    return [(normalize_number(number), normalize_unit(unit))
+            for number, unit in _NUMBER_RE.findall(text.lower())]
+
+
+def extract_numeric_claims(text: str) -> List[str]:
+    """
+    Numbers (with units when present) stated in the text, in order, without repeats
+
+    Bare single digits are skipped, since they are mostly list markers and small counts.
+    """
+    claims = []
+    for match in _NUMBER_RE.finditer(text.lower()):
+        number, unit = match.groups()
+        if unit or len(number) > 1:
+            claims.append(match.group(0).strip())
+    return list(dict.fromkeys(claims))
+
+
+def extract_quoted_claims(text: str) -> List[str]:
+    """Phrases the text presents as direct quotes"""
+    return list(dict.fromkeys(a or b for a, b in _QUOTE_RE.findall(text)))
+
+
+def verify_claims(response_text: str, source_texts: Iterable[str],
+                  quote_coverage: float = 0.8) -> Dict[str, Any]:
+    """
+    Check the response's numeric claims and quotes against its cited sources
+
+    Numbers are compared as whole normalized values, so "5 mg" is not supported
+    by "0.5 mg" and "1,500 units" matches "1500 units". A number is supported if
+    a source states the same value with the same unit, or the same value at all
+    when the claim has no unit. A quote is supported if at least quote_coverage
+    of its trigrams occur in the sources.
+
+    Returns:
+        Counts of claims checked and supported, and the unsupported claims
+    """
+    source_texts = list(source_texts)
+    index = NGramIndex(source_texts)
+    source_values = {value for text in source_texts for value in extract_numeric_values(text)}
+    source_numbers = {number for number, _ in source_values}
+
+    numbers = extract_numeric_claims(response_text)
+    unsupported_numbers = []
+    for claim in numbers:
+        number, unit = extract_numeric_values(claim)[0]
+        supported = (number, unit) in source_values if unit else number in source_numbers
+        if not supported:
+            unsupported_numbers.append(claim)
+
+    quotes = extract_quoted_claims(response_text)
+    unsupported_quotes = [quote for quote in quotes if index.coverage(tokenize(quote)) < quote_coverage]
+
+    return {
+        "numeric_claims": len(numbers),
+        "numeric_supported": len(numbers) - len(unsupported_numbers),
+        "unsupported_numbers": unsupported_numbers,
+        "quoted_claims": len(quotes),
+        "quotes_supported": len(quotes) - len(unsupported_quotes),
+        "unsupported_quotes": unsupported_quotes
+    }
@@ -0,0 +1,229 @@
+"""
+Context Packer for CognitiveLattice
+Fits retrieved chunks into an LLM token budget using real tokenizer counts
+Maximal marginal relevance drops redundant chunks, and chunks can be trimmed to their query-relevant sentences
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from core.bm25_index import tokenize
+
+# Use the OpenAI tokenizer when installed (pip install tiktoken); otherwise
+# fall back to the ~4 characters per token estimate used elsewhere.
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o / gpt-4.1 family
+
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# Words that carry no signal when matching sentences against a query
+STOPWORDS = frozenset(
+    "a an and are as at be been by can do does for from has have how i in is it its many "
+    "may much of on or should than that the their them there these this those to was were "
+    "what when where which who why will with".split()
+)
+
+_encodings: Dict[str, Any] = {}
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Token count of text (tiktoken when available, else a character estimate)"""
+    if TIKTOKEN_AVAILABLE:
+        encoding = _encodings.get(encoding_name)
+        if encoding is None:
+            try:
+                encoding = tiktoken.get_encoding(encoding_name)
+            except Exception:
+                encoding = False  # Encoding files unavailable (e.g. offline)
+            _encodings[encoding_name] = encoding
+        if encoding:
+            return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+def tokenizer_name(encoding_name: str = DEFAULT_ENCODING) -> str:
+    """Name of the tokenizer count_tokens is using"""
+    count_tokens("", encoding_name)
+    return encoding_name if _encodings.get(encoding_name) else "chars/4 estimate"
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and lines"""
+    return [sentence.strip() for sentence in _SENTENCE_BREAK_RE.split(text) if sentence.strip()]
+
+
+def lexical_similarity_matrix(texts: List[str]) -> np.ndarray:
+    """Pairwise cosine similarity of term-frequency vectors"""
+    vocabulary: Dict[str, int] = {}
+    rows = []
+    for text in texts:
+        counts = Counter(tokenize(text))
+        rows.append(([vocabulary.setdefault(term, len(vocabulary)) for term in counts], list(counts.values())))
+
+    matrix = np.zeros((len(texts), len(vocabulary)), dtype=np.float32)
+    for row, (columns, counts) in enumerate(rows):
+        matrix[row, columns] = counts
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1.0, norms)
+    return matrix @ matrix.T
+
+
+class ContextPacker:
+    """
+    Selects and formats chunks for an LLM prompt within a token budget
+
+    Chunks are chosen greedily by maximal marginal relevance (search score
+    against lexical similarity to chunks already chosen). Chunks nearly
+    identical to a chosen one are dropped, and a chunk that no longer fits
+    is skipped so smaller ones can still use the remaining budget.
+    """
+
+    def __init__(self,
+                 token_budget: int,
+                 mmr_lambda: float = 0.7,
+                 redundancy_threshold: float = 0.95,
+                 trim_sentences: bool = False,
+                 neighbor_sentences: int = 1,
+                 encoding_name: str = DEFAULT_ENCODING):
+        """
+        Args:
+            token_budget: Maximum tokens for the whole context
+            mmr_lambda: Weight of relevance against novelty (1.0 = pure relevance order)
+            redundancy_threshold: Lexical cosine above which a chunk counts as a duplicate
+            trim_sentences: Keep only query-relevant sentences of each chunk
+            neighbor_sentences: Sentences kept on each side of a query-relevant one when trimming
+            encoding_name: tiktoken encoding used for token counts
+        """
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.redundancy_threshold = redundancy_threshold
+        self.trim_sentences = trim_sentences
+        self.neighbor_sentences = max(0, neighbor_sentences)
+        self.encoding_name = encoding_name
+
+    def _count(self, text: str) -> int:
+        return count_tokens(text, self.encoding_name)
+
+    @staticmethod
+    def format_chunk(chunk: Dict[str, Any], content: str) -> str:
+        """Chunk text with the delimiters used in the LLM prompt"""
+        return (f"\n--- Chunk {chunk['chunk_id']} (similarity: {chunk.get('similarity_score', 0.0):.3f}) ---\n"
+                f"{content}\n--- End Chunk {chunk['chunk_id']} ---\n")
+
+    def trim_to_query(self, content: str, query_terms: set) -> str:
+        """
+        Keep the first line (usually the record heading), the sentences sharing
+        terms with the query and their neighbor_sentences on each side, in original order
+
+        Content with no matching sentence is returned unchanged, since the chunk
+        was retrieved for its meaning rather than its words.
+        """
+        sentences = split_sentences(content)
+        if len(sentences) <= 2 or not query_terms:
+            return content
+
+        matches = [i for i, sentence in enumerate(sentences[1:], 1) if query_terms.intersection(tokenize(sentence))]
+        if not matches:
+            return content
+        window = self.neighbor_sentences
+        keep = sorted({0}.union(*(range(max(0, i - window), min(len(sentences), i + window + 1)) for i in matches)))
+        if len(keep) == len(sentences):
+            return content
+
+        parts = []
+        previous = -1
+        for i in keep:
+            if i > previous + 1:
+                parts.append("[...]")
+            parts.append(sentences[i])
+            previous = i
+        if previous < len(sentences) - 1:
+            parts.append("[...]")
+        return "\n".join(parts)
+
+    def pack(self, query: str, chunks: List[Dict[str, Any]]) -> Tuple[str, List[str], Dict[str, Any]]:
+        """
+        Build the LLM context for a query from ranked chunks
+
+        Args:
+            query: User query
+            chunks: Retrieved chunks, best first, with 'chunk_id', 'content' and
+                'similarity_score' (hybrid results are weighted by 'rrf_score')
+
+        Returns:
+            (context text, chunk ids used, packing stats)
+        """
+        header = f"User Query: {query}\n\nRelevant Information:\n"
+        used_tokens = self._count(header)
+        query_terms = {term for term in tokenize(query) if term not in STOPWORDS}
+
+        # Baseline: greedy similarity order with untrimmed chunks, as before packing
+        full_texts = [self.format_chunk(chunk, chunk['content']) for chunk in chunks]
+        full_tokens = [self._count(text) for text in full_texts]
+        baseline_tokens = used_tokens
+        for tokens in full_tokens:
+            if baseline_tokens + tokens > self.token_budget:
+                break
+            baseline_tokens += tokens
+
+        score_key = 'rrf_score' if chunks and all('rrf_score' in chunk for chunk in chunks) else 'similarity_score'
+        top_score = max((chunk.get(score_key, 0.0) for chunk in chunks), default=0.0) or 1.0
+        relevance = [chunk.get(score_key, 0.0) / top_score for chunk in chunks]
+        similarity = lexical_similarity_matrix([chunk['content'] for chunk in chunks])
+        max_overlap = np.zeros(len(chunks), dtype=np.float32)
+
+        remaining = list(range(len(chunks)))
+        selected: List[Tuple[int, str]] = []
+        redundant = 0
+        over_budget = 0
+
+        while remaining:
+            best = max(remaining, key=lambda i: self.mmr_lambda * relevance[i] - (1 - self.mmr_lambda) * max_overlap[i])
+            remaining.remove(best)
+            if max_overlap[best] >= self.redundancy_threshold:
+                redundant += 1
+                continue
+
+            chunk = chunks[best]
+            text, tokens = full_texts[best], full_tokens[best]
+            if self.trim_sentences:
+                content = self.trim_to_query(chunk['content'], query_terms)
+                if content != chunk['content']:
+                    text = self.format_chunk(chunk, content)
+                    tokens = self._count(text)
+
+            if used_tokens + tokens > self.token_budget:
+                over_budget += 1
+                continue
+
+            selected.append((best, text))
+            used_tokens += tokens
+            np.maximum(max_overlap, similarity[best], out=max_overlap)
+
+        # Present chosen chunks in retrieval order
+        selected.sort()
+        context = header + "".join(text for _, text in selected)
+        chunk_ids = [chunks[i]['chunk_id'] for i, _ in selected]
+
+        stats = {
+            'tokenizer': tokenizer_name(self.encoding_name),
+            'token_budget': self.token_budget,
+            'tokens_used': used_tokens,
+            'baseline_tokens': baseline_tokens,
+            'tokens_saved': max(0, baseline_tokens - used_tokens),
+            'chunks_considered': len(chunks),
+            'chunks_used': len(chunk_ids),
+            'chunks_dropped_redundant': redundant,
+            'chunks_trimmed': sum(1 for i, text in selected if text != full_texts[i]),
+            'chunks_over_budget': over_budget
+        }
+        return context, chunk_ids, stats
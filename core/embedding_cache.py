@@ -0,0 +1,254 @@
+"""
+Embedding Cache for CognitiveLattice
+Content-addressed cache for sentence embeddings with an in-memory LRU in front of a sqlite store
+Avoids re-encoding identical chunks, repeated audit responses and duplicate records across runs
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any, Optional
+
+import numpy as np
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Root for on-disk caches; defaults to the user's cache directory rather than the working directory
+CACHE_DIR_ENV_VAR = "COGNITIVELATTICE_CACHE_DIR"
+
+
+def default_cache_dir(name: str) -> str:
+    """
+    Directory for a named on-disk cache
+
+    Uses $COGNITIVELATTICE_CACHE_DIR when set, otherwise $XDG_CACHE_HOME/cognitivelattice
+    (~/.cache/cognitivelattice), so scripts run from the repo root do not write into the tree.
+    """
+    root = os.environ.get(CACHE_DIR_ENV_VAR)
+    if not root:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = os.path.join(xdg_cache, "cognitivelattice")
+    return os.path.join(root, name)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so whitespace-only differences share an entry"""
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def text_hash(text: str) -> str:
+    """SHA-1 of the normalized text, used as the cache key within a model namespace"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache keyed by (model name, SHA-1 of normalized text)
+
+    Level 1 is a bounded in-memory LRU, level 2 is a sqlite table that survives
+    across sessions. Vectors are stored as float32 blobs.
+    """
+
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None,
+                 max_memory_items: int = 50000, persist: bool = True):
+        """
+        Initialize the cache for one embedding model
+
+        Args:
+            model_name: Model identifier (include any encode options that change the vectors)
+            cache_dir: Directory holding the sqlite store (defaults to default_cache_dir("embeddings"))
+            max_memory_items: Maximum vectors kept in the in-memory LRU
+            persist: Write-through to the on-disk store
+        """
+        self.model_name = model_name
+        self.max_memory_items = max_memory_items
+        self.persist = persist
+        self._memory = OrderedDict()  # text hash -> vector
+        self._lock = threading.RLock()
+        self._conn = None
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0
+        }
+
+        if persist:
+            try:
+                cache_dir = cache_dir or default_cache_dir("embeddings")
+                os.makedirs(cache_dir, exist_ok=True)
+                self.db_path = os.path.join(cache_dir, "embeddings.sqlite")
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "model TEXT NOT NULL, "
+                    "text_hash TEXT NOT NULL, "
+                    "dim INTEGER NOT NULL, "
+                    "vector BLOB NOT NULL, "
+                    "PRIMARY KEY (model, text_hash))"
+                )
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ Embedding cache disk store unavailable, using memory only: {e}")
+                self._conn = None
+                self.persist = False
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        """Insert into the LRU, evicting the least recently used entries"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Fetch a set of keys from sqlite in bounded IN-clauses"""
+        found = {}
+        if not self._conn or not keys:
+            return found
+
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model_name, *batch]
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached vectors for a list of texts
+
+        Returns:
+            List aligned with texts, None where the vector is not cached
+        """
+        keys = [text_hash(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        with self._lock:
+            missing_keys = []
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.stats["memory_hits"] += 1
+                else:
+                    missing_keys.append(key)
+
+            disk_vectors = self._load_from_disk(list(set(missing_keys)))
+            for i, key in enumerate(keys):
+                if results[i] is not None:
+                    continue
+                vector = disk_vectors.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    results[i] = vector
+                    self.stats["disk_hits"] += 1
+                else:
+                    self.stats["misses"] += 1
+
+        return results
+
+    def put_many(self, texts: List[str], vectors) -> None:
+        """Store vectors for texts in memory and (optionally) on disk"""
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = text_hash(text)
+                vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+                vector.setflags(write=False)
+                self._remember(key, vector)
+                rows.append((self.model_name, key, int(vector.shape[0]), vector.tobytes()))
+
+            if self._conn and rows:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) "
+                        "VALUES (?, ?, ?, ?)",
+                        rows
+                    )
+                    self._conn.commit()
+                except Exception as e:
+                    print(f"⚠️ Could not persist embeddings: {e}")
+            self.stats["writes"] += len(rows)
+
+    def encode(self, texts: List[str], encode_fn: Callable[[List[str]], Any]) -> np.ndarray:
+        """
+        Return embeddings for texts, calling encode_fn only for uncached texts
+
+        Args:
+            texts: Texts to embed
+            encode_fn: Function mapping a list of texts to an (n, dim) array
+
+        Returns:
+            float32 array of shape (len(texts), dim)
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        cached = self.get_many(texts)
+        missing_positions = [i for i, vector in enumerate(cached) if vector is None]
+
+        if missing_positions:
+            # Encode each distinct (normalized) missing text once
+            unique = {}
+            for i in missing_positions:
+                unique.setdefault(text_hash(texts[i]), texts[i])
+            unique_texts = list(unique.values())
+            new_vectors = np.asarray(encode_fn(unique_texts), dtype=np.float32)
+            self.put_many(unique_texts, new_vectors)
+            by_key = dict(zip(unique.keys(), new_vectors))
+            for i in missing_positions:
+                cached[i] = by_key[text_hash(texts[i])]
+
+        return np.vstack(cached).astype(np.float32, copy=False)
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from memory or disk"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for reporting"""
+        return {
+            "model": self.model_name,
+            **self.stats,
+            "hit_rate": self.hit_rate(),
+            "memory_items": len(self._memory),
+            "persistent": self.persist
+        }
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory LRU (disk entries are kept)"""
+        with self._lock:
+            self._memory.clear()
+
+
+# Shared caches, one per model namespace
+_embedding_caches: Dict[str, EmbeddingCache] = {}
+_embedding_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str, **kwargs) -> EmbeddingCache:
+    """Get the shared embedding cache for a model"""
+    with _embedding_caches_lock:
+        if model_name not in _embedding_caches:
+            _embedding_caches[model_name] = EmbeddingCache(model_name, **kwargs)
+        return _embedding_caches[model_name]
+
+
+def get_all_cache_stats() -> List[Dict[str, Any]]:
+    """Get stats for every embedding cache opened in this process"""
+    with _embedding_caches_lock:
+        return [cache.get_stats() for cache in _embedding_caches.values()]
@@ -0,0 +1,145 @@
+"""
+Embedding Store for CognitiveLattice
+Disk-backed embedding matrix written incrementally into a preallocated np.memmap
+A sidecar metadata file lets the next run reopen the index instantly instead of re-embedding
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+EMBEDDINGS_FILE = "embeddings.bin"
+METADATA_FILE = "store_meta.json"
+CHUNKS_FILE = "chunks.jsonl"
+
+
+def source_fingerprint(file_path: str) -> Dict[str, Any]:
+    """Identify an input file by path, size and modification time"""
+    stat = os.stat(file_path)
+    return {
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime": int(stat.st_mtime)
+    }
+
+
+class EmbeddingStoreWriter:
+    """
+    Writes embedding batches straight into a preallocated memmap
+
+    The sidecar metadata is written last (atomically), so a store interrupted
+    mid-write is never mistaken for a complete one.
+    """
+
+    def __init__(self, store_dir: str, n_rows: int, dim: int, dtype: str = "float32"):
+        """
+        Preallocate the embedding file
+
+        Args:
+            store_dir: Directory holding the store
+            n_rows: Total number of embeddings that will be written
+            dim: Embedding dimension
+            dtype: "float32" or "float16"
+        """
+        self.store_dir = store_dir
+        self.n_rows = n_rows
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.rows_written = 0
+
+        os.makedirs(store_dir, exist_ok=True)
+        # Invalidate any previous store before its embedding file is overwritten
+        meta_path = os.path.join(store_dir, METADATA_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        self._matrix = np.memmap(
+            os.path.join(store_dir, EMBEDDINGS_FILE),
+            dtype=self.dtype, mode="w+", shape=(max(n_rows, 1), dim)
+        )
+
+    def write(self, vectors: np.ndarray) -> None:
+        """Append a batch of embeddings after the rows already written"""
+        count = len(vectors)
+        if self.rows_written + count > self.n_rows:
+            raise ValueError(f"Embedding store overflow: {self.rows_written + count} > {self.n_rows} rows")
+        self._matrix[self.rows_written:self.rows_written + count] = vectors
+        self.rows_written += count
+
+    def finalize(self, chunks: Iterable[Dict[str, Any]], metadata: Dict[str, Any]) -> np.memmap:
+        """
+        Flush the embeddings, write chunk metadata and the sidecar file
+
+        Args:
+            chunks: Chunk metadata aligned with the embedding rows
+            metadata: Extra fields for the sidecar (model name, domain, source...)
+
+        Returns:
+            Read-only memmap over the written rows
+        """
+        self._matrix.flush()
+        del self._matrix
+
+        with open(os.path.join(self.store_dir, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk, ensure_ascii=False, default=str) + "\n")
+
+        sidecar = {
+            "format_version": STORE_FORMAT_VERSION,
+            "rows": self.rows_written,
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+            **metadata
+        }
+        meta_path = os.path.join(self.store_dir, METADATA_FILE)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(sidecar, f, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        return open_embedding_store(self.store_dir)[0]
+
+
+def read_store_metadata(store_dir: str) -> Optional[Dict[str, Any]]:
+    """Load the sidecar metadata, or None if the store is missing or incomplete"""
+    meta_path = os.path.join(store_dir, METADATA_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if metadata.get("format_version") != STORE_FORMAT_VERSION:
+        return None
+    return metadata
+
+
+def open_embedding_store(store_dir: str) -> Tuple[Optional[np.memmap], Optional[Dict[str, Any]]]:
+    """
+    Reopen a finished store as a read-only memmap without reading it into RAM
+
+    Returns:
+        (embedding matrix, sidecar metadata), or (None, None) if unavailable
+    """
+    metadata = read_store_metadata(store_dir)
+    if metadata is None:
+        return None, None
+
+    rows, dim = metadata["rows"], metadata["dim"]
+    if rows == 0:
+        return np.zeros((0, dim), dtype=metadata["dtype"]), metadata
+
+    matrix = np.memmap(
+        os.path.join(store_dir, EMBEDDINGS_FILE),
+        dtype=metadata["dtype"], mode="r", shape=(rows, dim)
+    )
+    return matrix, metadata
+
+
+def load_store_chunks(store_dir: str) -> List[Dict[str, Any]]:
+    """Load the chunk metadata saved alongside the embeddings"""
+    with open(os.path.join(store_dir, CHUNKS_FILE), "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
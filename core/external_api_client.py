@@ -5,11 +5,25 @@ Sends relevant chunks to external APIs (OpenAI, Claude, etc.) for enhanced analy
 
 import os
 import json
-import requests
 import base64
+import random
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from core.http_session import post_json
+from core.llm_response_cache import get_llm_cache, make_payload_key
+from core.streaming import openai_stream_text, read_completion_stream
+from core.rate_limiter import get_rate_limiter, parse_retry_after
+
+# Defaults sized for a typical OpenAI tier; pass lower limits for smaller accounts
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200000
+DEFAULT_MAX_RETRIES = 5
+MAX_BACKOFF_SECONDS = 60
+IMAGE_TOKEN_ESTIMATE = 1000  # Rough cost of a high-detail image input
+
 # Try to load environment variables, but don't fail if dotenv isn't available
 try:
     from dotenv import load_dotenv
@@ -26,9 +40,10 @@ except ImportError:
                     os.environ[key] = value
 
 class ExternalAPIClient:
-    def summarize_analyses(self, analyses: List[Dict[str, Any]], original_query: str) -> Dict[str, Any]:
+    def summarize_analyses(self, analyses: List[Dict[str, Any]], original_query: str, use_cache: bool = True) -> Dict[str, Any]:
         """
         Sends multiple analysis results to the external API for a final summary.
+        Set use_cache=False to force a fresh response instead of a cached one.
         """
         print(f"🌐 Summarizing {len(analyses)} analysis results for query: '{original_query}'")
 
@@ -62,11 +77,6 @@ Please provide a final, consolidated answer based on this data. The answer shoul
                 {"role": "user", "content": prompt}
             ]
 
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
             payload = {
                 "model": model,
                 "messages": messages,
@@ -74,15 +84,8 @@ Please provide a final, consolidated answer based on this data. The answer shoul
                 "temperature": 0.5,
             }
 
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=120 # Increased timeout for potentially large summarization task
-            )
-
-            response.raise_for_status()
-            response_json = response.json()
+            # Longer read timeout for potentially large summarization task
+            response_json = self._post_chat_completion(payload, endpoint="openai_summary", use_cache=use_cache)
             
             summary_content = response_json["choices"][0]["message"]["content"]
             
@@ -97,9 +100,10 @@ Please provide a final, consolidated answer based on this data. The answer shoul
             print(f"Error summarizing analyses: {e}")
             return {"error": str(e), "summary_text": "Could not generate summary."}
 
-    def create_task_plan(self, user_query: str) -> Dict[str, Any]:
+    def create_task_plan(self, user_query: str, use_cache: bool = True) -> Dict[str, Any]:
         """
         Asks the external API to create a step-by-step plan for a given query.
+        Set use_cache=False to force a fresh plan instead of a cached one.
         """
         print(f"📋 Asking external API to create a plan for: '{user_query}'")
         
@@ -155,7 +159,7 @@ Now create the plan for: "{user_query}"
                 {"role": "user", "content": prompt}
             ]
             
-            response_data = self._call_openai_api(model, messages, max_tokens=1000, temperature=0.6)
+            response_data = self._call_openai_api(model, messages, max_tokens=1000, temperature=0.6, use_cache=use_cache)
             
             plan_text = response_data["choices"][0]["message"]["content"]
             
@@ -199,10 +203,25 @@ Now create the plan for: "{user_query}"
     Client for sending CognitiveLattice chunks to external APIs
     """
     
-    def __init__(self, api_provider="openai"):
+    def __init__(self, api_provider="openai",
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: Optional[float] = DEFAULT_TOKENS_PER_MINUTE,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        """
+        Args:
+            api_provider: External API provider ("openai")
+            max_concurrency: Parallel requests in analyze_multiple_chunks
+            requests_per_minute: Request budget shared by all clients of this provider
+            tokens_per_minute: Token budget shared by all clients of this provider
+            max_retries: Retries of a request answered with 429 Too Many Requests
+        """
         self.api_provider = api_provider
         self.api_key = self._load_api_key()
         self.base_url = self._get_base_url()
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.rate_limiter = get_rate_limiter(api_provider, requests_per_minute, tokens_per_minute)
         
     def _load_api_key(self) -> str:
         """Load API key from environment"""
@@ -221,12 +240,16 @@ Now create the plan for: "{user_query}"
         else:
             raise ValueError(f"Unsupported API provider: {self.api_provider}")
     
-    def query_external_api(self, query: str) -> str:
+    def query_external_api(self, query: str, use_cache: bool = True, stop_at_json: bool = False, on_token=None) -> str:
         """
         Send a direct query to external API for simple questions and chat
         
         Args:
             query (str): The user's question or chat message
+            use_cache (bool): Serve an identical earlier query from the LLM response cache
+            stop_at_json (bool): Stream the answer and return the first complete JSON object,
+                cancelling the rest of the generation (for prompts that answer in JSON)
+            on_token: Optional callback receiving each streamed text piece
             
         Returns:
             str: The response from the external API
@@ -239,11 +262,6 @@ Now create the plan for: "{user_query}"
             current_date = datetime.now().strftime("%B %d, %Y")
             current_month = datetime.now().strftime("%B")
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             messages = [
                 {"role": "system", "content": f"You are a helpful AI assistant. Today's date is {current_date}. When answering questions about 'this time of year' or current conditions, use {current_month} {datetime.now().year} as the reference point. Provide clear, informative responses to user questions."},
                 {"role": "user", "content": query}
@@ -256,15 +274,8 @@ Now create the plan for: "{user_query}"
                 "temperature": 0.7,
             }
             
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            response_json = response.json()
+            response_json = self._post_chat_completion(payload, endpoint="openai_chat", use_cache=use_cache,
+                                                       stop_at_json=stop_at_json, on_token=on_token)
             
             return response_json["choices"][0]["message"]["content"]
             
@@ -272,13 +283,15 @@ Now create the plan for: "{user_query}"
             print(f"❌ Direct query failed: {e}")
             return f"I apologize, but I'm having trouble connecting to provide an answer right now. Error: {str(e)}"
     
-    def analyze_chunk_with_external_api(self, chunk_data: Dict[str, Any], analysis_type: str = "comprehensive") -> Dict[str, Any]:
+    def analyze_chunk_with_external_api(self, chunk_data: Dict[str, Any], analysis_type: str = "comprehensive",
+                                        use_cache: bool = True) -> Dict[str, Any]:
         """
         Send a chunk to external API for enhanced analysis
         
         Args:
             chunk_data: The chunk metadata from CognitiveLattice RAG system
             analysis_type: Type of analysis ("comprehensive", "factual", "technical", "visual")
+            use_cache: Serve an identical earlier analysis from the LLM response cache
         
         Returns:
             Enhanced analysis results from external API
@@ -290,7 +303,7 @@ Now create the plan for: "{user_query}"
         
         try:
             if self.api_provider == "openai":
-                response = self._call_openai_api_for_analysis(prompt, chunk_data)
+                response = self._call_openai_api_for_analysis(prompt, chunk_data, use_cache=use_cache)
             else:
                 raise ValueError(f"Unsupported provider: {self.api_provider}")
             
@@ -378,7 +391,7 @@ Return analysis as structured JSON."""
         
         return prompts.get(analysis_type, prompts["comprehensive"])
     
-    def _call_openai_api_for_analysis(self, prompt: str, chunk_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _call_openai_api_for_analysis(self, prompt: str, chunk_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
         """Make API call to OpenAI"""
         
         # Check if chunk has associated images that need vision model
@@ -394,11 +407,6 @@ Return analysis as structured JSON."""
                 {"role": "user", "content": prompt}
             ]
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "model": model,
             "messages": messages,
@@ -407,15 +415,7 @@ Return analysis as structured JSON."""
             "response_format": {"type": "json_object"} if not has_images else None
         }
         
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
-        
-        response.raise_for_status()
-        return response.json()
+        return self._post_chat_completion(payload, endpoint="openai_analysis", use_cache=use_cache)
     
     def _prepare_vision_messages(self, prompt: str, chunk_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Prepare messages for vision-enabled models"""
@@ -501,39 +501,153 @@ Return analysis as structured JSON."""
             "confidence": "none"
         }
     
-    def analyze_multiple_chunks(self, chunks: List[Dict[str, Any]], analysis_type: str = "comprehensive") -> List[Dict[str, Any]]:
+    def analyze_multiple_chunks(self, chunks: List[Dict[str, Any]], analysis_type: str = "comprehensive",
+                                max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Analyze multiple chunks with external API
-        Includes rate limiting and error handling
+        Requests run concurrently under the shared rate limiter; results keep the input order
+
+        Args:
+            chunks: Chunk metadata to analyze
+            analysis_type: Type of analysis for every chunk
+            max_concurrency: Parallel requests (defaults to the client's max_concurrency)
         """
-        results = []
+        workers = max(1, min(max_concurrency or self.max_concurrency, len(chunks)))
         
-        print(f"🌐 Processing {len(chunks)} chunks with external API...")
+        print(f"🌐 Processing {len(chunks)} chunks with external API ({workers} concurrent)...")
         
-        for i, chunk in enumerate(chunks):
+        def analyze(indexed_chunk):
+            i, chunk = indexed_chunk
             try:
-                result = self.analyze_chunk_with_external_api(chunk, analysis_type)
-                results.append(result)
-                
-                # Basic rate limiting (adjust based on API limits)
-                if i < len(chunks) - 1:  # Don't wait after last chunk
-                    import time
-                    time.sleep(1)  # 1 second between requests
-                    
+                return self.analyze_chunk_with_external_api(chunk, analysis_type)
             except Exception as e:
                 print(f"❌ Failed to process chunk {chunk.get('chunk_id', i)}: {e}")
-                results.append(self._create_fallback_response(chunk, str(e)))
+                return self._create_fallback_response(chunk, str(e))
+        
+        if not chunks:
+            return []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(analyze, enumerate(chunks)))
         
         print(f"✅ Completed external analysis of {len(results)} chunks")
         return results
 
-    def _call_openai_api(self, model: str, messages: List[Dict[str, Any]], max_tokens: int, temperature: float) -> Dict[str, Any]:
-        """Make API call to OpenAI with specified model and parameters"""
+    def _estimate_tokens(self, payload: Dict[str, Any]) -> int:
+        """Rough token estimate of a chat request: ~4 characters per token plus the completion budget"""
+        text_chars = 0
+        images = 0
+        for message in payload.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, str):
+                text_chars += len(content)
+            elif isinstance(content, list):
+                for part in content:
+                    if part.get("type") == "text":
+                        text_chars += len(part.get("text", ""))
+                    else:
+                        images += 1
+        return text_chars // 4 + images * IMAGE_TOKEN_ESTIMATE + payload.get("max_tokens", 0)
+
+    def _post_chat_completion(self, payload: Dict[str, Any], endpoint: str, use_cache: bool = True,
+                              stop_at_json: bool = False, on_token=None) -> Dict[str, Any]:
+        """
+        POST a chat completion under the rate limiter, backing off on 429 responses
+
+        A 429 pauses every caller sharing the limiter for the server's Retry-After,
+        or an exponential backoff with jitter when the header is missing.
+        Successful responses are stored in the LLM response cache, and identical
+        requests are answered from it unless use_cache is False.
+
+        With stop_at_json or on_token the completion is streamed (SSE). stop_at_json
+        returns only the first complete JSON object and closes the stream, cancelling
+        the rest of the generation. The result has the usual chat-completion shape.
+        A cached response is replayed to on_token as a single piece.
+        """
+        stream = bool(stop_at_json or on_token)
+        if stream:
+            payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        cache = get_llm_cache()
+        # A JSON-only answer is cached apart from the full completion of the same request
+        cache_payload = {**payload, "stop_at_json": True} if stop_at_json else payload
+        cache_key = make_payload_key(endpoint, f"{self.api_provider}:{payload.get('model')}", cache_payload)
+        if use_cache:
+            cached = cache.get(cache_key, endpoint=endpoint)
+            if cached is not None:
+                print(f"⚡ {self.api_provider.upper()} response served from cache ({endpoint})")
+                if on_token:
+                    cached_text = cached.get("choices", [{}])[0].get("message", {}).get("content")
+                    if cached_text:
+                        on_token(cached_text)
+                return cached
+        else:
+            cache.bypass(endpoint)
         
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        estimated_tokens = self._estimate_tokens(payload)
+        
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            response = post_json(
+                f"{self.base_url}/chat/completions",
+                payload,
+                headers=headers,
+                endpoint=endpoint,
+                stream=stream
+            )
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            response.close()
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = min(MAX_BACKOFF_SECONDS, 2 ** attempt) * random.uniform(1.0, 1.5)
+            print(f"⏳ Rate limited by {self.api_provider.upper()}, retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 1}/{self.max_retries})")
+            self.rate_limiter.pause(delay)
+        
+        if stream and not response.ok:
+            response.close()
+        response.raise_for_status()
+        if stream:
+            response_json = self._collect_stream(response, payload, estimated_tokens, stop_at_json, on_token)
+        else:
+            response_json = response.json()
+        actual_tokens = response_json.get("usage", {}).get("total_tokens")
+        if actual_tokens is not None:
+            self.rate_limiter.record_usage(estimated_tokens, actual_tokens)
+        if use_cache:
+            cache.put(cache_key, response_json, endpoint=endpoint, model=payload.get("model", ""))
+        return response_json
+
+    def _collect_stream(self, response, payload: Dict[str, Any], estimated_tokens: int,
+                        stop_at_json: bool, on_token) -> Dict[str, Any]:
+        """Read a streamed chat completion into the non-streamed response shape"""
+        result = read_completion_stream(response, openai_stream_text, stop_at_json, on_token)
+        content = result["json_text"] or result["text"]
+        if result["stopped_early"]:
+            print(f"✂️ JSON object complete, cancelled the rest of the {self.api_provider.upper()} generation")
+        last_event = result["last_event"]
+        usage = last_event.get("usage")
+        if not usage:
+            # Stopped before the usage chunk: prompt estimate plus ~4 characters per generated token
+            prompt_tokens = max(0, estimated_tokens - payload.get("max_tokens", 0))
+            usage = {"total_tokens": prompt_tokens + len(result["text"]) // 4, "estimated": True}
+        choices = last_event.get("choices") or [{}]
+        return {
+            "model": last_event.get("model", payload.get("model")),
+            "choices": [{
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop" if result["stopped_early"] else choices[0].get("finish_reason")
+            }],
+            "usage": usage,
+            "streamed": True
+        }
+
+    def _call_openai_api(self, model: str, messages: List[Dict[str, Any]], max_tokens: int, temperature: float,
+                         use_cache: bool = True) -> Dict[str, Any]:
+        """Make API call to OpenAI with specified model and parameters"""
         
         payload = {
             "model": model,
@@ -542,15 +656,7 @@ Return analysis as structured JSON."""
             "temperature": temperature,
         }
         
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
-        
-        response.raise_for_status()
-        return response.json()
+        return self._post_chat_completion(payload, endpoint="openai_completion", use_cache=use_cache)
     
 def identify_relevant_chunks_for_external_analysis(chunk_metadata: List[Dict[str, Any]], 
                                                  criteria: Dict[str, Any] = None) -> List[Dict[str, Any]]:
@@ -0,0 +1,181 @@
+"""
+Facet Index for CognitiveLattice
+Columnar index over structured chunk metadata built at ingest time
+Flags are kept as packed bitsets and categorical fields as dictionary-encoded codes,
+so metadata filters select candidate rows before any vector is scored
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Boolean fields: one bitset per value
+FLAG_FIELDS = (
+    'pediatric_relevant',
+    'drug_classification.controlled_substance',
+    'drug_classification.prescription_required'
+)
+
+# List fields (e.g. safety_flags): one bitset per distinct list element
+MULTI_VALUE_FIELDS = ('safety_flags',)
+
+# Low-cardinality string fields: dictionary-encoded into one code per row
+CATEGORY_FIELDS = (
+    'medical_complexity',
+    'drug_classification.therapeutic_class',
+    'drug_classification.drug_type',
+    'source_type'
+)
+
+_MISSING = object()
+
+
+def get_field(chunk: Dict[str, Any], field: str) -> Any:
+    """Value of a dotted field path ('drug_classification.drug_type'), or _MISSING"""
+    value = chunk
+    for key in field.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+class FacetIndex:
+    """
+    Columnar facet index aligned with embedding rows
+
+    Rows are appended in the same order as the embedding matrix. Filters are
+    evaluated as AND across fields; a list of values for one field matches
+    rows having any of them.
+    """
+
+    def __init__(self,
+                 flag_fields: Iterable[str] = FLAG_FIELDS,
+                 multi_value_fields: Iterable[str] = MULTI_VALUE_FIELDS,
+                 category_fields: Iterable[str] = CATEGORY_FIELDS):
+        self.flag_fields = tuple(flag_fields)
+        self.multi_value_fields = tuple(multi_value_fields)
+        self.category_fields = tuple(category_fields)
+        self.n_rows = 0
+
+        # (field, value) -> rows holding that value, packed into a bitset on first use
+        self._flag_rows: Dict[Tuple[str, Any], List[int]] = {}
+        self._bitsets: Dict[Tuple[str, Any], np.ndarray] = {}
+
+        # field -> per-row codes (-1 = missing) and the value dictionary
+        self._codes: Dict[str, List[int]] = {field: [] for field in self.category_fields}
+        self._dictionaries: Dict[str, Dict[Any, int]] = {field: {} for field in self.category_fields}
+        self._code_arrays: Dict[str, np.ndarray] = {}
+
+        self._seen_fields = set()
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def add_chunks(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        """Append chunks as the next rows of the index"""
+        self._bitsets.clear()
+        self._code_arrays.clear()
+
+        for chunk in chunks:
+            row = self.n_rows
+
+            for field in self.flag_fields:
+                value = get_field(chunk, field)
+                if value is not _MISSING:
+                    self._seen_fields.add(field)
+                    self._flag_rows.setdefault((field, bool(value)), []).append(row)
+
+            for field in self.multi_value_fields:
+                values = get_field(chunk, field)
+                if values is not _MISSING:
+                    self._seen_fields.add(field)
+                    for value in dict.fromkeys(values or ()):
+                        self._flag_rows.setdefault((field, value), []).append(row)
+
+            for field in self.category_fields:
+                value = get_field(chunk, field)
+                if value is _MISSING or isinstance(value, (dict, list)):
+                    self._codes[field].append(-1)
+                    continue
+                self._seen_fields.add(field)
+                dictionary = self._dictionaries[field]
+                code = dictionary.setdefault(value, len(dictionary))
+                self._codes[field].append(code)
+
+            self.n_rows += 1
+
+    def _bitset(self, field: str, value: Any) -> np.ndarray:
+        """Packed bitset of the rows where field holds value"""
+        key = (field, value)
+        bitset = self._bitsets.get(key)
+        if bitset is None:
+            bits = np.zeros(self.n_rows, dtype=bool)
+            bits[self._flag_rows.get(key, [])] = True
+            bitset = np.packbits(bits)
+            self._bitsets[key] = bitset
+        return bitset
+
+    def _category_bitset(self, field: str, values: List[Any]) -> np.ndarray:
+        """Packed bitset of the rows whose category code is one of values"""
+        codes = self._code_arrays.get(field)
+        if codes is None:
+            codes = np.asarray(self._codes[field], dtype=np.int32)
+            self._code_arrays[field] = codes
+        dictionary = self._dictionaries[field]
+        wanted = [dictionary[value] for value in values if value in dictionary]
+        return np.packbits(np.isin(codes, wanted))
+
+    def _condition_bitset(self, field: str, value: Any) -> np.ndarray:
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+        if field in self.category_fields:
+            return self._category_bitset(field, values)
+
+        if field in self.flag_fields:
+            values = [bool(v) for v in values]
+        elif field not in self.multi_value_fields:
+            raise KeyError(f"'{field}' is not an indexed facet")
+
+        bitset = self._bitset(field, values[0]) if values else np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        for other in values[1:]:
+            bitset = bitset | self._bitset(field, other)
+        return bitset
+
+    def filter_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Boolean row mask for a set of facet filters
+
+        Args:
+            filters: {field: value or list of values}, e.g.
+                {'pediatric_relevant': True, 'safety_flags': 'high_risk',
+                 'medical_complexity': ['medium', 'high']}
+
+        An indexed field that no chunk carries matches no rows.
+        
+        Raises:
+            KeyError: If a field is not indexed
+        """
+        bitset = np.full((self.n_rows + 7) // 8, 0xFF, dtype=np.uint8)
+        for field, value in filters.items():
+            if field not in self._seen_fields:
+                if field not in self.flag_fields + self.multi_value_fields + self.category_fields:
+                    raise KeyError(f"'{field}' is not an indexed facet")
+                bitset[:] = 0
+                continue
+            bitset &= self._condition_bitset(field, value)
+        return np.unpackbits(bitset, count=self.n_rows).astype(bool)
+
+    def filter_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Sorted row indices matching all filters (see filter_mask)"""
+        return np.flatnonzero(self.filter_mask(filters))
+
+    def value_counts(self, field: str) -> Dict[Any, int]:
+        """Number of rows per value of an indexed facet"""
+        if field in self.category_fields:
+            dictionary = self._dictionaries[field]
+            counts = np.bincount(
+                np.asarray(self._codes[field], dtype=np.int32) + 1, minlength=len(dictionary) + 1
+            )
+            return {value: int(counts[code + 1]) for value, code in dictionary.items()}
+        return {value: len(rows) for (name, value), rows in self._flag_rows.items() if name == field}
@@ -0,0 +1,101 @@
+"""
+Pooled HTTP Sessions for CognitiveLattice
+One keep-alive requests.Session per host, shared by every LLM client in the process
+Connections (and their TCP/TLS handshakes) are reused across calls instead of opened per request
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connections kept alive per host; raise for many concurrent LLM calls to one API
+DEFAULT_POOL_MAXSIZE = 16
+
+# endpoint -> (connect timeout, read timeout) in seconds
+ENDPOINT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "llama_completion": (5, 120),
+    "openai_chat": (10, 30),
+    "openai_analysis": (10, 60),
+    "openai_summary": (10, 120),
+    "openai_completion": (10, 60),
+    "default": (10, 60)
+}
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+
+
+def configure_http_pool(pool_maxsize: int) -> None:
+    """
+    Set the keep-alive pool size per host
+
+    Sessions already created are closed and recreated on next use with the new size.
+    """
+    global _pool_maxsize
+    with _sessions_lock:
+        _pool_maxsize = pool_maxsize
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def set_endpoint_timeout(endpoint: str, connect: float, read: float) -> None:
+    """Override the (connect, read) timeout used for an endpoint"""
+    ENDPOINT_TIMEOUTS[endpoint] = (connect, read)
+
+
+def get_timeout(endpoint: str) -> Tuple[float, float]:
+    """(connect, read) timeout for an endpoint, falling back to the default"""
+    return ENDPOINT_TIMEOUTS.get(endpoint, ENDPOINT_TIMEOUTS["default"])
+
+
+def get_session(url: str) -> requests.Session:
+    """Shared keep-alive session for the host of url"""
+    parts = urlsplit(url)
+    host_key = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(host_key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host_key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_pool_maxsize)
+                session.mount(f"{parts.scheme}://", adapter)
+                _sessions[host_key] = session
+    return session
+
+
+def post_json(url: str,
+              payload: Dict[str, Any],
+              headers: Optional[Dict[str, str]] = None,
+              endpoint: str = "default",
+              timeout: Optional[Tuple[float, float]] = None,
+              **kwargs) -> requests.Response:
+    """
+    POST a JSON payload over the host's pooled session
+
+    Args:
+        url: Request URL
+        payload: JSON body
+        headers: Extra headers (Content-Type is set by requests)
+        endpoint: Name in ENDPOINT_TIMEOUTS selecting the timeouts
+        timeout: Explicit (connect, read) timeout overriding the endpoint's
+        **kwargs: Passed through to requests (e.g. stream=True)
+
+    Returns:
+        The response (status is not checked)
+    """
+    return get_session(url).post(url, json=payload, headers=headers,
+                                 timeout=timeout or get_timeout(endpoint), **kwargs)
+
+
+def close_sessions() -> None:
+    """Close every pooled connection"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,262 @@
+"""
+Local Intent Classifier for CognitiveLattice
+Nearest-centroid classifier over sentence embeddings of labeled example requests
+Answers confidently-classified queries in milliseconds; uncertain ones fall back to LLaMA
+"""
+
+import os
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.embedding_cache import get_embedding_cache
+
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"  # Fast, lightweight model
+# Starting points only: not yet measured against the real embedding model
+# (run tests/benchmark_intent_classifier.py with all-MiniLM-L6-v2 to tune them)
+DEFAULT_MIN_SIMILARITY = 0.45  # Cosine similarity to the best centroid
+DEFAULT_MIN_MARGIN = 0.08      # Lead of the best centroid over the best other intent
+
+# Set to 1 to try the local classifier before LLaMA in the interactive agent (main.py)
+LOCAL_INTENT_ENV_VAR = "COGNITIVELATTICE_LOCAL_INTENT"
+
+# (query, intent, action) examples the centroids are built from; same labels as diagnose_user_intent
+INTENT_EXAMPLES: List[Tuple[str, str, str]] = [
+    ("hello", "chat", "chat"),
+    ("hi there, how are you?", "chat", "chat"),
+    ("good morning", "chat", "chat"),
+    ("thanks, that was helpful", "chat", "chat"),
+    ("thank you so much", "chat", "chat"),
+    ("what's up?", "chat", "chat"),
+    ("who are you?", "chat", "chat"),
+    ("tell me a joke", "chat", "chat"),
+    ("how is Myrtle Beach this time of year?", "query", "query"),
+    ("what's the weather like in Denver in October?", "query", "query"),
+    ("what is the capital of Australia?", "query", "query"),
+    ("how many ounces are in a cup?", "query", "query"),
+    ("when was the Eiffel Tower built?", "query", "query"),
+    ("what does a torque wrench do?", "query", "query"),
+    ("is it safe to drink tap water in Lisbon?", "query", "query"),
+    ("explain how vaccines work", "query", "query"),
+    ("analyze the safety section of this document", "analysis", "analyze"),
+    ("what does the manual say about maintenance intervals?", "analysis", "analyze"),
+    ("analyze chapter 3 of the document", "analysis", "analyze"),
+    ("what are the main risks described in this report?", "analysis", "analyze"),
+    ("compare the two procedures in the document", "analysis", "analyze"),
+    ("list all the characters in the document", "analysis", "extract"),
+    ("extract every date mentioned in the file", "analysis", "extract"),
+    ("pull out the torque specifications from the manual", "analysis", "extract"),
+    ("find all the part numbers in this document", "analysis", "extract"),
+    ("extract the adverse events from the report", "analysis", "extract"),
+    ("summarize the document", "broad", "summarize"),
+    ("give me an overview of the whole file", "broad", "summarize"),
+    ("what is this document about?", "broad", "summarize"),
+    ("summarize the entire report", "broad", "summarize"),
+    ("give me the big picture of this paper", "broad", "summarize"),
+    ("plan a trip to Paris", "task", "plan"),
+    ("help me plan a week in Japan", "task", "plan"),
+    ("create a business plan for a coffee shop", "task", "plan"),
+    ("help me organize a birthday party", "task", "plan"),
+    ("plan my move to a new apartment", "task", "plan"),
+    ("put together a study schedule for my exams", "task", "plan"),
+    ("help me prepare for a job interview next week", "task", "plan"),
+    ("navigate to chipotle.com", "web_automation", "web_navigate"),
+    ("order a burrito bowl on chipotle.com", "web_automation", "web_navigate"),
+    ("go to amazon.com and search for headphones", "web_automation", "web_navigate"),
+    ("open the website and click the login button", "web_automation", "web_navigate"),
+    ("book a table on opentable.com for tonight", "web_automation", "web_navigate"),
+    ("fill out the contact form on their website", "web_automation", "web_navigate"),
+    ("search google for hotels near the airport", "web_automation", "web_navigate"),
+    ("use the browser to check my order status", "web_automation", "web_navigate"),
+]
+
+
+class IntentClassifier:
+    """
+    Embedding nearest-centroid intent classifier
+
+    Each (intent, action) label has a centroid: the normalized mean of its example
+    embeddings. A query takes the label of its most similar centroid and counts as
+    confident when that similarity and its margin over the best other intent clear thresholds.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME,
+                 examples: Optional[List[Tuple[str, str, str]]] = None,
+                 min_similarity: float = DEFAULT_MIN_SIMILARITY,
+                 min_margin: float = DEFAULT_MIN_MARGIN):
+        """
+        Initialize the classifier (the embedding model loads on first use)
+
+        Args:
+            model_name: sentence-transformers model used for queries and examples
+            examples: (query, intent, action) training examples
+            min_similarity: Minimum cosine similarity to the best centroid to answer locally
+            min_margin: Minimum lead over the best centroid of another intent to answer locally
+        """
+        self.model_name = model_name
+        self.examples = list(examples or INTENT_EXAMPLES)
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.model = None
+        self.labels: List[Tuple[str, str]] = []
+        self.centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.embeddings_cache = get_embedding_cache(f"{model_name}:normalized")
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return self.embeddings_cache.encode(
+            texts, lambda batch: self.model.encode(batch, normalize_embeddings=True, show_progress_bar=False)
+        )
+
+    def _initialize(self):
+        """Load the model and build the centroids"""
+        with self._lock:
+            if self.centroids is not None:
+                return
+            if not EMBEDDINGS_AVAILABLE:
+                raise RuntimeError("sentence-transformers is not installed")
+            print(f"🤖 Loading intent classifier model: {self.model_name}")
+            self.model = SentenceTransformer(self.model_name)
+            self._build_centroids()
+
+    def _build_centroids(self):
+        vectors = self._embed([query for query, _, _ in self.examples])
+        by_label: Dict[Tuple[str, str], List[np.ndarray]] = {}
+        for (_, intent, action), vector in zip(self.examples, vectors):
+            by_label.setdefault((intent, action), []).append(vector)
+        self.labels = list(by_label)
+        centroids = np.vstack([np.mean(by_label[label], axis=0) for label in self.labels])
+        self.centroids = centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+    def add_examples(self, examples: List[Tuple[str, str, str]]):
+        """Add labeled (query, intent, action) examples and rebuild the centroids"""
+        self.examples.extend(examples)
+        if self.centroids is not None:
+            with self._lock:
+                self._build_centroids()
+
+    def classify(self, query: str) -> Dict[str, Any]:
+        """
+        Classify a user request
+
+        Returns:
+            Dict with intent, action, similarity, margin, confident and latency_ms
+        """
+        start = time.perf_counter()
+        self._initialize()
+        scores = self.centroids @ self._embed([query])[0]
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        intent, action = self.labels[order[0]]
+        # Margin over the best centroid of another intent (analyze vs extract share "analysis")
+        rivals = [float(scores[i]) for i in order[1:] if self.labels[i][0] != intent]
+        margin = best - rivals[0] if rivals else best
+        return {
+            "intent": intent,
+            "action": action,
+            "similarity": best,
+            "margin": margin,
+            "confident": best >= self.min_similarity and margin >= self.min_margin,
+            "latency_ms": (time.perf_counter() - start) * 1000
+        }
+
+
+def evaluate_intent_classifier(labeled: List[Dict[str, str]],
+                               classify_fn: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Measure intent accuracy and latency on a labeled set
+
+    Args:
+        labeled: Items with "query", "intent" and "action"
+        classify_fn: Maps a query to a dict with "intent", "action" and optionally "source"
+
+    Returns:
+        Dict with intent/action accuracy, latency percentiles and how many answers came from each source
+    """
+    intent_correct = action_correct = 0
+    latencies = []
+    sources: Dict[str, int] = {}
+    errors = []
+    for item in labeled:
+        start = time.perf_counter()
+        result = classify_fn(item["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        source = result.get("source", "unknown")
+        sources[source] = sources.get(source, 0) + 1
+        if result.get("intent") == item["intent"]:
+            intent_correct += 1
+        else:
+            errors.append({"query": item["query"], "expected": item["intent"],
+                           "got": result.get("intent"), "source": source})
+        if result.get("action") == item["action"]:
+            action_correct += 1
+
+    total = len(labeled)
+    latencies.sort()
+    return {
+        "examples": total,
+        "intent_accuracy": intent_correct / total if total else 0.0,
+        "action_accuracy": action_correct / total if total else 0.0,
+        "mean_ms": statistics.mean(latencies) if latencies else 0.0,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": latencies[max(0, int(total * 0.95) - 1)] if latencies else 0.0,
+        "sources": sources,
+        "errors": errors
+    }
+
+
+# Shared classifier used by diagnose_user_intent
+_intent_classifier: Optional[IntentClassifier] = None
+_intent_classifier_lock = threading.Lock()
+_intent_stats = {"local": 0, "fallback": 0, "local_ms": 0.0, "fallback_ms": 0.0}
+
+
+def local_intent_enabled() -> bool:
+    """True when $COGNITIVELATTICE_LOCAL_INTENT turns the local classifier on"""
+    return bool(int(os.getenv(LOCAL_INTENT_ENV_VAR, "0") or 0))
+
+
+def configure_intent_classifier(**kwargs) -> IntentClassifier:
+    """Replace the shared classifier (e.g. a different model or thresholds)"""
+    global _intent_classifier
+    with _intent_classifier_lock:
+        _intent_classifier = IntentClassifier(**kwargs)
+        return _intent_classifier
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """Shared classifier, or None when sentence-transformers is not installed"""
+    global _intent_classifier
+    if not EMBEDDINGS_AVAILABLE:
+        return None
+    with _intent_classifier_lock:
+        if _intent_classifier is None:
+            _intent_classifier = IntentClassifier()
+        return _intent_classifier
+
+
+def record_intent_decision(source: str, latency_ms: float):
+    """Count a diagnose_user_intent answer from "local" or "fallback" (LLaMA)"""
+    _intent_stats[source] += 1
+    _intent_stats[f"{source}_ms"] += latency_ms
+
+
+def get_intent_stats() -> Dict[str, Any]:
+    """Share of intents answered locally and the mean latency of each path"""
+    local, fallback = _intent_stats["local"], _intent_stats["fallback"]
+    total = local + fallback
+    return {
+        **_intent_stats,
+        "local_rate": local / total if total else 0.0,
+        "local_mean_ms": _intent_stats["local_ms"] / local if local else 0.0,
+        "fallback_mean_ms": _intent_stats["fallback_ms"] / fallback if fallback else 0.0
+    }
@@ -0,0 +1,112 @@
+"""
+Keyword Automaton for CognitiveLattice
+Precompiled multi-pattern matcher that counts many keywords in one pass over the text
+Used for document routing, safety auditing and metadata extraction on every chunk and query
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+# Use the C Aho-Corasick implementation when installed (pip install pyahocorasick).
+# Without it, matching falls back to one C-level str.count per keyword, which is
+# faster in CPython than any pure-Python single-pass automaton.
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordAutomaton:
+    """
+    Case-insensitive substring matcher for a fixed set of keywords
+
+    Matching follows the semantics of `keyword in text.lower()` and
+    `text.lower().count(keyword)`, but with pyahocorasick installed all
+    keywords are found in a single linear scan.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Compile the automaton
+
+        Args:
+            patterns: Keywords or phrases to match (matched case-insensitively)
+        """
+        self.patterns = list(dict.fromkeys(p.lower() for p in patterns if p))
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for pattern in self.patterns:
+                self._automaton.add_word(pattern, pattern)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+
+    def iter_matches(self, text_lower: str) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (start, pattern) for every occurrence, including overlapping ones
+
+        Args:
+            text_lower: Text that is already lower-cased
+        """
+        if not self.patterns:
+            return
+
+        if self._automaton is not None:
+            for end, pattern in self._automaton.iter(text_lower):
+                yield end - len(pattern) + 1, pattern
+        else:
+            for pattern in self.patterns:
+                start = text_lower.find(pattern)
+                while start != -1:
+                    yield start, pattern
+                    start = text_lower.find(pattern, start + 1)
+
+    def count(self, text: str, lowercase: bool = True) -> Dict[str, int]:
+        """
+        Count non-overlapping occurrences of every pattern, like str.count
+
+        Args:
+            text: Text to scan
+            lowercase: Lower-case the text first (skip if it already is)
+
+        Returns:
+            Dict of pattern -> count, only for patterns that occur
+        """
+        text_lower = text.lower() if lowercase else text
+
+        if self._automaton is None:
+            counts = {}
+            for pattern in self.patterns:
+                if pattern in text_lower:
+                    counts[pattern] = text_lower.count(pattern)
+            return counts
+
+        counts: Dict[str, int] = defaultdict(int)
+        next_free: Dict[str, int] = {}
+        # Matches arrive in end order, so each pattern's starts are increasing
+        for start, pattern in self.iter_matches(text_lower):
+            if start >= next_free.get(pattern, 0):
+                counts[pattern] += 1
+                next_free[pattern] = start + len(pattern)
+
+        return dict(counts)
+
+    def present(self, text: str, lowercase: bool = True) -> Set[str]:
+        """
+        Return the set of patterns that occur in the text (membership only)
+
+        Args:
+            text: Text to scan
+            lowercase: Lower-case the text first (skip if it already is)
+        """
+        text_lower = text.lower() if lowercase else text
+        if self._automaton is None:
+            return {pattern for pattern in self.patterns if pattern in text_lower}
+        return {pattern for _, pattern in self._automaton.iter(text_lower)}
+
+    def found(self, text: str, lowercase: bool = True) -> List[str]:
+        """Return the patterns that occur in the text, in pattern order"""
+        present = self.present(text, lowercase)
+        return [pattern for pattern in self.patterns if pattern in present]
@@ -5,6 +5,11 @@ Handles all LLaMA model interactions, prompts, and content analysis
 
 import requests
 import json
+import time
+
+from core.http_session import post_json
+from core.llm_response_cache import get_llm_cache, make_payload_key
+from core.streaming import llama_stream_text, read_completion_stream
 
 
 # === Summarization templates by content type ===
@@ -44,43 +49,70 @@ SUMMARY_TEMPLATES = {
 }
 
 
-def run_llama_inference(prompt, server_url="http://localhost:8080/completion"):
+def run_llama_inference(prompt, server_url="http://localhost:8080/completion", use_cache=True,
+                        stop_at_json=False, on_token=None):
     """
     Basic LLaMA inference without context.
     
     Args:
         prompt: Text prompt to send to LLaMA
         server_url: URL of the LLaMA server
+        use_cache: Serve identical prompts from the LLM response cache (False for non-deterministic uses)
+        stop_at_json: Stream the generation and return only the first complete JSON object,
+            cancelling the rest of the generation as soon as it closes
+        on_token: Optional callback receiving each streamed text piece
+            (a cached response is replayed to it as a single piece)
         
     Returns:
         Generated text response or "CONFUSED" on error
     """
+    stream = bool(stop_at_json or on_token)
+    payload = {
+        "prompt": prompt,
+        "n_predict": 512,
+        "temperature": 0.3,
+        "top_p": 0.95,
+        "repeat_penalty": 1.1,
+        "stream": stream
+    }
+    cache = get_llm_cache()
+    # A JSON-only answer is cached apart from the full generation of the same prompt
+    cache_payload = {**payload, "stop_at_json": True} if stop_at_json else payload
+    cache_key = make_payload_key("llama_completion", server_url, cache_payload)
+    if use_cache:
+        cached = cache.get(cache_key, endpoint="llama_completion")
+        if cached is not None:
+            print("⚡ LLaMA response served from cache")
+            if on_token:
+                on_token(cached)
+            return cached
+    else:
+        cache.bypass("llama_completion")
+
     print("🔧 Sending prompt to llama-server...")
     try:
-        response = requests.post(
-            server_url,
-            headers={"Content-Type": "application/json"},
-            json={
-                "prompt": prompt,
-                "n_predict": 512,
-                "temperature": 0.3,
-                "top_p": 0.95,
-                "repeat_penalty": 1.1,
-                "stream": False
-            },
-            timeout=120
-        )
+        response = post_json(server_url, payload, endpoint="llama_completion", stream=stream)
         response.raise_for_status()
-        data = response.json()
+        if stream:
+            result = read_completion_stream(response, llama_stream_text, stop_at_json, on_token)
+            content = result["json_text"] or result["text"]
+            if result["stopped_early"]:
+                print("✂️ JSON object complete, cancelled the rest of the generation")
+        else:
+            content = response.json()['content']
         print("✅ LLaMA output:")
-        print(data['content'])
-        return data['content'].strip()
+        print(content)
+        content = content.strip()
+        if use_cache:
+            cache.put(cache_key, content, endpoint="llama_completion", model=server_url)
+        return content
     except requests.exceptions.RequestException as e:
         print(f"❌ Request failed: {e}")
         return "CONFUSED"
 
 
-def run_llama_inference_with_context(prompt, context=None, server_url="http://localhost:8080/completion"):
+def run_llama_inference_with_context(prompt, context=None, server_url="http://localhost:8080/completion",
+                                     use_cache=True, stop_at_json=False, on_token=None):
     """
     LLaMA inference with optional context from previous chunks.
     
@@ -88,6 +120,9 @@ def run_llama_inference_with_context(prompt, context=None, server_url="http://lo
         prompt: Text prompt to send to LLaMA
         context: Optional context dictionary with previous_chunks
         server_url: URL of the LLaMA server
+        use_cache: Serve identical prompts from the LLM response cache
+        stop_at_json: Return the first complete JSON object and cancel the rest
+        on_token: Optional callback receiving each streamed text piece
         
     Returns:
         Generated text response or "CONFUSED" on error
@@ -108,7 +143,8 @@ def run_llama_inference_with_context(prompt, context=None, server_url="http://lo
     else:
         enhanced_prompt = prompt
     
-    return run_llama_inference(enhanced_prompt, server_url)
+    return run_llama_inference(enhanced_prompt, server_url, use_cache=use_cache,
+                               stop_at_json=stop_at_json, on_token=on_token)
 
 
 def diagnose_content_type(sample_text):
@@ -140,7 +176,61 @@ def diagnose_content_type(sample_text):
         return "default"
 
 
-def diagnose_user_intent(user_query, server_url="http://localhost:8080/completion"):
+_local_intent_classifier_failed = False
+
+
+def _classify_intent_locally(user_query):
+    """Local nearest-centroid classification, or None when the classifier cannot be used"""
+    global _local_intent_classifier_failed
+    if _local_intent_classifier_failed:
+        return None
+    try:
+        from core.intent_classifier import get_intent_classifier
+        classifier = get_intent_classifier()
+        if classifier is None:
+            _local_intent_classifier_failed = True
+            return None
+        return classifier.classify(user_query)
+    except Exception as e:
+        print(f"⚠️ Local intent classifier unavailable, using LLaMA only: {e}")
+        _local_intent_classifier_failed = True
+        return None
+
+
+def diagnose_user_intent(user_query, server_url="http://localhost:8080/completion", use_local_classifier=False):
+    """
+    Classify the user's intent, locally when confident and with LLaMA otherwise.
+
+    Args:
+        user_query: The user's request.
+        server_url: URL of the LLaMA server.
+        use_local_classifier: Try the embedding classifier before LLaMA. Off by default
+            until its thresholds are measured with tests/benchmark_intent_classifier.py
+            against the real embedding model; main.py turns it on with
+            $COGNITIVELATTICE_LOCAL_INTENT=1.
+
+    Returns:
+        A dictionary with 'intent', 'action' and 'source' ("local" or "llama").
+    """
+    start = time.perf_counter()
+    if use_local_classifier:
+        local = _classify_intent_locally(user_query)
+        if local and local["confident"]:
+            from core.intent_classifier import record_intent_decision
+            record_intent_decision("local", local["latency_ms"])
+            print(f"⚡ Local intent: {local['intent']}/{local['action']} "
+                  f"(similarity {local['similarity']:.2f}, {local['latency_ms']:.1f} ms)")
+            return {"intent": local["intent"], "action": local["action"], "source": "local"}
+
+    intent_data = _diagnose_user_intent_with_llama(user_query, server_url)
+    intent_data["source"] = "llama"
+    if use_local_classifier and not _local_intent_classifier_failed:
+        from core.intent_classifier import record_intent_decision
+        record_intent_decision("fallback", (time.perf_counter() - start) * 1000)
+    return intent_data
+
+
+def _diagnose_user_intent_with_llama(user_query, server_url="http://localhost:8080/completion"):
     """
     Use LLaMA to classify the user's intent.
 
@@ -182,7 +272,8 @@ Example correct responses:
 
 JSON Response:[/INST]"""
 
-    response_text = run_llama_inference(prompt, server_url)
+    # Only the JSON object is needed; stop decoding as soon as it closes
+    response_text = run_llama_inference(prompt, server_url, stop_at_json=True)
 
     try:
         # The model might return markdown ```json ... ```, so we clean it
@@ -237,7 +328,7 @@ def extract_key_facts(summary_text, doc_type):
 
 Return only a JSON object with relevant keys like: characters, locations, events, dates, etc.[/INST]"""
     
-    facts_json = run_llama_inference(fact_prompt)
+    facts_json = run_llama_inference(fact_prompt, stop_at_json=True)
     try:
         return json.loads(facts_json)
     except:
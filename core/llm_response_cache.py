@@ -0,0 +1,275 @@
+"""
+LLM Response Cache for CognitiveLattice
+Content-addressed sqlite cache of LLM responses keyed by (endpoint, model, normalized prompt, sampling params)
+Repeated classification, intent, planning and web-step prompts are answered without another model call
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from core.embedding_cache import default_cache_dir, normalize_text
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+EVICTION_CHECK_INTERVAL = 50  # Writes between size checks
+
+# Payload fields that carry the prompt rather than sampling parameters
+_PROMPT_FIELDS = ("prompt", "messages")
+# Fields that change transport, not the response
+_IGNORED_FIELDS = ("stream", "stream_options")
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize every string inside a prompt structure (whitespace-only differences share an entry)"""
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def make_cache_key(endpoint: str, model: str, prompt: Any, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    SHA-256 over the endpoint, model, normalized prompt and sampling parameters
+
+    Args:
+        endpoint: Call site family (e.g. "llama_completion", "openai_chat")
+        model: Model name, or the server URL for local models
+        prompt: Prompt string or chat messages
+        params: Sampling parameters (temperature, max_tokens, ...)
+    """
+    material = json.dumps({
+        "endpoint": endpoint,
+        "model": model,
+        "prompt": _normalize(prompt),
+        "params": params or {}
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def make_payload_key(endpoint: str, model: str, payload: Dict[str, Any]) -> str:
+    """Cache key for a request payload: prompt/messages are the prompt, the rest are sampling params"""
+    prompt = {field: payload[field] for field in _PROMPT_FIELDS if field in payload}
+    params = {key: value for key, value in payload.items()
+              if key not in _PROMPT_FIELDS and key not in _IGNORED_FIELDS and key != "model"}
+    return make_cache_key(endpoint, model, prompt, params)
+
+
+class LLMResponseCache:
+    """
+    Persistent LLM response cache with TTL expiry and size-bounded LRU eviction
+
+    Responses are stored as JSON text in sqlite. Entries expire after their TTL;
+    once the stored responses exceed max_bytes the least recently used are evicted.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, default_ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True, persist: bool = True):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding the sqlite store (defaults to default_cache_dir("llm"))
+            default_ttl_seconds: Lifetime of an entry unless put() overrides it
+            max_bytes: Upper bound on stored response text before LRU eviction
+            enabled: Master switch; when False every lookup misses and nothing is stored
+            persist: Keep entries on disk across sessions (False = in-memory sqlite)
+        """
+        self.default_ttl_seconds = default_ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.persist = persist and enabled  # A disabled cache never touches disk
+        self._lock = threading.RLock()
+        self._writes_since_check = 0
+        self.db_path = ":memory:"
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "bypassed": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+        self.endpoint_stats: Dict[str, Dict[str, int]] = {}
+
+        if self.persist:
+            try:
+                cache_dir = cache_dir or default_cache_dir("llm")
+                os.makedirs(cache_dir, exist_ok=True)
+                self.db_path = os.path.join(cache_dir, "llm_responses.sqlite")
+                self._conn = self._open(self.db_path)
+            except Exception as e:
+                print(f"⚠️ LLM cache disk store unavailable, using memory only: {e}")
+                self.db_path = ":memory:"
+                self.persist = False
+        if not self.persist:
+            self._conn = self._open(self.db_path)
+
+    @staticmethod
+    def _open(db_path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, "
+            "endpoint TEXT NOT NULL, "
+            "model TEXT NOT NULL, "
+            "response TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created REAL NOT NULL, "
+            "expires REAL NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        conn.commit()
+        return conn
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        self.stats[outcome] += 1
+        counters = self.endpoint_stats.setdefault(endpoint, {"hits": 0, "misses": 0, "bypassed": 0})
+        if outcome in counters:
+            counters[outcome] += 1
+
+    def get(self, key: str, endpoint: str = "default") -> Optional[Any]:
+        """
+        Cached response for a key, or None on a miss (expired entries count as misses)
+        """
+        if not self.enabled:
+            self._count(endpoint, "bypassed")
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count(endpoint, "misses")
+                return None
+            response, expires = row
+            if expires <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                self._count(endpoint, "misses")
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(endpoint, "hits")
+        return json.loads(response)
+
+    def put(self, key: str, response: Any, endpoint: str = "default", model: str = "",
+            ttl_seconds: Optional[float] = None) -> None:
+        """Store a JSON-serializable response under key"""
+        if not self.enabled:
+            return
+
+        text = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, endpoint, model, response, size, created, expires, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, endpoint, model, text, len(text.encode("utf-8")), now, now + ttl, now)
+                )
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ Could not store LLM response in cache: {e}")
+                return
+            self.stats["writes"] += 1
+            self._writes_since_check += 1
+            if self._writes_since_check >= EVICTION_CHECK_INTERVAL:
+                self.evict()
+
+    def bypass(self, endpoint: str = "default") -> None:
+        """Record a call that opted out of the cache"""
+        self._count(endpoint, "bypassed")
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used ones until under max_bytes
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self._writes_since_check = 0
+            removed = self._conn.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Evict down to 90% so the next few writes do not trigger another pass
+                excess = total - int(self.max_bytes * 0.9)
+                freed = 0
+                victims = []
+                for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                    victims.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+                removed += len(victims)
+            self._conn.commit()
+            self.stats["evictions"] += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def hit_rate(self) -> float:
+        """Fraction of cache lookups answered from the cache"""
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters, per endpoint and overall, plus store size"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            **self.stats,
+            "hit_rate": self.hit_rate(),
+            "entries": entries,
+            "stored_bytes": size,
+            "max_bytes": self.max_bytes,
+            "persistent": self.persist,
+            "enabled": self.enabled,
+            "by_endpoint": {endpoint: dict(counters) for endpoint, counters in self.endpoint_stats.items()}
+        }
+
+
+# Shared cache used by the LLM clients
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def configure_llm_cache(**kwargs) -> LLMResponseCache:
+    """Replace the shared cache (e.g. configure_llm_cache(enabled=False) or a different cache_dir)"""
+    global _llm_cache
+    with _llm_cache_lock:
+        _llm_cache = LLMResponseCache(**kwargs)
+        return _llm_cache
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get the shared LLM response cache, creating it on first use"""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+        return _llm_cache
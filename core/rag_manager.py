@@ -1,20 +1,111 @@
 """
 Session-based RAG system manager for CognitiveLattice
 Handles storage and retrieval of RAG systems without JSON serialization issues
+Systems are kept within a memory budget; the least recently used ones spill to disk snapshots
 """
 
+import hashlib
+import mmap
+import os
+import pickle
+import sys
+import types
+from collections import OrderedDict
+from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
-import os
+
+import numpy as np
+
+DEFAULT_MEMORY_BUDGET_BYTES = 4 * 1024 ** 3
+DEFAULT_SPILL_DIR = "rag_spill"
+
+# Large containers are sized from this many sampled elements
+_SIZE_SAMPLE = 200
+_UNSIZED_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+
+def estimate_nbytes(obj: Any) -> int:
+    """
+    Approximate RAM held by an object graph
+
+    Numpy arrays and tensors count their buffers (memory-mapped arrays count
+    nothing, as they live on disk). Objects are walked through __getstate__,
+    i.e. what a pickle snapshot would hold, so shared models and clients they
+    exclude are not charged to them. Containers larger than a few hundred
+    elements are extrapolated from a sample.
+    """
+    seen = set()
+
+    def walk(value: Any) -> int:
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+
+        if isinstance(value, np.ndarray):
+            return 0 if isinstance(value, np.memmap) or isinstance(value.base, mmap.mmap) else value.nbytes
+        if hasattr(value, 'element_size') and hasattr(value, 'nelement'):  # torch tensors
+            return value.element_size() * value.nelement()
+        if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+            return sys.getsizeof(value)
+        if isinstance(value, _UNSIZED_TYPES):
+            return 0
+
+        if isinstance(value, dict):
+            items = list(value.items()) if len(value) <= _SIZE_SAMPLE else \
+                [item for _, item in zip(range(_SIZE_SAMPLE), value.items())]
+            children = sum(walk(k) + walk(v) for k, v in items)
+            return sys.getsizeof(value) + children * len(value) // max(1, len(items))
+        if isinstance(value, (list, tuple, set, frozenset)):
+            elements = list(value)
+            if len(elements) > _SIZE_SAMPLE:
+                step = len(elements) // _SIZE_SAMPLE
+                sampled = elements[::step][:_SIZE_SAMPLE]
+            else:
+                sampled = elements
+            children = sum(walk(element) for element in sampled)
+            return sys.getsizeof(value) + children * len(elements) // max(1, len(sampled))
+
+        try:
+            state = value.__getstate__()
+        except Exception:
+            state = getattr(value, '__dict__', None)
+        return sys.getsizeof(value) + (walk(state) if state is not None else 0)
+
+    return walk(obj)
+
+
+def rag_system_nbytes(rag_system) -> int:
+    """RAM attributed to a RAG system (its own memory_footprint() when it defines one)"""
+    if hasattr(rag_system, 'memory_footprint'):
+        return int(rag_system.memory_footprint())
+    return estimate_nbytes(rag_system)
+
 
 class RAGSystemManager:
     """
     Manages RAG systems in memory during the session to avoid JSON serialization issues
+    
+    Resident systems are kept in least-recently-used order. When their combined
+    size exceeds the memory budget, the least recently used ones are pickled to
+    spill_dir and dropped from memory; get_rag_system reloads them on demand.
     """
     
-    def __init__(self):
-        self.active_rag_systems = {}  # document_id -> rag_system
+    def __init__(self, memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES, spill_dir: str = DEFAULT_SPILL_DIR):
+        """
+        Args:
+            memory_budget_bytes: Combined size of resident RAG systems before spilling
+            spill_dir: Directory for snapshots of spilled systems
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = Path(spill_dir)
+        self.active_rag_systems = OrderedDict()  # document_id -> rag_system, least recently used first
         self.rag_metadata = {}  # document_id -> metadata
+        self._stored_order = OrderedDict()  # document_id -> None, most recently stored last
+        self._system_bytes = {}  # document_id -> estimated bytes of a resident system
+        self._unspillable = set()  # document_ids whose snapshot failed; they stay resident
+        self.resident_bytes = 0
+        self.stats = {'spills': 0, 'reloads': 0}
     
     def store_rag_system(self, document_id: str, rag_system, metadata: Dict[str, Any]) -> bool:
         """
@@ -29,20 +120,26 @@ class RAGSystemManager:
             bool: Success status
         """
         try:
-            self.active_rag_systems[document_id] = rag_system
+            self._forget(document_id)
+            self._stored_order[document_id] = None
             self.rag_metadata[document_id] = {
                 **metadata,
                 "stored_at": datetime.now().isoformat(),
                 "status": "active"
             }
+            self._make_resident(document_id, rag_system)
             return True
         except Exception as e:
             print(f"⚠️ Failed to store RAG system: {e}")
             return False
     
+    def _latest_id(self) -> Optional[str]:
+        """Most recently stored document ID, in O(1)"""
+        return next(reversed(self._stored_order), None)
+    
     def get_rag_system(self, document_id: str = None):
         """
-        Retrieve a RAG system
+        Retrieve a RAG system, reloading it from its snapshot if it was spilled
         
         Args:
             document_id: Specific document ID, or None for most recent
@@ -52,13 +149,19 @@ class RAGSystemManager:
         """
         if document_id is None:
             # Return the most recent RAG system
-            if not self.active_rag_systems:
+            document_id = self._latest_id()
+            if document_id is None:
                 return None
-            latest_id = max(self.rag_metadata.keys(), 
-                           key=lambda k: self.rag_metadata[k].get('stored_at', ''))
-            return self.active_rag_systems.get(latest_id)
-        else:
-            return self.active_rag_systems.get(document_id)
+        
+        rag_system = self.active_rag_systems.get(document_id)
+        if rag_system is not None:
+            self.active_rag_systems.move_to_end(document_id)
+            return rag_system
+        
+        metadata = self.rag_metadata.get(document_id)
+        if metadata and metadata.get("status") == "spilled":
+            return self._reload(document_id)
+        return None
     
     def get_metadata(self, document_id: str = None) -> Optional[Dict[str, Any]]:
         """
@@ -71,13 +174,10 @@ class RAGSystemManager:
             Metadata dict or None
         """
         if document_id is None:
-            if not self.rag_metadata:
+            document_id = self._latest_id()
+            if document_id is None:
                 return None
-            latest_id = max(self.rag_metadata.keys(), 
-                           key=lambda k: self.rag_metadata[k].get('stored_at', ''))
-            return self.rag_metadata.get(latest_id)
-        else:
-            return self.rag_metadata.get(document_id)
+        return self.rag_metadata.get(document_id)
     
     def list_available_documents(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -88,27 +188,119 @@ class RAGSystemManager:
         """
         return self.rag_metadata.copy()
     
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Resident size against the budget, and spill/reload counters"""
+        return {
+            'memory_budget_bytes': self.memory_budget_bytes,
+            'resident_bytes': self.resident_bytes,
+            'resident_systems': len(self.active_rag_systems),
+            'spilled_systems': sum(1 for m in self.rag_metadata.values() if m.get('status') == 'spilled'),
+            'unspillable_systems': len(self._unspillable),
+            **self.stats
+        }
+    
     def cleanup_old_systems(self, max_systems: int = 5):
         """
         Clean up old RAG systems to prevent memory bloat
         
+        Only the max_systems most recently stored systems stay in memory; older
+        ones are spilled to disk and remain available through get_rag_system.
+        
         Args:
-            max_systems: Maximum number of systems to keep
+            max_systems: Maximum number of systems to keep in memory
         """
         if len(self.active_rag_systems) <= max_systems:
             return
         
-        # Sort by timestamp and keep only the most recent
-        sorted_ids = sorted(self.rag_metadata.keys(), 
-                           key=lambda k: self.rag_metadata[k].get('stored_at', ''),
-                           reverse=True)
+        keep = set(list(self._stored_order)[-max_systems:]) if max_systems > 0 else set()
+        to_spill = [doc_id for doc_id in self.active_rag_systems
+                    if doc_id not in keep and doc_id not in self._unspillable]
+        spilled = sum(1 for doc_id in to_spill if self._spill(doc_id))
         
-        to_remove = sorted_ids[max_systems:]
-        for doc_id in to_remove:
-            self.active_rag_systems.pop(doc_id, None)
-            self.rag_metadata.pop(doc_id, None)
+        print(f"🧹 Moved {spilled} old RAG systems out of memory")
+    
+    def _snapshot_path(self, document_id: str) -> Path:
+        return self.spill_dir / f"{hashlib.sha1(document_id.encode('utf-8')).hexdigest()}.pkl"
+    
+    def _make_resident(self, document_id: str, rag_system):
+        """Account a system as resident (most recently used) and evict others over budget"""
+        size = rag_system_nbytes(rag_system)
+        self.active_rag_systems[document_id] = rag_system
+        self.active_rag_systems.move_to_end(document_id)
+        self._system_bytes[document_id] = size
+        self.resident_bytes += size
+        self.rag_metadata[document_id]["size_bytes"] = size
         
-        print(f"🧹 Cleaned up {len(to_remove)} old RAG systems")
+        # The system just stored or reloaded stays, even if it alone exceeds the budget
+        while self.resident_bytes > self.memory_budget_bytes:
+            victim = next((doc_id for doc_id in self.active_rag_systems
+                           if doc_id != document_id and doc_id not in self._unspillable), None)
+            if victim is None:
+                break
+            self._spill(victim)
+    
+    def _release(self, document_id: str):
+        """Drop a resident system from memory accounting"""
+        self.active_rag_systems.pop(document_id, None)
+        self.resident_bytes -= self._system_bytes.pop(document_id, 0)
+    
+    def _spill(self, document_id: str) -> bool:
+        """Snapshot a resident system to disk and drop it from memory (False if it stays resident)"""
+        rag_system = self.active_rag_systems.get(document_id)
+        if rag_system is None:
+            return False
+        metadata = self.rag_metadata[document_id]
+        
+        path = self._snapshot_path(document_id)
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(rag_system, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Keep an unpicklable system in memory rather than losing it
+            print(f"⚠️ Could not snapshot RAG system {document_id}, keeping it in memory: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            self._unspillable.add(document_id)
+            return False
+        
+        self._release(document_id)
+        metadata["status"] = "spilled"
+        metadata["snapshot_path"] = str(path)
+        self.stats['spills'] += 1
+        print(f"💾 Spilled RAG system {document_id} ({metadata.get('size_bytes', 0) / 1024 ** 2:.1f} MB) to {path}")
+        return True
+    
+    def _reload(self, document_id: str):
+        """Load a spilled system back into memory"""
+        metadata = self.rag_metadata[document_id]
+        try:
+            with open(metadata["snapshot_path"], 'rb') as f:
+                rag_system = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not reload RAG system {document_id}: {e}")
+            return None
+        
+        metadata["status"] = "active"
+        self.stats['reloads'] += 1
+        self._make_resident(document_id, rag_system)
+        return rag_system
+    
+    def _forget(self, document_id: str):
+        """Remove every trace of a document ID, including its snapshot"""
+        self._release(document_id)
+        self._unspillable.discard(document_id)
+        self._stored_order.pop(document_id, None)
+        metadata = self.rag_metadata.pop(document_id, None)
+        if metadata and metadata.get("snapshot_path"):
+            try:
+                os.remove(metadata["snapshot_path"])
+            except OSError:
+                pass
 
 # Global instance for the session
 _global_rag_manager = None
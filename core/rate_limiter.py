@@ -0,0 +1,134 @@
+"""
+Rate Limiter for CognitiveLattice
+Token buckets for API requests per minute and tokens per minute, shared by concurrent callers
+A 429 response pauses every caller until the server's Retry-After has passed
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay in seconds or an HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe limiter on requests per minute and (optionally) tokens per minute
+
+    Both buckets start full and refill continuously. acquire() blocks until a
+    request and its estimated tokens fit; record_usage() corrects the token
+    bucket once the actual usage is known.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None,
+                 burst_seconds: float = 60.0):
+        """
+        Args:
+            requests_per_minute: Request budget per minute
+            tokens_per_minute: Token budget per minute (None = unlimited)
+            burst_seconds: Bucket capacity in seconds of budget; lower it for APIs
+                that enforce per-minute limits over shorter windows
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_capacity = requests_per_minute * burst_seconds / 60
+        self._token_capacity = (tokens_per_minute or 0) * burst_seconds / 60
+        self._requests = self._request_capacity
+        self._tokens = self._token_capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "waits": 0, "wait_seconds": 0.0, "throttled": 0}
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self._request_capacity, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self._token_capacity, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request of the given token estimate may be sent
+
+        Returns:
+            Seconds spent waiting
+        """
+        # A request larger than the whole token bucket only waits for a full bucket
+        tokens = min(tokens, self._token_capacity) if self.tokens_per_minute else 0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._requests >= min(1, self._request_capacity) and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    self.stats["requests"] += 1
+                    if waited:
+                        self.stats["waits"] += 1
+                        self.stats["wait_seconds"] += waited
+                    return waited
+                else:
+                    delay = max((1 - self._requests) * 60 / self.requests_per_minute,
+                                (tokens - self._tokens) * 60 / self.tokens_per_minute if tokens else 0.0)
+            time.sleep(delay)
+            waited += delay
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Refund (or charge) the difference between estimated and actual token usage"""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._tokens = min(self._token_capacity, self._tokens + estimated_tokens - actual_tokens)
+
+    def pause(self, seconds: float):
+        """Hold every caller for the given time (e.g. after a 429 with Retry-After)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.stats["throttled"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute
+        }
+
+
+_shared_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, requests_per_minute: float, tokens_per_minute: Optional[float] = None,
+                     burst_seconds: float = 60.0) -> TokenBucketRateLimiter:
+    """
+    Process-wide limiter for an API (the provider enforces its limits per key, not per client)
+
+    The first caller's budgets win; later callers share the existing buckets.
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucketRateLimiter(requests_per_minute, tokens_per_minute, burst_seconds)
+            _shared_limiters[name] = limiter
+        return limiter
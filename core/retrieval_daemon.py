@@ -0,0 +1,410 @@
+"""
+Retrieval Daemon for CognitiveLattice
+One local process owns the loaded embedding models and indexes and serves retrieval over
+localhost HTTP or a Unix socket, so concurrent sessions share one warm copy instead of each building their own
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+# Sessions find the daemon through this variable ("host:port" or "unix:/path/to.sock")
+ADDRESS_ENV_VAR = "COGNITIVELATTICE_RETRIEVAL_DAEMON"
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """('unix', socket path) or ('tcp', (host, port)) for an address string"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def _to_json(value: Any) -> Any:
+    """json.dumps fallback for numpy scalars and arrays in search results"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class _ReadWriteLock:
+    """Many concurrent queries, or one writer adding chunks"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    def acquire_read(self):
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        with self._condition:
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writing = True
+
+    def release_write(self):
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+
+class RetrievalDaemon:
+    """
+    Serves retrieval calls of in-process RAG backends to local clients
+
+    Backends:
+        routing: a BidirectionalRAGSystem (query_with_routing, add_document_chunks)
+        json: an IntegratedJSONRAG (semantic_search)
+
+    Each request is one JSON POST to /<method>; responses are JSON with either
+    a "result" or an "error" field.
+    """
+
+    # method -> (backend, writes to the index)
+    METHODS = {
+        "query_with_routing": ("routing", False),
+        "add_document_chunks": ("routing", True),
+        "semantic_search": ("json", False)
+    }
+
+    def __init__(self, routing_rag=None, json_rag=None, address: str = DEFAULT_ADDRESS):
+        """
+        Args:
+            routing_rag: BidirectionalRAGSystem to serve, if any
+            json_rag: IntegratedJSONRAG to serve, if any
+            address: "host:port" (localhost HTTP) or "unix:/path/to.sock"
+        """
+        self.backends = {"routing": routing_rag, "json": json_rag}
+        self.address = address
+        self._lock = _ReadWriteLock()
+        self._server = None
+        self._thread = None
+        self._connections = set()  # Sockets of open client connections (closed on shutdown)
+        self._connections_lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0}
+
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        """Run one retrieval call against the owning backend"""
+        if method == "system_info":
+            return self.system_info()
+        if method not in self.METHODS:
+            raise KeyError(f"Unknown method '{method}'")
+
+        backend_name, writes = self.METHODS[method]
+        backend = self.backends[backend_name]
+        if backend is None:
+            raise KeyError(f"Method '{method}' needs the '{backend_name}' backend, which this daemon did not load")
+
+        acquire, release = (self._lock.acquire_write, self._lock.release_write) if writes else \
+            (self._lock.acquire_read, self._lock.release_read)
+        acquire()
+        try:
+            return getattr(backend, method)(**params)
+        finally:
+            release()
+
+    def system_info(self) -> Dict[str, Any]:
+        """Loaded backends and request counters"""
+        info = {"address": self.address, "backends": {}, **self.stats}
+        routing = self.backends["routing"]
+        if routing is not None:
+            info["backends"]["routing"] = routing.get_system_info()
+        json_rag = self.backends["json"]
+        if json_rag is not None:
+            info["backends"]["json"] = {
+                "chunks_indexed": len(json_rag.chunk_metadata),
+                "document_domain": json_rag.current_document_domain
+            }
+        return info
+
+    def _make_handler(self, kind: str):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep connections alive between calls
+            # Headers and body are separate writes; with Nagle on, the body waits for the
+            # client's delayed ACK (~40ms per call on a kept-alive connection)
+            disable_nagle_algorithm = kind == "tcp"
+
+            def setup(self):
+                super().setup()
+                with daemon._connections_lock:
+                    daemon._connections.add(self.connection)
+
+            def finish(self):
+                try:
+                    super().finish()
+                finally:
+                    with daemon._connections_lock:
+                        daemon._connections.discard(self.connection)
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    pass  # Client went away, or shutdown closed the connection
+
+            def do_POST(self):
+                method = self.path.strip("/")
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    params = json.loads(self.rfile.read(length) or b"{}")
+                    daemon.stats["requests"] += 1
+                    status, body = 200, {"result": daemon.dispatch(method, params)}
+                except KeyError as e:
+                    daemon.stats["errors"] += 1
+                    status, body = 404, {"error": str(e.args[0] if e.args else e)}
+                except Exception as e:
+                    daemon.stats["errors"] += 1
+                    status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                payload = json.dumps(body, default=_to_json).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def address_string(self):
+                # Unix socket peers have no host address
+                return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+            def log_message(self, format, *args):
+                pass  # One line per query would drown the daemon's own output
+
+        return Handler
+
+    def _create_server(self):
+        kind, target = parse_address(self.address)
+        handler = self._make_handler(kind)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)  # Stale socket from an earlier run
+            server = socketserver.ThreadingUnixStreamServer(target, handler)
+        else:
+            server = ThreadingHTTPServer(target, handler)
+        server.daemon_threads = True
+        return server
+
+    def serve_forever(self):
+        """Serve requests until interrupted"""
+        self._server = self._create_server()
+        print(f"📡 Retrieval daemon listening on {self.address}")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            print("🛑 Retrieval daemon stopped")
+        finally:
+            self.shutdown()
+
+    def start(self) -> "RetrievalDaemon":
+        """Serve from a background thread (for embedding the daemon in another process)"""
+        self._server = self._create_server()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="retrieval-daemon", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        """Stop serving, close kept-alive client connections and remove the Unix socket, if any"""
+        if self._server is None:
+            return
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+        self._server = None
+
+        # Handler threads otherwise keep answering on their kept-alive connections
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # Already closed by the client
+        kind, target = parse_address(self.address)
+        if kind == "unix" and os.path.exists(target):
+            os.remove(target)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RetrievalClient:
+    """
+    Thin client with the query_with_routing / semantic_search surface of the in-process RAG systems
+
+    Each thread keeps one persistent connection to the daemon. Read calls that
+    hit a connection the daemon closed while idle are retried once; calls that
+    change the index are sent on a fresh connection and never retried.
+    """
+
+    def __init__(self, address: Optional[str] = None, timeout: float = 60.0):
+        """
+        Args:
+            address: Daemon address (defaults to $COGNITIVELATTICE_RETRIEVAL_DAEMON, then DEFAULT_ADDRESS)
+            timeout: Socket timeout in seconds
+        """
+        self.address = address or os.getenv(ADDRESS_ENV_VAR) or DEFAULT_ADDRESS
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            kind, target = parse_address(self.address)
+            if kind == "unix":
+                connection = _UnixHTTPConnection(target, self.timeout)
+            else:
+                connection = http.client.HTTPConnection(*target, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _call(self, method: str, **params) -> Any:
+        body = json.dumps(params, default=_to_json)
+        writes = RetrievalDaemon.METHODS.get(method, (None, False))[1]
+        if writes:
+            # A stale connection must not make us resend a write the daemon may have applied
+            self.close()
+        for attempt in range(1 if writes else 2):
+            connection = self._connection()
+            try:
+                connection.request("POST", f"/{method}", body=body, headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # The daemon closed an idle keep-alive connection; reconnect once for reads
+                connection.close()
+                self._local.connection = None
+                if writes or attempt:
+                    raise
+
+        if "error" in payload:
+            raise RuntimeError(f"Retrieval daemon {method} failed: {payload['error']}")
+        return payload["result"]
+
+    def query_with_routing(self, query: str, max_chunks: int = 5,
+                           preferred_domain: str = None) -> Dict[str, Any]:
+        """BidirectionalRAGSystem.query_with_routing on the daemon"""
+        return self._call("query_with_routing", query=query, max_chunks=max_chunks,
+                          preferred_domain=preferred_domain)
+
+    def semantic_search(self,
+                        query: str,
+                        top_k: int = 50,
+                        similarity_threshold: float = 0.3,
+                        search_mode: str = "semantic",
+                        filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """IntegratedJSONRAG.semantic_search on the daemon"""
+        return self._call("semantic_search", query=query, top_k=top_k,
+                          similarity_threshold=similarity_threshold, search_mode=search_mode, filters=filters)
+
+    def add_document_chunks(self, chunks: List[Dict[str, Any]]) -> None:
+        """Index chunks in the daemon's routing RAG (shared by every client)"""
+        self._call("add_document_chunks", chunks=chunks)
+
+    def get_system_info(self) -> Dict[str, Any]:
+        """Backends loaded by the daemon and its request counters"""
+        return self._call("system_info")
+
+    def ping(self) -> bool:
+        """True if a daemon answers at the address"""
+        try:
+            self.get_system_info()
+            return True
+        except (OSError, http.client.HTTPException, RuntimeError, ValueError):
+            return False
+
+    def close(self):
+        """Close this thread's connection to the daemon"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def get_retrieval_client(address: Optional[str] = None) -> Optional[RetrievalClient]:
+    """
+    Client for a running daemon, or None so the caller can build its RAG in-process
+
+    Only looks for a daemon when an address is given or $COGNITIVELATTICE_RETRIEVAL_DAEMON is set.
+    """
+    address = address or os.getenv(ADDRESS_ENV_VAR)
+    if not address:
+        return None
+    client = RetrievalClient(address)
+    return client if client.ping() else None
+
+
+def _load_chunks(path: str) -> List[Dict[str, Any]]:
+    """Chunks from a JSON array or JSONL file"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve shared CognitiveLattice retrieval indexes to local sessions")
+    parser.add_argument("--address", default=os.getenv(ADDRESS_ENV_VAR) or DEFAULT_ADDRESS,
+                        help='"host:port" or "unix:/path/to.sock"')
+    parser.add_argument("--chunks", help="JSON/JSONL chunks to index in the routing RAG at startup")
+    parser.add_argument("--no-routing", action="store_true", help="Do not load the routing RAG")
+    parser.add_argument("--json-store", help="Embedding store directory to serve through semantic_search")
+    parser.add_argument("--embedding-model", default="all-MiniLM-L6-v2",
+                        help="Embedding model the store was built with")
+    args = parser.parse_args()
+
+    routing_rag = None
+    if not args.no_routing:
+        from core.bidirectional_rag import create_bidirectional_rag
+        routing_rag = create_bidirectional_rag()
+        if args.chunks:
+            routing_rag.add_document_chunks(_load_chunks(args.chunks))
+
+    json_rag = None
+    if args.json_store:
+        from experimental.integrated_json_rag import IntegratedJSONRAG
+        json_rag = IntegratedJSONRAG(embedding_model=args.embedding_model, specialized_models=False,
+                                     embedding_store_dir=args.json_store)
+        if not json_rag.load_embedding_store():
+            print(f"❌ Could not open embedding store {args.json_store}")
+            return
+
+    RetrievalDaemon(routing_rag, json_rag, args.address).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Streaming Completions for CognitiveLattice
+Reads server-sent event (SSE) token streams from llama-server and OpenAI-compatible APIs
+An incremental JSON parser returns the first complete object and cancels the rest of the generation
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import requests
+
+
+def iter_sse_data(response: requests.Response) -> Iterator[str]:
+    """
+    Yield the data payload of each server-sent event until the stream ends or sends [DONE]
+
+    Multi-line data fields are joined with newlines; comments and other fields are ignored.
+    """
+    data_lines = []
+    for raw_line in response.iter_lines():
+        line = raw_line.decode("utf-8") if isinstance(raw_line, bytes) else raw_line
+        if not line:
+            # A blank line dispatches the event
+            if data_lines:
+                data = "\n".join(data_lines)
+                data_lines = []
+                if data.strip() == "[DONE]":
+                    return
+                yield data
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines:
+        data = "\n".join(data_lines)
+        if data.strip() != "[DONE]":
+            yield data
+
+
+class IncrementalJSONObjectParser:
+    """
+    Finds the first complete top-level JSON object in text that arrives piece by piece
+
+    Text before the object (prose, a ```json fence) is skipped. Braces inside JSON
+    strings are ignored. A balanced candidate that does not parse (e.g. "{name}" in
+    prose) is discarded and scanning resumes after its opening brace.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.result: Optional[str] = None
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> Optional[str]:
+        """
+        Add text and return the JSON object's text once it is complete (None until then)
+        """
+        if self.result is not None:
+            return self.result
+        self.buffer += text
+        buffer = self.buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            if self._start is None:
+                if char == "{":
+                    self._start = self._pos
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = buffer[self._start:self._pos + 1]
+                    try:
+                        json.loads(candidate)
+                    except json.JSONDecodeError:
+                        # Not JSON after all; rescan from just after the opening brace
+                        self._pos = self._start + 1
+                        self._start = None
+                        self._in_string = False
+                        self._escape = False
+                        continue
+                    self.result = candidate
+                    return candidate
+            self._pos += 1
+        return None
+
+
+def llama_stream_text(event: Dict[str, Any]) -> str:
+    """Text piece of a llama-server /completion stream event"""
+    return event.get("content", "")
+
+
+def openai_stream_text(event: Dict[str, Any]) -> str:
+    """Text piece of an OpenAI chat-completions stream chunk"""
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def read_completion_stream(response: requests.Response,
+                           extract_text: Callable[[Dict[str, Any]], str],
+                           stop_at_json: bool = False,
+                           on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Consume a streamed completion
+
+    Args:
+        response: Response opened with stream=True
+        extract_text: Maps one decoded event to its text piece
+        stop_at_json: Return as soon as the first JSON object is complete, closing the
+            connection so the server stops generating
+        on_token: Called with every text piece as it arrives
+
+    Returns:
+        Dict with "text" (everything received), "json_text" (first complete object or None),
+        "stopped_early" and "last_event" (the final decoded event, e.g. carrying usage)
+    """
+    parser = IncrementalJSONObjectParser() if stop_at_json else None
+    pieces = []
+    last_event: Dict[str, Any] = {}
+    try:
+        for data in iter_sse_data(response):
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            last_event = event
+            piece = extract_text(event)
+            if not piece:
+                continue
+            pieces.append(piece)
+            if on_token:
+                on_token(piece)
+            if parser and parser.feed(piece) is not None:
+                return {
+                    "text": "".join(pieces),
+                    "json_text": parser.result,
+                    "stopped_early": True,
+                    "last_event": last_event
+                }
+    finally:
+        # Closing mid-stream drops the connection, which cancels the remaining generation
+        response.close()
+
+    return {
+        "text": "".join(pieces),
+        "json_text": parser.result if parser else None,
+        "stopped_early": False,
+        "last_event": last_event
+    }
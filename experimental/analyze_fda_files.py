@@ -18,6 +18,8 @@ from pathlib import Path
 from typing import Dict, List, Any
 import time
 
+from experimental.json_structure_profiler import profile_json_file
+
 def analyze_file_structure(file_path: Path, sample_size: int = 50) -> Dict[str, Any]:
     """
     Analyze a single massive JSON file to understand its structure
@@ -28,84 +30,49 @@ def analyze_file_structure(file_path: Path, sample_size: int = 50) -> Dict[str,
         'file_path': str(file_path),
         'file_size_mb': file_path.stat().st_size / (1024 * 1024),
         'estimated_lines': 0,
+        'estimated_records': 0,
         'sample_records': [],
         'common_fields': {},
         'structure_type': 'unknown',
         'recommended_settings': {}
     }
     
-    # Quick line count estimate
+    # Sample records at random offsets across the file instead of reading from the start,
+    # so the analysis takes bounded time whatever the file size
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            # Count lines in first 1MB to estimate total
-            sample_text = f.read(1024 * 1024)
-            lines_in_sample = sample_text.count('\n')
-            if lines_in_sample > 0:
-                analysis['estimated_lines'] = int(lines_in_sample * analysis['file_size_mb'])
-        
-        print(f"   📏 Size: {analysis['file_size_mb']:.1f} MB")
-        print(f"   📄 Estimated lines: {analysis['estimated_lines']:,}")
-        
+        profile = profile_json_file(file_path, samples=max(1, sample_size // 4), records_per_sample=4)
     except Exception as e:
-        print(f"   ⚠️ Could not read file: {e}")
+        print(f"   ⚠️ Could not analyze JSON structure: {e}")
         return analysis
     
-    # Analyze JSON structure
-    try:
-        import ijson
-        
-        with open(file_path, 'rb') as f:
-            # Detect if it's array or object
-            start_bytes = f.read(100).decode('utf-8', errors='ignore').strip()
-            if start_bytes.startswith('['):
-                analysis['structure_type'] = 'array'
-                parser = ijson.items(f, 'item')
-            elif start_bytes.startswith('{'):
-                analysis['structure_type'] = 'object'
-                # Try common patterns for API responses
-                f.seek(0)
-                try:
-                    parser = ijson.items(f, 'results.item')  # Common pattern
-                except:
-                    try:
-                        parser = ijson.items(f, 'data.item')  # Another common pattern
-                    except:
-                        parser = ijson.items(f, '*.item')  # Generic fallback
-            else:
-                print(f"   ❌ Unknown JSON structure")
-                return analysis
-            
-            # Sample records
-            record_count = 0
-            field_frequency = {}
-            
-            for record in parser:
-                if record_count >= sample_size:
-                    break
-                
-                if isinstance(record, dict):
-                    analysis['sample_records'].append(record)
-                    
-                    # Count field frequency
-                    for field in record.keys():
-                        field_frequency[field] = field_frequency.get(field, 0) + 1
-                
-                record_count += 1
-            
-            # Calculate common fields (appear in >50% of sample)
-            threshold = record_count * 0.5
-            analysis['common_fields'] = {
-                field: freq for field, freq in field_frequency.items()
-                if freq >= threshold
-            }
-            
-            print(f"   📊 Sampled {record_count} records")
-            print(f"   🔑 Common fields: {len(analysis['common_fields'])}")
-            
-    except ImportError:
-        print("   ⚠️ ijson not available for structure analysis")
-    except Exception as e:
-        print(f"   ⚠️ Could not analyze JSON structure: {e}")
+    analysis.update({
+        'estimated_lines': profile['estimated_lines'],
+        'estimated_records': profile['estimated_records'],
+        'avg_record_bytes': profile['avg_record_bytes'],
+        'json_path': profile['json_path'],
+        'structure_type': profile['root_structure'],
+        'sample_records': profile['sample_records'][:sample_size],
+        'profile_seconds': profile['profile_seconds']
+    })
+    
+    print(f"   📏 Size: {analysis['file_size_mb']:.1f} MB")
+    print(f"   📄 Estimated lines: {analysis['estimated_lines']:,}")
+    print(f"   🔢 Estimated records: {analysis['estimated_records']:,} (~{analysis['avg_record_bytes'] / 1024:.1f} KB each)")
+    
+    if profile['json_path'] is None:
+        print(f"   ❌ Unknown JSON structure")
+        return analysis
+    
+    # Common fields appear in >50% of the sample
+    record_count = profile['records_sampled']
+    analysis['common_fields'] = {
+        field: round(info['frequency'] * record_count)
+        for field, info in profile['fields'].items()
+        if info['frequency'] >= 0.5
+    }
+    
+    print(f"   📊 Sampled {record_count} records at path '{profile['json_path']}' in {profile['profile_seconds']:.2f}s")
+    print(f"   🔑 Common fields: {len(analysis['common_fields'])}")
     
     # Generate recommendations
     analysis['recommended_settings'] = generate_processing_recommendations(analysis)
@@ -200,6 +167,8 @@ def analyze_directory(directory_path: Path, sample_size: int = 50) -> Dict[str,
     
     total_size_mb = 0
     total_estimated_lines = 0
+    total_estimated_records = 0
+    started = time.perf_counter()
     
     for i, file_path in enumerate(json_files, 1):
         print(f"\n[{i}/{len(json_files)}]", end=" ")
@@ -209,11 +178,14 @@ def analyze_directory(directory_path: Path, sample_size: int = 50) -> Dict[str,
         
         total_size_mb += file_analysis['file_size_mb']
         total_estimated_lines += file_analysis.get('estimated_lines', 0)
+        total_estimated_records += file_analysis.get('estimated_records', 0)
     
     # Generate overall recommendations
     directory_analysis['overall_recommendations'] = {
         'total_size_gb': total_size_mb / 1024,
         'total_estimated_lines': total_estimated_lines,
+        'total_estimated_records': total_estimated_records,
+        'analysis_seconds': time.perf_counter() - started,
         'recommended_processing_order': 'smallest_first',
         'estimated_total_processing_time_hours': total_estimated_lines / 50000,  # Conservative estimate
         'system_requirements': {
@@ -237,6 +209,8 @@ def print_analysis_summary(analysis: Dict[str, Any]):
         print(f"📁 Total files: {analysis['total_files']}")
         print(f"💾 Total size: {analysis['overall_recommendations']['total_size_gb']:.1f} GB")
         print(f"📄 Estimated total lines: {analysis['overall_recommendations']['total_estimated_lines']:,}")
+        print(f"🔢 Estimated total records: {analysis['overall_recommendations']['total_estimated_records']:,}")
+        print(f"⚡ Profiled in {analysis['overall_recommendations']['analysis_seconds']:.2f}s")
         print(f"⏱️ Estimated processing time: {analysis['overall_recommendations']['estimated_total_processing_time_hours']:.1f} hours")
         
         print(f"\n💻 SYSTEM REQUIREMENTS:")
@@ -258,6 +232,7 @@ def print_analysis_summary(analysis: Dict[str, Any]):
         print(f"📁 File: {Path(analysis['file_path']).name}")
         print(f"💾 Size: {analysis['file_size_mb']:.1f} MB")
         print(f"📄 Estimated lines: {analysis.get('estimated_lines', 'unknown'):,}")
+        print(f"🔢 Estimated records: {analysis.get('estimated_records', 0):,}")
         print(f"🏗️ Structure: {analysis['structure_type']}")
         
         if analysis['common_fields']:
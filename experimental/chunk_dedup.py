@@ -0,0 +1,237 @@
+"""
+Near-Duplicate Chunk Detection for CognitiveLattice
+MinHash signatures with LSH banding cluster near-identical chunk text before embedding
+Only one representative per cluster is embedded; duplicates keep their text and point at it with duplicate_of
+"""
+
+import re
+import zlib
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.bm25_index import tokenize
+from core.embedding_cache import text_hash
+
+# A number with the word or symbol that follows it ("0.5 mg", "1,500 units", "10%")
+_NUMERIC_TOKEN_RE = re.compile(r'(?<![\w.])\d+(?:[.,]\d+)*(?:\s*(?:%|[a-z]+))?')
+
+_SHINGLE_MULTIPLIER = np.uint64(1000003)
+_HASH_SHIFT = np.uint64(32)
+
+
+class NearDuplicateDetector:
+    """
+    Streaming near-duplicate filter over chunk text
+
+    Exact duplicates (after whitespace normalization) are caught by a text hash.
+    Near duplicates are found by MinHash over word shingles, with LSH banding
+    for candidate lookup and an estimated Jaccard similarity check. Chunks are
+    only folded when every number and its unit match, so records that differ
+    only in a dose or strength stay separate. Only signatures and hashes are
+    kept per representative, never the chunks themselves (about 2 KB each with
+    the defaults); past max_representatives the oldest representatives are
+    forgotten, so later copies of them start a new cluster.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 1, max_representatives: int = 100000):
+        """
+        Args:
+            threshold: Minimum estimated Jaccard similarity to treat chunks as duplicates
+            num_perm: MinHash permutations per signature
+            bands: LSH bands (num_perm must be divisible by bands)
+            shingle_size: Words per shingle
+            seed: Seed for the hash family (keeps signatures reproducible)
+            max_representatives: Representatives remembered at once (bounds memory)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.max_representatives = max(1, max_representatives)
+
+        rng = np.random.default_rng(seed)
+        self._a = (rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1))[:, None]
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)[:, None]
+
+        # Per-representative state, keyed by a running position so the oldest can be evicted
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._band_keys: Dict[int, Optional[List[bytes]]] = {}
+        self._numeric: Dict[int, str] = {}  # Numeric signature per representative
+        self._chunk_ids: Dict[int, Any] = {}
+        self._exact_keys: Dict[int, List[str]] = {}  # text hashes resolving to each representative
+        self._exact: Dict[str, int] = {}  # normalized text hash -> representative position
+        self._order = deque()  # positions, oldest first
+        self._next_position = 0
+
+        self.stats = {
+            'chunks_seen': 0,
+            'representatives': 0,
+            'exact_duplicates': 0,
+            'near_duplicates': 0,
+            'evicted_representatives': 0
+        }
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the text's word shingles (None for text without words)"""
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+
+        token_hashes = np.fromiter(
+            (zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint64, count=len(tokens)
+        )
+        k = min(self.shingle_size, len(tokens))
+        n_shingles = len(tokens) - k + 1
+        shingles = np.zeros(n_shingles, dtype=np.uint64)
+        for offset in range(k):
+            shingles = shingles * _SHINGLE_MULTIPLIER + token_hashes[offset:offset + n_shingles]
+        shingles = np.unique(shingles)
+
+        # One universal hash per permutation; keep the high bits of each product
+        hashed = (self._a * shingles[None, :] + self._b) >> _HASH_SHIFT
+        return hashed.min(axis=1)
+
+    @staticmethod
+    def numeric_signature(text: str) -> str:
+        """Hash of the text's numbers with their units, ignoring order"""
+        values = sorted(re.sub(r'\s+', '', match) for match in _NUMERIC_TOKEN_RE.findall(text.lower()))
+        return text_hash('\x1f'.join(values))
+
+    def _band_keys_of(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, -1)]
+
+    def _find_representative(self, signature: np.ndarray, band_keys: List[bytes],
+                             numeric: str) -> Optional[int]:
+        """Position of the most similar representative above the threshold with the same numbers, if any"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys):
+            candidates.update(position for position in bucket.get(key, ()) if self._numeric[position] == numeric)
+        if not candidates:
+            return None
+
+        candidate_list = list(candidates)  # Evicted positions are removed from their buckets
+        similarity = (np.stack([self._signatures[c] for c in candidate_list]) == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        return candidate_list[best] if similarity[best] >= self.threshold else None
+
+    def deduplicate(self, chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split a batch of chunks into new representatives and duplicates
+
+        Duplicates (within the batch or of earlier batches) keep their content and
+        get duplicate_of set to their representative's chunk_id. Representatives in
+        this batch also get a 'duplicates' list referencing their duplicates here
+        (see attach_duplicates), so the references are indexed with them.
+
+        Returns:
+            (chunks that should be embedded, duplicate chunks), each in input order
+        """
+        representatives = []
+        duplicates = []
+        for chunk in chunks:
+            self.stats['chunks_seen'] += 1
+            content = chunk.get('content', '')
+            content_key = text_hash(content)
+
+            position = self._exact.get(content_key)
+            if position is not None:
+                chunk['duplicate_of'] = self._chunk_ids[position]
+                duplicates.append(chunk)
+                self.stats['exact_duplicates'] += 1
+                continue
+
+            numeric = self.numeric_signature(content)
+            signature = self.signature(content)
+            band_keys = self._band_keys_of(signature) if signature is not None else None
+            if signature is not None:
+                position = self._find_representative(signature, band_keys, numeric)
+                if position is not None:
+                    chunk['duplicate_of'] = self._chunk_ids[position]
+                    duplicates.append(chunk)
+                    self._exact[content_key] = position
+                    self._exact_keys[position].append(content_key)
+                    self.stats['near_duplicates'] += 1
+                    continue
+
+            # New cluster: this chunk becomes its representative
+            self._add_representative(chunk.get('chunk_id'), numeric, content_key, signature, band_keys)
+            self.stats['representatives'] += 1
+            representatives.append(chunk)
+
+        attach_duplicates(representatives + duplicates)
+        return representatives, duplicates
+
+    def _add_representative(self, chunk_id: Any, numeric: str, content_key: str,
+                            signature: Optional[np.ndarray], band_keys: Optional[List[bytes]]) -> None:
+        position = self._next_position
+        self._next_position += 1
+        self._chunk_ids[position] = chunk_id
+        self._numeric[position] = numeric
+        self._exact[content_key] = position
+        self._exact_keys[position] = [content_key]
+        self._band_keys[position] = band_keys
+        if signature is not None:
+            self._signatures[position] = signature
+            for bucket, key in zip(self._buckets, band_keys):
+                bucket.setdefault(key, []).append(position)
+        self._order.append(position)
+
+        while len(self._order) > self.max_representatives:
+            self._evict(self._order.popleft())
+
+    def _evict(self, position: int) -> None:
+        """Forget a representative and every lookup that resolves to it"""
+        del self._chunk_ids[position], self._numeric[position]
+        self._signatures.pop(position, None)
+        for content_key in self._exact_keys.pop(position):
+            if self._exact.get(content_key) == position:
+                del self._exact[content_key]
+        band_keys = self._band_keys.pop(position)
+        for bucket, key in zip(self._buckets, band_keys or ()):
+            positions = bucket[key]
+            positions.remove(position)
+            if not positions:
+                del bucket[key]
+        self.stats['evicted_representatives'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dedup counters plus the fraction of chunks that skipped embedding"""
+        seen = self.stats['chunks_seen']
+        duplicates = self.stats['exact_duplicates'] + self.stats['near_duplicates']
+        return {
+            **self.stats,
+            'duplication_rate': duplicates / seen if seen else 0.0
+        }
+
+
+def attach_duplicates(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reference duplicates from their representatives' metadata
+
+    Each representative in chunks gets a 'duplicates' list of
+    {'chunk_id', 'metadata'} entries for the duplicates in chunks pointing at it,
+    so searches over representatives still surface every source record.
+
+    Returns:
+        Duplicates whose representative is not in chunks
+    """
+    by_id = {chunk.get('chunk_id'): chunk for chunk in chunks if 'duplicate_of' not in chunk}
+    unattached = []
+    for chunk in chunks:
+        if 'duplicate_of' not in chunk:
+            continue
+        representative = by_id.get(chunk['duplicate_of'])
+        if representative is None:
+            unattached.append(chunk)
+            continue
+        representative.setdefault('duplicates', []).append({
+            'chunk_id': chunk.get('chunk_id'),
+            'metadata': chunk.get('metadata', {})
+        })
+    return unattached
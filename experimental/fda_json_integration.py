@@ -28,10 +28,11 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 
 # Import our massive JSON processor
 from experimental.massive_json_processor import MassiveJSONProcessor
+from core.keyword_automaton import KeywordAutomaton
 
 # Import CognitiveLattice components if available
 try:
@@ -42,6 +43,34 @@ except ImportError:
     CognitiveLattice_AVAILABLE = False
 
 
+# Keyword lists behind the per-chunk medical annotations
+PEDIATRIC_INDICATORS = [
+    'pediatric', 'child', 'children', 'infant', 'neonatal', 'adolescent',
+    'years of age', 'months of age', 'years old', 'months old', 'pediatric use', 'safety in children',
+    'contraindicated in children', 'not recommended for children'
+]
+
+SAFETY_FLAG_TERMS = {
+    'high_risk': ['black box', 'boxed warning', 'contraindicated'],
+    'warnings_present': ['warning', 'caution', 'adverse'],
+    'serious_adverse_events': ['death', 'fatal', 'life-threatening'],
+    'reproductive_concerns': ['pregnancy', 'lactation', 'breastfeeding']
+}
+
+MEDICAL_COMPLEXITY_TERMS = [
+    'pharmacokinetics', 'bioavailability', 'metabolism', 'clearance',
+    'half-life', 'cytochrome', 'enzyme', 'receptor', 'mechanism',
+    'contraindication', 'pharmacodynamics', 'therapeutic', 'clinical'
+]
+
+# One automaton finds every annotation keyword in a single pass over a chunk
+_ANNOTATION_AUTOMATON = KeywordAutomaton(
+    PEDIATRIC_INDICATORS
+    + [term for terms in SAFETY_FLAG_TERMS.values() for term in terms]
+    + MEDICAL_COMPLEXITY_TERMS
+)
+
+
 class FDAJSONProcessor:
     """
     Specialized processor for FDA JSON API files
@@ -74,6 +103,12 @@ class FDAJSONProcessor:
         
         print("🏥 FDA JSON Processor initialized")
     
+    def __getstate__(self):
+        """Drop the RAG system when shipped to shard worker processes (embedding stays in the parent)"""
+        state = self.__dict__.copy()
+        state['CognitiveLattice_rag'] = None
+        return state
+    
     def get_fda_extraction_config(self) -> Dict[str, Any]:
         """
         Get extraction configuration optimized for FDA pharmaceutical data
@@ -85,7 +120,7 @@ class FDAJSONProcessor:
                 'brand_name', 'generic_name', 'active_ingredient', 'product_name',
                 
                 # Medical information  
-                'indication', 'contraindications', 'warnings', 'precautions',
+                'indications_and_usage', 'indication', 'contraindications', 'warnings', 'precautions',
                 'adverse_reactions', 'dosage_and_administration', 'clinical_pharmacology',
                 
                 # Pediatric-specific fields (for ELSA use case)
@@ -107,6 +142,7 @@ class FDAJSONProcessor:
             ],
             
             # FDA-specific settings
+            'join_list_fields': True,  # Label sections are lists of paragraphs
             'concatenate_all_text': True,  # Capture all available medical info
             'max_text_length': 8000,  # Longer chunks for comprehensive medical info
             'include_structure_info': True,
@@ -118,34 +154,46 @@ class FDAJSONProcessor:
             'include_regulatory_metadata': True
         }
     
-    def extract_fda_chunks(self, json_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def extract_fda_chunks(self, json_records: List[Dict[str, Any]],
+                           extraction_config: Optional[Dict[str, Any]] = None,
+                           record_offset: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Extract chunks specifically optimized for FDA pharmaceutical data
+        
+        Matches the signature of MassiveJSONProcessor.extract_meaningful_chunks so
+        it can replace it on the processor's ingestion pipeline.
         """
-        extraction_config = self.get_fda_extraction_config()
+        extraction_config = extraction_config or self.get_fda_extraction_config()
         
-        # Use the base extraction with FDA-specific config
-        base_chunks = self.processor.extract_meaningful_chunks(json_records, extraction_config)
+        # Use the base extraction with FDA-specific config (called on the class,
+        # since the instance attribute is patched to this method while processing)
+        base_chunks = MassiveJSONProcessor.extract_meaningful_chunks(
+            self.processor, json_records, extraction_config, record_offset=record_offset
+        )
         
-        # Add FDA-specific enhancements
+        # Add FDA-specific enhancements (this runs per batch inside the extraction workers)
         fda_enhanced_chunks = []
         
         for chunk in base_chunks:
             # Add pharmaceutical-specific metadata
             original_record = json_records[chunk['original_record_index']]
             
+            # Drug names live under openfda, which the field extraction does not descend into
+            names = self._extract_drug_names(original_record)
+            if names:
+                chunk['metadata'].update(names)
+                name_lines = [f"{key.replace('_', ' ').title()}: {', '.join(values)}" for key, values in names.items()]
+                chunk['content'] = "\n".join(name_lines + [chunk['content']]).strip()
+            
             # Extract drug classification
             drug_info = self._extract_drug_classification(original_record)
             chunk['drug_classification'] = drug_info
             
-            # Flag pediatric-relevant content
-            chunk['pediatric_relevant'] = self._is_pediatric_relevant(chunk['content'])
-            
-            # Extract safety level indicators
-            chunk['safety_flags'] = self._extract_safety_flags(chunk['content'])
-            
-            # Estimate medical complexity
-            chunk['medical_complexity'] = self._estimate_medical_complexity(chunk['content'])
+            # Pediatric relevance, safety flags and medical complexity from one keyword scan
+            annotations = self._annotate_content(chunk['content'])
+            chunk['pediatric_relevant'] = annotations['pediatric_relevant']
+            chunk['safety_flags'] = annotations['safety_flags']
+            chunk['medical_complexity'] = annotations['medical_complexity']
             
             # Update source type to be more specific
             chunk['source_type'] = 'fda_pharmaceutical_database'
@@ -155,6 +203,19 @@ class FDAJSONProcessor:
         print(f"🏥 Enhanced {len(fda_enhanced_chunks)} chunks with FDA-specific medical metadata")
         return fda_enhanced_chunks
     
+    def _extract_drug_names(self, record: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Brand, generic and manufacturer names from the record's openfda section"""
+        openfda = record.get('openfda')
+        if not isinstance(openfda, dict):
+            return {}
+        names = {}
+        for field, key in (('brand_name', 'brand_names'), ('generic_name', 'generic_names'),
+                           ('manufacturer_name', 'manufacturers')):
+            value = openfda.get(field)
+            if value:
+                names[key] = [str(item) for item in value] if isinstance(value, list) else [str(value)]
+        return names
+    
     def _extract_drug_classification(self, record: Dict[str, Any]) -> Dict[str, Any]:
         """Extract drug classification information"""
         classification = {
@@ -183,48 +244,39 @@ class FDAJSONProcessor:
         
         return classification
     
-    def _is_pediatric_relevant(self, content: str) -> bool:
-        """Check if content is relevant to pediatric use (for ELSA use case)"""
-        pediatric_indicators = [
-            'pediatric', 'child', 'children', 'infant', 'neonatal', 'adolescent',
-            'age', 'years old', 'months old', 'pediatric use', 'safety in children',
-            'contraindicated in children', 'not recommended for children'
-        ]
+    def _annotate_content(self, content: str) -> Dict[str, Any]:
+        """
+        Compute pediatric relevance, safety flags and medical complexity from one scan
         
-        content_lower = content.lower()
-        return any(indicator in content_lower for indicator in pediatric_indicators)
+        The keywords of all three annotations are matched together by a precompiled
+        automaton; each annotation is then derived from the set of keywords found.
+        """
+        found = _ANNOTATION_AUTOMATON.present(content)
+        return {
+            'pediatric_relevant': self._is_pediatric_relevant(content, found),
+            'safety_flags': self._extract_safety_flags(content, found),
+            'medical_complexity': self._estimate_medical_complexity(content, found)
+        }
     
-    def _extract_safety_flags(self, content: str) -> List[str]:
+    def _is_pediatric_relevant(self, content: str, found: Optional[Set[str]] = None) -> bool:
+        """Check if content is relevant to pediatric use (for ELSA use case)"""
+        if found is None:
+            found = _ANNOTATION_AUTOMATON.present(content)
+        return any(indicator in found for indicator in PEDIATRIC_INDICATORS)
+    
+    def _extract_safety_flags(self, content: str, found: Optional[Set[str]] = None) -> List[str]:
         """Extract safety warning flags from content"""
-        safety_flags = []
-        content_lower = content.lower()
-        
-        # Major safety indicators
-        if any(term in content_lower for term in ['black box', 'boxed warning', 'contraindicated']):
-            safety_flags.append('high_risk')
-        
-        if any(term in content_lower for term in ['warning', 'caution', 'adverse']):
-            safety_flags.append('warnings_present')
-        
-        if any(term in content_lower for term in ['death', 'fatal', 'life-threatening']):
-            safety_flags.append('serious_adverse_events')
-        
-        if any(term in content_lower for term in ['pregnancy', 'lactation', 'breastfeeding']):
-            safety_flags.append('reproductive_concerns')
-        
-        return safety_flags
+        if found is None:
+            found = _ANNOTATION_AUTOMATON.present(content)
+        return [flag for flag, terms in SAFETY_FLAG_TERMS.items() if any(term in found for term in terms)]
     
-    def _estimate_medical_complexity(self, content: str) -> str:
+    def _estimate_medical_complexity(self, content: str, found: Optional[Set[str]] = None) -> str:
         """Estimate the medical complexity of the content"""
-        # Simple heuristic based on medical terminology density
-        medical_terms = [
-            'pharmacokinetics', 'bioavailability', 'metabolism', 'clearance',
-            'half-life', 'cytochrome', 'enzyme', 'receptor', 'mechanism',
-            'contraindication', 'pharmacodynamics', 'therapeutic', 'clinical'
-        ]
+        if found is None:
+            found = _ANNOTATION_AUTOMATON.present(content)
         
-        content_lower = content.lower()
-        term_count = sum(1 for term in medical_terms if term in content_lower)
+        # Simple heuristic based on medical terminology density
+        term_count = sum(1 for term in MEDICAL_COMPLEXITY_TERMS if term in found)
         
         if term_count >= 5:
             return 'high'
@@ -235,9 +287,13 @@ class FDAJSONProcessor:
     
     def process_fda_files(self, file_paths: List[str], 
                          chunk_size: Optional[int] = None,
-                         custom_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                         custom_config: Optional[Dict[str, Any]] = None,
+                         max_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Process FDA JSON files with pharmaceutical-specific handling
+        
+        With max_workers > 1 each drug-label shard is parsed and extracted in its
+        own process, and all chunks are embedded into one index here.
         """
         if chunk_size:
             self.processor.chunk_size = chunk_size
@@ -255,6 +311,7 @@ class FDAJSONProcessor:
             # Process files using the enhanced extraction
             results = self.processor.process_multiple_files(
                 file_paths,
+                max_workers=max_workers,
                 extraction_config=custom_config or self.get_fda_extraction_config(),
                 save_intermediate=True
             )
@@ -281,6 +338,8 @@ def main():
     parser.add_argument('--file', type=str, help='Single FDA JSON file to process')
     parser.add_argument('--directory', type=str, help='Directory containing FDA JSON files')
     parser.add_argument('--chunk-size', type=int, default=1000, help='Records per processing batch')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Shard files processed in parallel (opt-in; parallel chunk ids are prefixed with the shard name)')
     parser.add_argument('--config', type=str, help='Custom extraction configuration JSON file')
     parser.add_argument('--no-rag', action='store_true', help='Disable CognitiveLattice RAG integration')
     parser.add_argument('--output', type=str, default='fda_processing_results.json', help='Output results file')
@@ -334,7 +393,8 @@ def main():
         results = processor.process_fda_files(
             files_to_process,
             chunk_size=args.chunk_size,
-            custom_config=custom_config
+            custom_config=custom_config,
+            max_workers=args.workers
         )
         
         # Save results
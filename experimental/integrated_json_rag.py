@@ -23,13 +23,22 @@ from datetime import datetime
 
 # Core imports
 from experimental.massive_json_processor import MassiveJSONProcessor
+from experimental.chunk_dedup import attach_duplicates
 from core.external_api_client import ExternalAPIClient
+from core.embedding_cache import get_embedding_cache
+from core.bm25_index import BM25Index, reciprocal_rank_fusion
+from core.facet_index import FacetIndex
+from core.context_packer import ContextPacker
+from core.claim_verifier import verify_claims
+from core.keyword_automaton import KeywordAutomaton
+from core.embedding_store import (
+    EmbeddingStoreWriter, open_embedding_store, load_store_chunks, source_fingerprint
+)
 
 # Embedding and search imports
 try:
     from sentence_transformers import SentenceTransformer
     import numpy as np
-    from sklearn.metrics.pairwise import cosine_similarity
     import torch
     EMBEDDINGS_AVAILABLE = True
     
@@ -47,11 +56,10 @@ try:
         
 except ImportError:
     print("⚠️ Installing required packages for embeddings...")
-    os.system("pip install sentence-transformers scikit-learn numpy torch")
+    os.system("pip install sentence-transformers numpy torch")
     try:
         from sentence_transformers import SentenceTransformer
         import numpy as np
-        from sklearn.metrics.pairwise import cosine_similarity
         import torch
         EMBEDDINGS_AVAILABLE = True
         
@@ -75,6 +83,74 @@ except ImportError:
         print("❌ Could not install embedding dependencies")
 
 
+# Maps detected document domains to the specialized model that embeds them
+DOMAIN_MODEL_MAPPING = {
+    'medical_pharmaceutical': 'medical_pharmaceutical',
+    'legal_contractual': 'legal_contractual', 
+    'scientific_technical': 'scientific_technical',
+    'financial_regulatory': 'legal_contractual',  # Use legal model for regulatory
+    'regulatory_compliance': 'legal_contractual',  # Use legal model for compliance
+    'general': 'general'
+}
+
+
+# Phrases suggesting the LLM answered from outside knowledge, per document domain
+DOMAIN_HALLUCINATION_PATTERNS = {
+    'medical_pharmaceutical': [
+        "according to medical knowledge", "it is medically established", "doctors typically recommend",
+        "medical studies show", "it is clinically proven", "standard medical practice"
+    ],
+    'legal_contractual': [
+        "according to legal precedent", "it is legally established", "courts typically rule",
+        "legal experts recommend", "it is legally binding", "standard legal practice"
+    ],
+    'financial_regulatory': [
+        "according to financial analysis", "it is financially sound", "analysts typically recommend",
+        "market studies show", "it is financially proven", "standard accounting practice"
+    ],
+    'scientific_technical': [
+        "according to scientific consensus", "it is scientifically established", "researchers typically find",
+        "studies consistently show", "it is technically proven", "standard scientific practice"
+    ],
+    'regulatory_compliance': [
+        "according to regulatory guidance", "it is regulatory standard", "inspectors typically require",
+        "compliance studies show", "it is regulatorily proven", "standard compliance practice"
+    ],
+    'general': [
+        "according to my knowledge", "based on general information", "it is well known that",
+        "typically", "usually", "it is commonly accepted"
+    ]
+}
+
+# Phrases showing domain-appropriate source referencing
+DOMAIN_POSITIVE_SIGNALS = {
+    'medical_pharmaceutical': ["according to the drug label", "the prescribing information states", "as indicated in the clinical data"],
+    'legal_contractual': ["according to the contract", "the agreement states", "as specified in clause"],
+    'financial_regulatory': ["according to the filing", "the financial statement shows", "as reported in the disclosure"],
+    'scientific_technical': ["according to the research", "the study data shows", "as measured in the experiment"],
+    'regulatory_compliance': ["according to the regulation", "the standard requires", "as specified in the guideline"],
+    'general': ["according to the document", "the source states", "as mentioned in the data"]
+}
+
+# Phrases showing the LLM admitted missing information
+NOT_FOUND_SIGNALS = ["information not found", "not in the provided data"]
+
+_verification_automata: Dict[str, KeywordAutomaton] = {}
+
+
+def get_verification_automaton(domain: str) -> KeywordAutomaton:
+    """One compiled automaton over a domain's hallucination, positive and not-found phrases"""
+    automaton = _verification_automata.get(domain)
+    if automaton is None:
+        automaton = KeywordAutomaton(
+            DOMAIN_HALLUCINATION_PATTERNS.get(domain, DOMAIN_HALLUCINATION_PATTERNS['general'])
+            + DOMAIN_POSITIVE_SIGNALS.get(domain, DOMAIN_POSITIVE_SIGNALS['general'])
+            + NOT_FOUND_SIGNALS
+        )
+        _verification_automata[domain] = automaton
+    return automaton
+
+
 class IntegratedJSONRAG:
     """
     Complete RAG system for massive JSON files with hallucination prevention
@@ -86,7 +162,12 @@ class IntegratedJSONRAG:
                  chunk_size: int = 500,
                  max_context_tokens: int = 100000,  # gpt-4o-mini context window
                  use_gpu: bool = True,  # GPU control
-                 specialized_models: bool = True):  # Enable multiple specialized models
+                 specialized_models: bool = True,  # Enable multiple specialized models
+                 search_block_rows: int = 65536,  # Rows scored per block during search
+                 embedding_store_dir: Optional[str] = None,  # Persist embeddings as a reopenable memmap
+                 embedding_dtype: str = "float32",  # "float16" halves the store size
+                 context_mmr_lambda: float = 0.7,  # Relevance vs. novelty when packing LLM context
+                 trim_context_sentences: bool = False):  # Keep only query-relevant sentences of each chunk
         """
         Initialize the integrated RAG system with optional specialized models
         
@@ -97,6 +178,12 @@ class IntegratedJSONRAG:
             max_context_tokens: Max tokens for LLM context
             use_gpu: Enable GPU acceleration
             specialized_models: Use multiple domain-specific embedding models
+            search_block_rows: Embedding rows scored per block (bounds RAM for memory-mapped embeddings)
+            embedding_store_dir: Directory for the on-disk embedding store (None keeps embeddings in RAM)
+            embedding_dtype: Storage dtype for embeddings ("float32" or "float16")
+            context_mmr_lambda: MMR weight of search relevance against redundancy with chunks already in context
+            trim_context_sentences: Trim context chunks to the sentences that share terms with the query
+                (and their neighbors); off by default since label sentences rarely repeat the query's words
         """
         
         print("🚀 Initializing CognitiveLattice Integrated JSON RAG System")
@@ -107,6 +194,14 @@ class IntegratedJSONRAG:
         self.embedding_model_name = embedding_model
         self.use_gpu = use_gpu and GPU_AVAILABLE
         self.specialized_models = specialized_models
+        self.search_block_rows = search_block_rows
+        self.embedding_store_dir = embedding_store_dir
+        self.embedding_dtype = embedding_dtype
+        self.current_source = None  # Fingerprint of the file being indexed
+        self.current_build = None  # Ingestion settings the indexed chunks were produced with
+        self.extraction_mode = "generic"  # Chunk extraction used for JSON files ("fda" after use_fda_extraction)
+        self.context_mmr_lambda = context_mmr_lambda
+        self.trim_context_sentences = trim_context_sentences
         
         # Initialize specialized RAG systems if enabled
         if specialized_models and embedding_model == "adaptive":
@@ -142,20 +237,7 @@ class IntegratedJSONRAG:
         else:
             # Single model mode (backward compatibility)
             self.rag_systems = None
-            if EMBEDDINGS_AVAILABLE:
-                print(f"🤖 Loading single embedding model: {embedding_model}")
-                self.embedding_model = SentenceTransformer(embedding_model)
-                
-                if self.use_gpu:
-                    self.embedding_model = self.embedding_model.to('cuda')
-                    # Enable mixed precision for faster inference
-                    self.embedding_model = self.embedding_model.half()
-                    print(f"   ✅ Model loaded on GPU with FP16 mixed precision")
-                else:
-                    print(f"   ✅ Model loaded on CPU")
-            else:
-                print("❌ Embeddings not available - semantic search disabled")
-                self.embedding_model = None
+            self.embedding_model = self._load_single_model()
         
         # Initialize components (JSON processor will be lazy-loaded when needed)
         self.json_processor = None  # Lazy-loaded only when processing JSON files
@@ -166,6 +248,11 @@ class IntegratedJSONRAG:
         self.chunk_embeddings = []
         self.chunk_metadata = []
         self.verbatim_chunks = {}  # For hallucination verification
+        self.keyword_index = BM25Index()  # Inverted index for keyword/hybrid search
+        self.facet_index = FacetIndex()  # Columnar metadata filters applied before search
+        self.index_version = 0  # Bumped whenever the indexed chunks change
+        self.retrieval_client = None  # RetrievalClient of a shared daemon that serves semantic_search
+        self._domain_cache = None  # (index_version, detected document domain)
         
         # Current document domain for dynamic model selection
         self.current_document_domain = "general"
@@ -181,6 +268,60 @@ class IntegratedJSONRAG:
             print(f"   Mode: Single model ({embedding_model})")
         print("✅ System initialized successfully\n")
     
+    def _load_single_model(self):
+        """Load the embedding model used in single model mode"""
+        if not EMBEDDINGS_AVAILABLE:
+            print("❌ Embeddings not available - semantic search disabled")
+            return None
+        
+        print(f"🤖 Loading single embedding model: {self.embedding_model_name}")
+        model = SentenceTransformer(self.embedding_model_name)
+        
+        if self.use_gpu:
+            model = model.to('cuda')
+            # Enable mixed precision for faster inference
+            model = model.half()
+            print(f"   ✅ Model loaded on GPU with FP16 mixed precision")
+        else:
+            print(f"   ✅ Model loaded on CPU")
+        return model
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Snapshot state for pickling (used when RAGSystemManager spills a system to disk)
+        
+        Only the indexes are kept: embedding models, the JSON processor and the LLM
+        client (which holds the API key) are rebuilt on load, and memory-mapped
+        embeddings are stored as a reference to their file.
+        """
+        state = self.__dict__.copy()
+        state['embedding_model'] = None
+        state['json_processor'] = None
+        state['llm_client'] = None
+        state['retrieval_client'] = None
+        state['llm_provider'] = self.llm_client.api_provider
+        if self.rag_systems is not None:
+            state['rag_systems'] = {
+                key: {**config, 'model': None} for key, config in self.rag_systems.items()
+            }
+        embeddings = self.chunk_embeddings
+        if isinstance(embeddings, np.memmap) and embeddings.filename:
+            state['chunk_embeddings'] = ('memmap', embeddings.filename, embeddings.dtype.str,
+                                         embeddings.shape, embeddings.offset)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        """Restore a snapshot taken by __getstate__"""
+        llm_provider = state.pop('llm_provider')
+        embeddings = state['chunk_embeddings']
+        if isinstance(embeddings, tuple) and embeddings and embeddings[0] == 'memmap':
+            _, filename, dtype, shape, offset = embeddings
+            state['chunk_embeddings'] = np.memmap(filename, dtype=dtype, mode='r', shape=shape, offset=offset)
+        self.__dict__.update(state)
+        self.llm_client = ExternalAPIClient(api_provider=llm_provider)
+        if self.rag_systems is None:
+            self.embedding_model = self._load_single_model()
+    
     def _ensure_json_processor(self):
         """Lazy-load JSON processor only when needed for JSON file processing"""
         if self.json_processor is None:
@@ -210,6 +351,8 @@ class IntegratedJSONRAG:
         self.chunk_embeddings = []
         self.chunk_metadata = []
         self.verbatim_chunks = {}
+        self.current_source = None
+        self.current_build = None
         
         # Convert chunks to internal format and detect document domain
         for chunk in chunks:
@@ -267,23 +410,32 @@ class IntegratedJSONRAG:
         
         # Ensure JSON processor is initialized
         self._ensure_json_processor()
+        self.current_source = source_fingerprint(file_path)
+        self.current_build = self._build_settings(json_path)
         
-        # Step 1: Process JSON file into chunks
+        # Step 1: Process JSON file into chunks, keeping exactly what the extractor produced
+        # (FDA extraction adds the pediatric/safety/complexity facets indexed below)
         print("1️⃣ Processing JSON file into chunks...")
+        extracted_chunks = []
         processing_results = self.json_processor.process_single_file(
             file_path,
             json_path=json_path,
             extraction_config=extraction_config,
-            save_intermediate=True
+            save_intermediate=True,
+            chunk_sink=extracted_chunks.extend
         )
         
-        if processing_results['total_chunks_created'] == 0:
+        if not extracted_chunks:
             print("❌ No chunks were created from the JSON file")
             return processing_results
         
-        # Step 2: Load processed chunks and create embeddings
-        print(f"\n2️⃣ Loading {processing_results['total_chunks_created']} chunks for embedding...")
-        self._load_and_embed_chunks()
+        # Step 2: Embed the extracted chunks (near-duplicates are referenced from their representative)
+        attach_duplicates(extracted_chunks)
+        all_chunks = [chunk for chunk in extracted_chunks if 'duplicate_of' not in chunk]
+        print(f"\n2️⃣ Embedding {len(all_chunks):,} of {len(extracted_chunks):,} extracted chunks...")
+        self.chunk_embeddings = []
+        self.verbatim_chunks = {chunk['chunk_id']: chunk['content'] for chunk in all_chunks}
+        self._create_embeddings_for_chunks(all_chunks, [chunk['content'] for chunk in all_chunks])
         
         print(f"✅ JSON file processing complete!")
         print(f"   📊 Total chunks: {len(self.chunk_metadata):,}")
@@ -292,188 +444,17 @@ class IntegratedJSONRAG:
         
         return processing_results
     
-    def _load_and_embed_chunks(self):
-        """
-        Load processed chunks from temp files and create embeddings using REAL data
-        """
-        # Ensure JSON processor is initialized if we need to access temp_dir
-        self._ensure_json_processor()
-        
-        # First check if we have actual chunk files saved during processing
-        chunk_files = list(Path(self.json_processor.temp_dir).glob("chunks_*.json"))
-        
-        if chunk_files:
-            print(f"📂 Loading actual chunks from {len(chunk_files)} chunk files...")
-            self._load_actual_chunks_from_files(chunk_files)
-        else:
-            print("📂 No chunk files found, processing directly from JSON...")
-            self._load_chunks_from_json_directly()
-    
-    def _load_actual_chunks_from_files(self, chunk_files):
-        """Load actual chunk data from saved chunk files"""
-        all_chunks = []
-        chunk_texts = []
-        
-        for chunk_file in sorted(chunk_files):
-            try:
-                with open(chunk_file, 'r', encoding='utf-8') as f:
-                    chunks_data = json.load(f)
-                
-                if isinstance(chunks_data, list):
-                    for chunk in chunks_data:
-                        all_chunks.append(chunk)
-                        chunk_texts.append(chunk['content'])
-                        self.verbatim_chunks[chunk['chunk_id']] = chunk['content']
-                
-            except Exception as e:
-                print(f"⚠️ Could not load {chunk_file.name}: {e}")
-                continue
-        
-        print(f"📋 Loaded {len(all_chunks)} actual chunks with real content")
-        self._create_embeddings_for_chunks(all_chunks, chunk_texts)
-    
-    def _load_chunks_from_json_directly(self):
-        """Load chunks by processing the JSON file directly (fallback method)"""
-        # Check for original FDA file
-        fda_file = "drug-label-0001-of-0013.json"
-        if not os.path.exists(fda_file):
-            print("❌ No FDA file found for direct processing")
-            return
-        
-        print(f"📁 Processing {fda_file} directly to get real drug data...")
-        
-        all_chunks = []
-        chunk_texts = []
-        
-        try:
-            import ijson
-            
-            with open(fda_file, 'rb') as f:
-                # Parse FDA data structure - results.item contains the drug records
-                parser = ijson.items(f, 'results.item')
-                
-                chunk_count = 0
-                for i, drug_record in enumerate(parser):
-                    if chunk_count >= 1000:  # Limit for demo
-                        break
-                    
-                    # Extract meaningful drug information
-                    drug_info = self._extract_drug_information(drug_record, i)
-                    if drug_info and drug_info['content'].strip():
-                        all_chunks.append(drug_info)
-                        chunk_texts.append(drug_info['content'])
-                        self.verbatim_chunks[drug_info['chunk_id']] = drug_info['content']
-                        chunk_count += 1
-                        
-                        if chunk_count % 100 == 0:
-                            print(f"   📊 Processed {chunk_count} drug records...")
-        
-        except Exception as e:
-            print(f"❌ Error processing FDA file directly: {e}")
-            return
-        
-        print(f"📋 Loaded {len(all_chunks)} drug records with real content")
-        self._create_embeddings_for_chunks(all_chunks, chunk_texts)
-    
-    def _extract_drug_information(self, drug_record, index):
-        """Extract meaningful information from a single FDA drug record"""
-        try:
-            # Extract key drug information from FDA record structure
-            content_parts = []
-            metadata = {}
-            
-            # Get drug name/brand names
-            if 'openfda' in drug_record:
-                openfda = drug_record['openfda']
-                
-                if 'brand_name' in openfda:
-                    brand_names = openfda['brand_name']
-                    if isinstance(brand_names, list):
-                        content_parts.append(f"Brand Names: {', '.join(brand_names)}")
-                        metadata['brand_names'] = brand_names
-                    else:
-                        content_parts.append(f"Brand Name: {brand_names}")
-                        metadata['brand_names'] = [brand_names]
-                
-                if 'generic_name' in openfda:
-                    generic_names = openfda['generic_name']
-                    if isinstance(generic_names, list):
-                        content_parts.append(f"Generic Names: {', '.join(generic_names)}")
-                        metadata['generic_names'] = generic_names
-                    else:
-                        content_parts.append(f"Generic Name: {generic_names}")
-                        metadata['generic_names'] = [generic_names]
-                
-                # Get manufacturer info
-                if 'manufacturer_name' in openfda:
-                    manufacturers = openfda['manufacturer_name']
-                    if isinstance(manufacturers, list):
-                        content_parts.append(f"Manufacturers: {', '.join(manufacturers)}")
-                        metadata['manufacturers'] = manufacturers
-                    else:
-                        content_parts.append(f"Manufacturer: {manufacturers}")
-                        metadata['manufacturers'] = [manufacturers]
-            
-            # Get usage information from the main drug record
-            if 'indications_and_usage' in drug_record:
-                indications = drug_record['indications_and_usage']
-                if isinstance(indications, list):
-                    indications_text = ' '.join(indications)
-                else:
-                    indications_text = str(indications)
-                
-                # Look for pediatric mentions
-                if indications_text:
-                    content_parts.append(f"Indications and Usage: {indications_text[:500]}...")
-                    metadata['has_pediatric_info'] = any(keyword in indications_text.lower() 
-                                                       for keyword in ['pediatric', 'children', 'infant', 'child'])
-            
-            # Get dosage information
-            if 'dosage_and_administration' in drug_record:
-                dosage = drug_record['dosage_and_administration']
-                if isinstance(dosage, list):
-                    dosage_text = ' '.join(dosage)
-                else:
-                    dosage_text = str(dosage)
-                
-                if dosage_text:
-                    content_parts.append(f"Dosage: {dosage_text[:300]}...")
-                    metadata['has_dosage_info'] = True
-            
-            # Get contraindications
-            if 'contraindications' in drug_record:
-                contraindications = drug_record['contraindications']
-                if isinstance(contraindications, list):
-                    contra_text = ' '.join(contraindications)
-                else:
-                    contra_text = str(contraindications)
-                
-                if contra_text:
-                    content_parts.append(f"Contraindications: {contra_text[:300]}...")
-                    metadata['has_contraindications'] = True
-            
-            # Create the chunk
-            if content_parts:
-                chunk_id = f"fda_drug_{index+1:06d}"
-                full_content = "\n\n".join(content_parts)
-                
-                return {
-                    'chunk_id': chunk_id,
-                    'content': full_content,
-                    'source_type': 'fda_drug_record',
-                    'metadata': metadata,
-                    'estimated_tokens': len(full_content.split()),
-                    'record_index': index
-                }
-            
-            return None
-            
-        except Exception as e:
-            print(f"⚠️ Error extracting drug info from record {index}: {e}")
-            return None
+    def _build_settings(self, json_path: str) -> Dict[str, Any]:
+        """Ingestion settings that change the chunks built from a JSON file"""
+        return {
+            "json_path": json_path,
+            "chunk_size": self.chunk_size,
+            "extraction_mode": self.extraction_mode
+        }
     
     def _create_embeddings_for_chunks(self, all_chunks, chunk_texts):
         """Create embeddings for loaded chunks with specialized model selection"""
+        detected_domain = "no"  # Keyword search only when embeddings are unavailable
         if EMBEDDINGS_AVAILABLE:
             print("🧠 Creating embeddings from real data...")
             
@@ -484,6 +465,7 @@ class IntegratedJSONRAG:
             else:
                 embedding_model = self.embedding_model
                 detected_domain = "single_model"
+            embedding_cache = self._get_embedding_cache()
             
             # GPU/CPU setup
             if self.use_gpu and GPU_AVAILABLE:
@@ -506,7 +488,10 @@ class IntegratedJSONRAG:
             print(f"   📦 Batch size: {batch_size}")
             print(f"   🎯 Using model for domain: {detected_domain}")
             
-            all_embeddings = []
+            # Preallocate the embedding matrix (on disk when a store is configured)
+            embeddings = None
+            store_writer = None
+            rows_written = 0
             total_batches = (len(chunk_texts) + batch_size - 1) // batch_size
             
             start_time = time.time()
@@ -516,16 +501,31 @@ class IntegratedJSONRAG:
                 batch_texts = chunk_texts[i:i+batch_size]
                 batch_num = i // batch_size + 1
                 
-                # Create embeddings for batch
-                batch_embeddings = embedding_model.encode(
+                # Create embeddings for batch (cached texts skip the model)
+                batch_embeddings = embedding_cache.encode(
                     batch_texts,
-                    batch_size=batch_size,
-                    show_progress_bar=False,
-                    convert_to_numpy=True,
-                    normalize_embeddings=True  # Normalize for better similarity
+                    lambda texts: embedding_model.encode(
+                        texts,
+                        batch_size=batch_size,
+                        show_progress_bar=False,
+                        convert_to_numpy=True,
+                        normalize_embeddings=True  # Normalize for better similarity
+                    )
                 )
                 
-                all_embeddings.extend(batch_embeddings)
+                if rows_written == 0:
+                    dim = batch_embeddings.shape[1]
+                    if self.embedding_store_dir:
+                        store_writer = EmbeddingStoreWriter(
+                            self.embedding_store_dir, len(chunk_texts), dim, self.embedding_dtype
+                        )
+                    else:
+                        embeddings = np.empty((len(chunk_texts), dim), dtype=self.embedding_dtype)
+                if store_writer is not None:
+                    store_writer.write(batch_embeddings)
+                else:
+                    embeddings[rows_written:rows_written + len(batch_texts)] = batch_embeddings
+                rows_written += len(batch_texts)
                 
                 # Performance monitoring
                 batch_time = time.time() - batch_start_time
@@ -541,11 +541,23 @@ class IntegratedJSONRAG:
             total_time = time.time() - start_time
             total_texts_per_second = len(chunk_texts) / total_time
             
-            self.chunk_embeddings = np.array(all_embeddings)
+            if store_writer is not None:
+                self.chunk_embeddings = store_writer.finalize(all_chunks, {
+                    "model_name": self._get_embedding_model_name(detected_domain),
+                    "document_domain": self.current_document_domain,
+                    "source": self.current_source,
+                    "build": self.current_build,
+                    "created_at": datetime.now().isoformat()
+                })
+                print(f"💾 Embedding store written to {self.embedding_store_dir} ({self.embedding_dtype})")
+            elif embeddings is not None:
+                self.chunk_embeddings = embeddings
+            else:
+                self.chunk_embeddings = []
             
             if self.use_gpu and GPU_AVAILABLE:
                 final_memory = torch.cuda.memory_allocated() / 1e9
-                print(f"✅ GPU embedding complete: {len(all_embeddings)} embeddings in {total_time:.2f}s")
+                print(f"✅ GPU embedding complete: {rows_written} embeddings in {total_time:.2f}s")
                 print(f"   🚀 Overall speed: {total_texts_per_second:.1f} texts/second")
                 print(f"   💾 Final GPU memory: {final_memory:.2f} GB")
                 print(f"   🎯 Model used: {embedding_model.get_model_info() if hasattr(embedding_model, 'get_model_info') else detected_domain}")
@@ -553,17 +565,32 @@ class IntegratedJSONRAG:
                 # Clear GPU cache after completion
                 torch.cuda.empty_cache()
             else:
-                print(f"✅ CPU embedding complete: {len(all_embeddings)} embeddings in {total_time:.2f}s")
+                print(f"✅ CPU embedding complete: {rows_written} embeddings in {total_time:.2f}s")
                 print(f"   💻 Overall speed: {total_texts_per_second:.1f} texts/second")
                 print(f"   🎯 Model used: {detected_domain}")
+            
+            cache_stats = embedding_cache.get_stats()
+            print(f"   🗃️ Embedding cache: {cache_stats['hit_rate']:.1%} hit rate "
+                  f"({cache_stats['memory_hits'] + cache_stats['disk_hits']:,} hits, {cache_stats['misses']:,} misses)")
         
         self.chunk_metadata = all_chunks
+        
+        # Build the BM25 inverted index and the facet index alongside the embeddings
+        self.keyword_index = BM25Index()
+        self.keyword_index.add_documents(
+            (position, chunk.get('content', '')) for position, chunk in enumerate(all_chunks)
+        )
+        self.facet_index = FacetIndex()
+        self.facet_index.add_chunks(all_chunks)
+        self.index_version += 1
         print(f"💾 Stored metadata for {len(all_chunks)} chunks with {detected_domain} embeddings")
     
     def semantic_search(self, 
                        query: str, 
                        top_k: int = 50,
-                       similarity_threshold: float = 0.3) -> List[Dict[str, Any]]:
+                       similarity_threshold: float = 0.3,
+                       search_mode: str = "semantic",
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Perform semantic search to find relevant chunks
         
@@ -571,11 +598,27 @@ class IntegratedJSONRAG:
             query: Search query
             top_k: Number of top results to return
             similarity_threshold: Minimum similarity score
+            search_mode: "semantic", or "hybrid" to fuse with BM25 keyword ranking
+            filters: Facet filters (e.g. {"pediatric_relevant": True}); only matching rows are scored
             
         Returns:
             List of relevant chunks with similarity scores
         """
         
+        if self.retrieval_client is not None:
+            try:
+                results = self.retrieval_client.semantic_search(
+                    query, top_k=top_k, similarity_threshold=similarity_threshold,
+                    search_mode=search_mode, filters=filters
+                )
+                # Remote results carry their content; keep it for verification
+                for chunk in results:
+                    self.verbatim_chunks.setdefault(chunk['chunk_id'], chunk.get('content', ''))
+                print(f"📡 Retrieval daemon returned {len(results)} chunks for '{query}'")
+                return results
+            except Exception as e:
+                print(f"⚠️ Retrieval daemon search failed, searching locally: {e}")
+        
         if not self.chunk_metadata:
             print("❌ No chunks available for search. Process a JSON file first.")
             return []
@@ -583,6 +626,11 @@ class IntegratedJSONRAG:
         print(f"🔍 Semantic search: '{query}'")
         print(f"   📊 Searching {len(self.chunk_metadata):,} chunks")
         
+        candidate_mask, candidate_rows = self._facet_candidates(filters)
+        if candidate_rows is not None and candidate_rows.size == 0:
+            print(f"   ⚠️ No chunks match filters {filters}")
+            return []
+        
         if EMBEDDINGS_AVAILABLE and len(self.chunk_embeddings) > 0:
             # Semantic search using embeddings
             print("🧠 Using semantic embeddings for search...")
@@ -595,36 +643,24 @@ class IntegratedJSONRAG:
             else:
                 embedding_model = self.embedding_model
             
-            # Embed the query with GPU acceleration
-            if self.use_gpu and GPU_AVAILABLE:
-                query_embedding = embedding_model.encode(
-                    [query],
-                    convert_to_numpy=True,
-                    normalize_embeddings=True
-                )
-            else:
-                query_embedding = embedding_model.encode(
-                    [query],
+            # Embed the query (repeated queries are served from the cache)
+            query_embedding = self._get_embedding_cache().encode(
+                [query],
+                lambda texts: embedding_model.encode(
+                    texts,
                     convert_to_numpy=True,
                     normalize_embeddings=True
                 )
+            )
             
-            # Calculate similarities
-            similarities = cosine_similarity(query_embedding, self.chunk_embeddings)[0]
-            
-            # Get top-k results above threshold
-            relevant_indices = []
-            for i, score in enumerate(similarities):
-                if score >= similarity_threshold:
-                    relevant_indices.append((i, score))
-            
-            # Sort by similarity and take top-k
-            relevant_indices.sort(key=lambda x: x[1], reverse=True)
-            relevant_indices = relevant_indices[:top_k]
+            # Embeddings are normalized, so cosine similarity is a dot product
+            top_indices, top_scores = self._top_k_by_similarity(
+                query_embedding[0], top_k, similarity_threshold, rows=candidate_rows
+            )
             
             # Build results
             results = []
-            for idx, score in relevant_indices:
+            for idx, score in zip(top_indices, top_scores):
                 chunk_info = self.chunk_metadata[idx].copy()
                 chunk_info['similarity_score'] = float(score)
                 chunk_info['search_method'] = 'semantic_embedding'
@@ -632,31 +668,205 @@ class IntegratedJSONRAG:
             
             print(f"   ✅ Found {len(results)} relevant chunks (similarity ≥ {similarity_threshold})")
             
+            if search_mode == "hybrid":
+                results = self._fuse_with_keyword_search(query, results, top_k, candidate_mask)
+            
         else:
-            # Fallback to keyword search
+            # Fallback to keyword search over the BM25 inverted index
             print("🔤 Using keyword search fallback...")
             
-            query_words = query.lower().split()
+            keyword_hits = self.keyword_index.search(query, k=top_k, candidate_mask=candidate_mask)
+            best_score = keyword_hits[0][1] if keyword_hits else 1.0
             results = []
             
-            for i, chunk in enumerate(self.chunk_metadata):
-                content_lower = chunk['content'].lower()
-                matches = sum(1 for word in query_words if word in content_lower)
-                
-                if matches > 0:
-                    chunk_info = chunk.copy()
-                    chunk_info['similarity_score'] = matches / len(query_words)
-                    chunk_info['search_method'] = 'keyword_fallback'
-                    results.append(chunk_info)
-            
-            # Sort by score and take top-k
-            results.sort(key=lambda x: x['similarity_score'], reverse=True)
-            results = results[:top_k]
+            for position, score in keyword_hits:
+                chunk_info = self.chunk_metadata[position].copy()
+                chunk_info['similarity_score'] = score / best_score
+                chunk_info['bm25_score'] = score
+                chunk_info['search_method'] = 'keyword_fallback'
+                results.append(chunk_info)
             
-            print(f"   ✅ Found {len(results)} relevant chunks (keyword matching)")
+            print(f"   ✅ Found {len(results)} relevant chunks (BM25 keyword ranking)")
         
         return results
     
+    def _facet_candidates(self, filters: Optional[Dict[str, Any]]) -> Tuple[Optional["np.ndarray"], Optional["np.ndarray"]]:
+        """
+        Resolve facet filters to a row mask and sorted row indices
+        
+        Returns:
+            (mask, rows), or (None, None) to search every row
+        """
+        if not filters:
+            return None, None
+        
+        try:
+            candidate_mask = self.facet_index.filter_mask(filters)
+        except KeyError as e:
+            print(f"   ⚠️ Ignoring filters {filters}: {e}")
+            return None, None
+        
+        candidate_rows = candidate_mask.nonzero()[0]
+        print(f"   🏷️ Facet filters {filters}: {len(candidate_rows):,} candidate chunks")
+        return candidate_mask, candidate_rows
+    
+    def _top_k_by_similarity(self, 
+                             query_vector: "np.ndarray", 
+                             top_k: int,
+                             similarity_threshold: float,
+                             rows: Optional["np.ndarray"] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Select the top-k rows of self.chunk_embeddings by dot product with the query
+        
+        Rows are scored in blocks of search_block_rows, so a memory-mapped embedding
+        matrix is streamed from disk instead of being loaded whole.
+        
+        Args:
+            query_vector: Normalized query embedding
+            top_k: Number of rows to return
+            similarity_threshold: Minimum similarity score
+            rows: Sorted candidate row indices (None scores every row)
+            
+        Returns:
+            Tuple of (row indices, scores), best first
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        best_indices = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        if top_k <= 0:
+            return best_indices, best_scores
+        
+        total_rows = len(self.chunk_embeddings) if rows is None else len(rows)
+        for start in range(0, total_rows, self.search_block_rows):
+            if rows is None:
+                block_rows = None
+                block = np.asarray(self.chunk_embeddings[start:start + self.search_block_rows], dtype=np.float32)
+            else:
+                # Gather only the candidate rows (a memmap reads just those pages)
+                block_rows = rows[start:start + self.search_block_rows]
+                block = np.asarray(self.chunk_embeddings[block_rows], dtype=np.float32)
+            scores = block @ query_vector
+            
+            # Vectorized threshold, then merge with the running top-k
+            passing = np.flatnonzero(scores >= similarity_threshold)
+            if passing.size == 0:
+                continue
+            passing_rows = passing + start if block_rows is None else block_rows[passing]
+            candidate_indices = np.concatenate([best_indices, passing_rows])
+            candidate_scores = np.concatenate([best_scores, scores[passing]])
+            if candidate_scores.size > top_k:
+                keep = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+                candidate_indices, candidate_scores = candidate_indices[keep], candidate_scores[keep]
+            best_indices, best_scores = candidate_indices, candidate_scores
+        
+        order = np.argsort(-best_scores, kind="stable")
+        return best_indices[order], best_scores[order]
+    
+    def load_embedding_store(self, store_dir: Optional[str] = None, source_file: Optional[str] = None,
+                             json_path: str = "results.item") -> bool:
+        """
+        Reopen a persisted embedding store instead of re-embedding
+        
+        Args:
+            store_dir: Store directory (defaults to embedding_store_dir)
+            source_file: Input file the store must have been built from (checked by size and mtime)
+            json_path: JSONPath the store must have been built with; checked together with
+                chunk_size and extraction_mode whenever source_file is given
+            
+        Returns:
+            True if the store was loaded, False if it is missing, incomplete or stale
+        """
+        store_dir = store_dir or self.embedding_store_dir
+        if not store_dir:
+            return False
+        
+        embeddings, metadata = open_embedding_store(store_dir)
+        if metadata is None:
+            return False
+        
+        if source_file is not None:
+            if not os.path.exists(source_file) or metadata.get("source") != source_fingerprint(source_file):
+                print(f"♻️ Embedding store in {store_dir} is stale for {Path(source_file).name}")
+                return False
+            if metadata.get("build") != self._build_settings(json_path):
+                print(f"♻️ Embedding store in {store_dir} was built with other settings: {metadata.get('build')}")
+                return False
+        
+        domain = metadata.get("document_domain", "general")
+        if metadata.get("model_name") != self._get_embedding_model_name(domain):
+            print(f"♻️ Embedding store in {store_dir} was built with {metadata.get('model_name')}")
+            return False
+        
+        chunks = load_store_chunks(store_dir)
+        if len(chunks) != len(embeddings):
+            print(f"⚠️ Embedding store in {store_dir} is inconsistent, ignoring it")
+            return False
+        
+        self.current_document_domain = domain
+        self.current_source = metadata.get("source")
+        self.current_build = metadata.get("build")
+        self.chunk_embeddings = embeddings
+        self.chunk_metadata = chunks
+        self.verbatim_chunks = {chunk['chunk_id']: chunk.get('content', '') for chunk in chunks if 'chunk_id' in chunk}
+        self.keyword_index = BM25Index()
+        self.keyword_index.add_documents(
+            (position, chunk.get('content', '')) for position, chunk in enumerate(chunks)
+        )
+        self.facet_index = FacetIndex()
+        self.facet_index.add_chunks(chunks)
+        self.index_version += 1
+        
+        print(f"⚡ Reopened embedding store: {len(chunks):,} chunks, {metadata['dim']}-d {metadata['dtype']} "
+              f"({metadata.get('model_name')})")
+        return True
+    
+    def _fuse_with_keyword_search(self, 
+                                  query: str, 
+                                  semantic_results: List[Dict[str, Any]],
+                                  top_k: int,
+                                  candidate_mask: Optional["np.ndarray"] = None) -> List[Dict[str, Any]]:
+        """
+        Fuse semantic results with BM25 keyword results via reciprocal rank fusion
+        
+        Args:
+            query: Search query
+            semantic_results: Ranked semantic results
+            top_k: Number of fused results to return
+            candidate_mask: Facet filter mask restricting keyword candidates
+            
+        Returns:
+            Fused, ranked list of chunks
+        """
+        keyword_hits = self.keyword_index.search(query, k=top_k, candidate_mask=candidate_mask)
+        
+        chunks_by_id = {}
+        semantic_ids = []
+        for chunk in semantic_results:
+            chunks_by_id[chunk['chunk_id']] = chunk
+            semantic_ids.append(chunk['chunk_id'])
+        
+        keyword_ids = []
+        bm25_scores = {}
+        for position, score in keyword_hits:
+            chunk = self.chunk_metadata[position]
+            keyword_ids.append(chunk['chunk_id'])
+            bm25_scores[chunk['chunk_id']] = score
+            if chunk['chunk_id'] not in chunks_by_id:
+                chunk_info = chunk.copy()
+                chunk_info['similarity_score'] = 0.0
+                chunks_by_id[chunk['chunk_id']] = chunk_info
+        
+        fused_results = []
+        for chunk_id, fused_score in reciprocal_rank_fusion([semantic_ids, keyword_ids])[:top_k]:
+            chunk_info = chunks_by_id[chunk_id]
+            chunk_info['rrf_score'] = fused_score
+            chunk_info['bm25_score'] = bm25_scores.get(chunk_id, 0.0)
+            chunk_info['search_method'] = 'hybrid_bm25_semantic'
+            fused_results.append(chunk_info)
+        
+        print(f"   🔀 Hybrid fusion: {len(semantic_ids)} semantic + {len(keyword_ids)} keyword → {len(fused_results)} results")
+        return fused_results
+    
     def prepare_context_for_llm(self, 
                               relevant_chunks: List[Dict[str, Any]],
                               query: str) -> Tuple[str, List[str]]:
@@ -670,45 +880,40 @@ class IntegratedJSONRAG:
         Returns:
             Tuple of (formatted_context, chunk_ids_used)
         """
+        context, chunk_ids_used, _ = self._pack_context(relevant_chunks, query)
+        return context, chunk_ids_used
+    
+    def _pack_context(self, 
+                      relevant_chunks: List[Dict[str, Any]],
+                      query: str) -> Tuple[str, List[str], Dict[str, Any]]:
+        """
+        Pack relevant chunks into the LLM context with ContextPacker
+        
+        Token counts come from the LLM tokenizer, redundant chunks are dropped by
+        maximal marginal relevance, and chunks are optionally trimmed to query-relevant sentences.
         
+        Returns:
+            Tuple of (formatted_context, chunk_ids_used, packing stats)
+        """
         print(f"📝 Preparing context for LLM...")
         print(f"   🎯 Target: {self.max_context_tokens:,} tokens max")
         
-        # Estimate tokens per chunk (rough approximation: 1 token ≈ 4 characters)
-        context_parts = []
-        total_estimated_tokens = 0
-        chunk_ids_used = []
-        
-        # Add query context
-        query_tokens = len(query) // 4
-        context_parts.append(f"User Query: {query}\n\nRelevant Information:\n")
-        total_estimated_tokens += query_tokens + 20
-        
-        # Add chunks until we approach token limit
-        for i, chunk in enumerate(relevant_chunks):
-            chunk_tokens = chunk.get('estimated_tokens', len(chunk['content']) // 4)
-            
-            if total_estimated_tokens + chunk_tokens > self.max_context_tokens * 0.9:  # 90% safety margin
-                print(f"   ⚠️ Context limit reached at chunk {i+1}/{len(relevant_chunks)}")
-                break
-            
-            # Format chunk for context
-            chunk_text = f"\n--- Chunk {chunk['chunk_id']} (similarity: {chunk['similarity_score']:.3f}) ---\n"
-            chunk_text += chunk['content']
-            chunk_text += f"\n--- End Chunk {chunk['chunk_id']} ---\n"
-            
-            context_parts.append(chunk_text)
-            total_estimated_tokens += chunk_tokens + 30  # Include formatting overhead
-            chunk_ids_used.append(chunk['chunk_id'])
-        
-        final_context = "".join(context_parts)
+        packer = ContextPacker(
+            token_budget=int(self.max_context_tokens * 0.9),  # 90% safety margin
+            mmr_lambda=self.context_mmr_lambda,
+            trim_sentences=self.trim_context_sentences
+        )
+        final_context, chunk_ids_used, stats = packer.pack(query, relevant_chunks)
         
         print(f"   ✅ Context prepared:")
-        print(f"      📊 Chunks included: {len(chunk_ids_used)}")
-        print(f"      🎯 Estimated tokens: {total_estimated_tokens:,}")
+        print(f"      📊 Chunks included: {stats['chunks_used']}/{stats['chunks_considered']} "
+              f"({stats['chunks_dropped_redundant']} redundant, {stats['chunks_trimmed']} trimmed, "
+              f"{stats['chunks_over_budget']} over budget)")
+        print(f"      🎯 Tokens: {stats['tokens_used']:,} ({stats['tokenizer']}), "
+              f"saved {stats['tokens_saved']:,} vs. {stats['baseline_tokens']:,} unpacked")
         print(f"      📏 Context length: {len(final_context):,} characters")
         
-        return final_context, chunk_ids_used
+        return final_context, chunk_ids_used, stats
     
     def _get_best_embedding_model(self, domain: str = None) -> Any:
         """
@@ -728,17 +933,7 @@ class IntegratedJSONRAG:
         if domain is None:
             domain = self.current_document_domain
         
-        # Map domains to specialized models
-        domain_mapping = {
-            'medical_pharmaceutical': 'medical_pharmaceutical',
-            'legal_contractual': 'legal_contractual', 
-            'scientific_technical': 'scientific_technical',
-            'financial_regulatory': 'legal_contractual',  # Use legal model for regulatory
-            'regulatory_compliance': 'legal_contractual',  # Use legal model for compliance
-            'general': 'general'
-        }
-        
-        model_key = domain_mapping.get(domain, 'general')
+        model_key = DOMAIN_MODEL_MAPPING.get(domain, 'general')
         
         # Lazy load the model if not already loaded
         if self.rag_systems[model_key]['model'] is None:
@@ -758,6 +953,25 @@ class IntegratedJSONRAG:
         
         return self.rag_systems[model_key]['model']
     
+    def _get_embedding_cache(self, domain: str = None):
+        """
+        Get the shared embedding cache for the model that embeds the given domain
+        
+        Args:
+            domain: Document domain (defaults to the current document domain)
+            
+        Returns:
+            EmbeddingCache namespaced by model name (vectors here are always normalized)
+        """
+        return get_embedding_cache(f"{self._get_embedding_model_name(domain)}:normalized")
+    
+    def _get_embedding_model_name(self, domain: str = None) -> str:
+        """Name of the embedding model used for the given domain (defaults to the current domain)"""
+        if self.specialized_models and self.rag_systems:
+            model_key = DOMAIN_MODEL_MAPPING.get(domain or self.current_document_domain, 'general')
+            return self.rag_systems[model_key]['model_name']
+        return self.embedding_model_name
+    
     def _update_document_domain(self, chunk_metadata: List[Dict[str, Any]]) -> str:
         """
         Detect and update the current document domain for specialized model selection
@@ -777,20 +991,18 @@ class IntegratedJSONRAG:
         
         print(f"🎯 Document domain detected: {detected_domain}")
         if self.rag_systems:
-            domain_mapping = {
-                'medical_pharmaceutical': 'medical_pharmaceutical',
-                'legal_contractual': 'legal_contractual', 
-                'scientific_technical': 'scientific_technical',
-                'financial_regulatory': 'legal_contractual',
-                'regulatory_compliance': 'legal_contractual',
-                'general': 'general'
-            }
-            model_key = domain_mapping.get(detected_domain, 'general')
+            model_key = DOMAIN_MODEL_MAPPING.get(detected_domain, 'general')
             model_info = self.rag_systems[model_key]
             print(f"   🎯 Will use: {model_info['model_name']} ({model_info['description']})")
         
         return detected_domain
     
+    def _get_document_domain(self) -> str:
+        """Document domain of the current index, detected once per index version"""
+        if self._domain_cache is None or self._domain_cache[0] != self.index_version:
+            self._domain_cache = (self.index_version, self._detect_document_domain(self.chunk_metadata))
+        return self._domain_cache[1]
+    
     def _detect_document_domain(self, chunk_metadata: List[Dict[str, Any]]) -> str:
         """
         Detect the domain/type of documents being processed for appropriate LLM instructions
@@ -923,8 +1135,8 @@ class IntegratedJSONRAG:
         
         print(f"🌐 Querying LLM with context...")
         
-        # Detect document domain for appropriate instructions
-        document_domain = self._detect_document_domain(self.chunk_metadata)
+        # Detect document domain for appropriate instructions (cached per index version)
+        document_domain = self._get_document_domain()
         domain_instructions = self._get_domain_specific_instructions(document_domain)
         
         # Create enhanced, domain-aware prompt
@@ -1009,8 +1221,8 @@ class IntegratedJSONRAG:
                 "error": "LLM response contained errors"
             }
         
-        # Detect document domain for domain-specific verification
-        document_domain = self._detect_document_domain(self.chunk_metadata)
+        # Document domain for domain-specific verification (cached per index version)
+        document_domain = self._get_document_domain()
         
         verification_results = {
             "verification_status": "verified",
@@ -1034,43 +1246,16 @@ class IntegratedJSONRAG:
             )
             verification_results["confidence_score"] -= 0.2
         
-        # Domain-specific hallucination patterns
-        domain_hallucination_patterns = {
-            'medical_pharmaceutical': [
-                "according to medical knowledge", "it is medically established", "doctors typically recommend",
-                "medical studies show", "it is clinically proven", "standard medical practice"
-            ],
-            'legal_contractual': [
-                "according to legal precedent", "it is legally established", "courts typically rule",
-                "legal experts recommend", "it is legally binding", "standard legal practice"
-            ],
-            'financial_regulatory': [
-                "according to financial analysis", "it is financially sound", "analysts typically recommend",
-                "market studies show", "it is financially proven", "standard accounting practice"
-            ],
-            'scientific_technical': [
-                "according to scientific consensus", "it is scientifically established", "researchers typically find",
-                "studies consistently show", "it is technically proven", "standard scientific practice"
-            ],
-            'regulatory_compliance': [
-                "according to regulatory guidance", "it is regulatory standard", "inspectors typically require",
-                "compliance studies show", "it is regulatorily proven", "standard compliance practice"
-            ],
-            'general': [
-                "according to my knowledge", "based on general information", "it is well known that",
-                "typically", "usually", "it is commonly accepted"
-            ]
-        }
-        
         # Use domain-specific patterns, fall back to general
-        hallucination_indicators = domain_hallucination_patterns.get(
+        hallucination_indicators = DOMAIN_HALLUCINATION_PATTERNS.get(
             document_domain, 
-            domain_hallucination_patterns['general']
+            DOMAIN_HALLUCINATION_PATTERNS['general']
         )
         
-        response_lower = response_text.lower()
+        # All domain phrases are found in one pass over the response
+        phrases_found = get_verification_automaton(document_domain).present(response_text)
         hallucination_flags = [indicator for indicator in hallucination_indicators 
-                             if indicator in response_lower]
+                             if indicator in phrases_found]
         
         if hallucination_flags:
             verification_results["hallucination_detected"] = True
@@ -1079,18 +1264,8 @@ class IntegratedJSONRAG:
             )
             verification_results["confidence_score"] -= 0.3
         
-        # Domain-specific positive verification signals
-        domain_positive_signals = {
-            'medical_pharmaceutical': ["according to the drug label", "the prescribing information states", "as indicated in the clinical data"],
-            'legal_contractual': ["according to the contract", "the agreement states", "as specified in clause"],
-            'financial_regulatory': ["according to the filing", "the financial statement shows", "as reported in the disclosure"],
-            'scientific_technical': ["according to the research", "the study data shows", "as measured in the experiment"],
-            'regulatory_compliance': ["according to the regulation", "the standard requires", "as specified in the guideline"],
-            'general': ["according to the document", "the source states", "as mentioned in the data"]
-        }
-        
-        positive_signals = domain_positive_signals.get(document_domain, domain_positive_signals['general'])
-        positive_found = [signal for signal in positive_signals if signal in response_lower]
+        positive_signals = DOMAIN_POSITIVE_SIGNALS.get(document_domain, DOMAIN_POSITIVE_SIGNALS['general'])
+        positive_found = [signal for signal in positive_signals if signal in phrases_found]
         
         if positive_found:
             verification_results["verification_notes"].append(
@@ -1103,11 +1278,30 @@ class IntegratedJSONRAG:
                 "✅ Response appropriately references source chunks"
             )
         
-        if "information not found" in response_lower or "not in the provided data" in response_lower:
+        if any(signal in phrases_found for signal in NOT_FOUND_SIGNALS):
             verification_results["verification_notes"].append(
                 "✅ Response appropriately indicates when information is not available"
             )
         
+        # Numbers and quotes must occur in the cited chunks (only those are indexed)
+        raw_analysis = llm_response['external_analysis'].get('raw_analysis')
+        claim_check = verify_claims(
+            raw_analysis if isinstance(raw_analysis, str) else response_text,
+            (self.verbatim_chunks.get(chunk_id, '') for chunk_id in chunk_ids_used)
+        )
+        verification_results["claim_verification"] = claim_check
+        if claim_check["unsupported_numbers"]:
+            verification_results["verification_notes"].append(
+                f"⚠️ Numbers not found in cited chunks: {claim_check['unsupported_numbers'][:10]}"
+            )
+            verification_results["confidence_score"] -= 0.1
+        if claim_check["unsupported_quotes"]:
+            verification_results["hallucination_detected"] = True
+            verification_results["verification_notes"].append(
+                f"⚠️ Quotes not found in cited chunks: {claim_check['unsupported_quotes'][:5]}"
+            )
+            verification_results["confidence_score"] -= 0.3
+        
         print(f"   ✅ Verification complete:")
         print(f"      🎯 Status: {verification_results['verification_status']}")
         print(f"      📊 Domain: {document_domain}")
@@ -1119,7 +1313,9 @@ class IntegratedJSONRAG:
     def integrated_query(self, 
                         query: str,
                         top_k_chunks: int = 50,
-                        similarity_threshold: float = 0.3) -> Dict[str, Any]:
+                        similarity_threshold: float = 0.3,
+                        search_mode: str = "semantic",
+                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Complete integrated query pipeline: search → context → LLM → verify
         
@@ -1127,6 +1323,8 @@ class IntegratedJSONRAG:
             query: User query
             top_k_chunks: Number of chunks to consider
             similarity_threshold: Minimum similarity for chunk selection
+            search_mode: "semantic" or "hybrid" (semantic fused with BM25)
+            filters: Facet filters applied before search (see FacetIndex.filter_mask)
             
         Returns:
             Complete query results with verification
@@ -1143,7 +1341,9 @@ class IntegratedJSONRAG:
         relevant_chunks = self.semantic_search(
             query, 
             top_k=top_k_chunks,
-            similarity_threshold=similarity_threshold
+            similarity_threshold=similarity_threshold,
+            search_mode=search_mode,
+            filters=filters
         )
         
         if not relevant_chunks:
@@ -1154,7 +1354,7 @@ class IntegratedJSONRAG:
             }
         
         # Step 2: Prepare context
-        context, chunk_ids_used = self.prepare_context_for_llm(relevant_chunks, query)
+        context, chunk_ids_used, packing_stats = self._pack_context(relevant_chunks, query)
         
         # Step 3: Query LLM
         llm_response = self.query_with_llm(context, query, chunk_ids_used)
@@ -1172,12 +1372,15 @@ class IntegratedJSONRAG:
             "semantic_search": {
                 "chunks_found": len(relevant_chunks),
                 "similarity_threshold": similarity_threshold,
+                "filters": filters,
                 "search_method": relevant_chunks[0]['search_method'] if relevant_chunks else "none"
             },
             "context_preparation": {
                 "chunks_used": len(chunk_ids_used),
                 "chunk_ids": chunk_ids_used,
-                "estimated_tokens": len(context) // 4
+                "estimated_tokens": packing_stats['tokens_used'],
+                "tokens_saved": packing_stats['tokens_saved'],
+                "packing": packing_stats
             },
             "llm_response": llm_response,
             "verification": verification_results,
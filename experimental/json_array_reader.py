@@ -0,0 +1,163 @@
+"""
+JSON Array Reader for CognitiveLattice
+Streams the records of one array inside a large JSON file together with exact byte offsets
+Records are decoded by the C json scanner, and any record boundary can be used to seek and resume
+"""
+
+import codecs
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+_WHITESPACE_RE = re.compile(r'\s*')
+_SEPARATORS_RE = re.compile(r'[\s,]*')
+
+
+def parse_item_path(json_path: str) -> Optional[List[str]]:
+    """
+    Object keys leading to the target array for ijson-style paths
+
+    'item' -> [] (root array), 'results.item' -> ['results'].
+    Returns None for paths this reader cannot follow (wildcards, nested arrays).
+    """
+    parts = json_path.split('.')
+    if parts[-1] != 'item':
+        return None
+    keys = parts[:-1]
+    if any(key in ('', '*', 'item') for key in keys):
+        return None
+    return keys
+
+
+class JSONArrayReader:
+    """
+    Incremental reader for the elements of a single JSON array
+
+    The file is read in blocks and each element is decoded with
+    json.JSONDecoder.raw_decode. Every yielded record comes with the byte offset
+    just past it, which iter_records accepts as start_offset to resume there.
+    """
+
+    def __init__(self, file_path: Union[str, Path], json_path: str = 'item', block_size: int = 8 * 1024 * 1024):
+        """
+        Args:
+            file_path: Path to the JSON file
+            json_path: ijson-style path to the array ('item', 'results.item', ...)
+            block_size: Bytes read per refill
+        """
+        self.keys = parse_item_path(json_path)
+        if self.keys is None:
+            raise ValueError(f"Unsupported JSON path for offset tracking: {json_path}")
+        self.file_path = Path(file_path)
+        self.json_path = json_path
+        self.block_size = block_size
+        self._decoder = json.JSONDecoder()
+
+    def _reset(self, file_handle, byte_offset: int):
+        self._file = file_handle
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._text = ""
+        self._pos = 0
+        self._eof = False
+        # Byte offset of self._text[0], and a cursor for char -> byte conversion
+        self._text_byte_start = byte_offset
+        self._ascii = True
+        self._cursor_char = 0
+        self._cursor_byte = byte_offset
+
+    def _fill(self) -> bool:
+        """Drop consumed text and append the next block; False at end of file"""
+        if self._eof:
+            return False
+        self._text_byte_start = self._byte_offset_at(self._pos)
+        data = self._file.read(self.block_size)
+        if not data:
+            self._eof = True
+        self._text = self._text[self._pos:] + self._utf8.decode(data, final=self._eof)
+        self._pos = 0
+        self._ascii = self._text.isascii()
+        self._cursor_char = 0
+        self._cursor_byte = self._text_byte_start
+        return not self._eof or bool(self._text)
+
+    def _byte_offset_at(self, char_index: int) -> int:
+        """File byte offset of a char index in the current text (cursor moves forward only)"""
+        if self._ascii:
+            return self._text_byte_start + char_index
+        self._cursor_byte += len(self._text[self._cursor_char:char_index].encode('utf-8'))
+        self._cursor_char = char_index
+        return self._cursor_byte
+
+    def _skip(self, pattern) -> None:
+        """Skip characters matched by pattern, refilling at the end of the buffer"""
+        while True:
+            self._pos = pattern.match(self._text, self._pos).end()
+            if self._pos < len(self._text) or not self._fill():
+                return
+
+    def _peek(self) -> str:
+        if self._pos >= len(self._text) and not self._fill():
+            raise ValueError(f"Unexpected end of file in {self.file_path.name}")
+        return self._text[self._pos]
+
+    def _expect(self, char: str) -> None:
+        self._skip(_WHITESPACE_RE)
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at byte {self._byte_offset_at(self._pos)} in {self.file_path.name}")
+        self._pos += 1
+
+    def _decode_value(self) -> Any:
+        """Decode one JSON value at the current position, reading more text if it is cut off"""
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._text, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                self._fill()
+                continue
+            # A number touching the end of the buffer may continue in the next block
+            if end == len(self._text) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def _seek_to_array(self) -> None:
+        """Walk the object keys of the path and stop just inside the target array"""
+        for key in self.keys:
+            self._expect('{')
+            while True:
+                self._skip(_SEPARATORS_RE)
+                if self._peek() == '}':
+                    raise KeyError(f"Key '{key}' not found in {self.file_path.name}")
+                member = self._decode_value()
+                self._expect(':')
+                self._skip(_WHITESPACE_RE)
+                if member == key:
+                    break
+                self._decode_value()  # Skip the value of a non-matching key
+        self._expect('[')
+
+    def iter_records(self, start_offset: Optional[int] = None) -> Iterator[Tuple[Any, int]]:
+        """
+        Yield (record, byte offset just past the record)
+
+        Args:
+            start_offset: Offset previously yielded by this reader, to resume after that record
+        """
+        with open(self.file_path, 'rb') as file_handle:
+            if start_offset is None:
+                self._reset(file_handle, 0)
+                self._seek_to_array()
+            else:
+                file_handle.seek(start_offset)
+                self._reset(file_handle, start_offset)
+
+            while True:
+                self._skip(_SEPARATORS_RE)
+                if self._peek() == ']':
+                    return
+                record = self._decode_value()
+                yield record, self._byte_offset_at(self._pos)
@@ -0,0 +1,285 @@
+"""
+JSON Structure Profiler for CognitiveLattice
+Profiles huge JSON files in bounded time: the file is memory-mapped and records are sampled at
+random byte offsets (resyncing on record boundaries) instead of being parsed from the start
+"""
+
+import json
+import mmap
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from experimental.ndjson_reader import looks_like_ndjson
+
+_decoder = json.JSONDecoder()
+_WHITESPACE_RE = re.compile(r'\s*')
+_SEPARATOR_RE = re.compile(r'\s*,\s*')
+# '{' that follows '[' or ',' may start an element of an array of objects
+_RECORD_START_RE = re.compile(r'[\[,]\s*(\{)')
+
+
+def _byte_length(text: str, start: int, end: int) -> int:
+    return len(text[start:end].encode('utf-8'))
+
+
+class _Window:
+    """Decoded view of a byte range of the memory-mapped file, grown on demand"""
+
+    def __init__(self, mm: mmap.mmap, start: int, size: int, max_size: int):
+        self.mm = mm
+        self.start = start
+        self.size = size
+        self.max_size = max_size
+        self._load()
+
+    def _load(self):
+        self.end = min(len(self.mm), self.start + self.size)
+        self.text = self.mm[self.start:self.end].decode('utf-8', errors='ignore')
+
+    @property
+    def at_eof(self) -> bool:
+        return self.end >= len(self.mm)
+
+    def grow(self) -> bool:
+        """Double the window; False once it reaches max_size or the end of file"""
+        if self.at_eof or self.size >= self.max_size:
+            return False
+        self.size = min(self.size * 2, self.max_size)
+        self._load()
+        return True
+
+    def decode(self, pos: int) -> Tuple[Optional[Any], int]:
+        """Decode the value at pos, growing the window while the value is cut off"""
+        while True:
+            try:
+                return _decoder.raw_decode(self.text, pos)
+            except json.JSONDecodeError as e:
+                # Invalid JSON fails inside the window; only a value cut off by the
+                # window's end (or an unterminated string) is worth reading further
+                truncated = e.pos >= len(self.text) - 1 or e.msg.startswith('Unterminated string')
+                if not truncated or not self.grow():
+                    return None, pos
+
+
+def _locate_records(mm: mmap.mmap, head_bytes: int, max_window: int) -> Tuple[str, Optional[str], Optional[int]]:
+    """
+    Find the array holding the records
+
+    Returns:
+        (root structure, ijson-style path such as 'item' or 'results.item', byte offset of the array's '[')
+    """
+    window = _Window(mm, 0, head_bytes, max_window)
+    pos = _WHITESPACE_RE.match(window.text, 0).end()
+    if pos >= len(window.text):
+        return 'unknown', None, None
+
+    if window.text[pos] == '[':
+        return 'array', 'item', _byte_length(window.text, 0, pos)
+    if window.text[pos] != '{':
+        return 'unknown', None, None
+
+    # Walk the root object's members; small values are skipped, the first array of objects wins
+    pos = _WHITESPACE_RE.match(window.text, pos + 1).end()
+    while True:
+        key, pos = window.decode(pos)
+        if not isinstance(key, str):
+            return 'object', None, None
+        pos = _WHITESPACE_RE.match(window.text, pos).end()
+        if window.text[pos:pos + 1] != ':':
+            return 'object', None, None
+        pos = _WHITESPACE_RE.match(window.text, pos + 1).end()
+        if window.text[pos:pos + 1] == '[':
+            element = _WHITESPACE_RE.match(window.text, pos + 1).end()
+            if window.text[element:element + 1] in ('{', ''):
+                return 'object', f"{key}.item", _byte_length(window.text, 0, pos)
+        value, end = window.decode(pos)
+        separator = _SEPARATOR_RE.match(window.text, end)
+        if value is None or separator is None:
+            return 'object', None, None
+        pos = separator.end()
+
+
+def _read_records(window: _Window, pos: int, count: int) -> List[Tuple[Dict[str, Any], int]]:
+    """Decode up to count consecutive array elements from pos; (record, byte span incl. separator)"""
+    records = []
+    while len(records) < count and window.text[pos:pos + 1] == '{':
+        record, end = window.decode(pos)
+        if not isinstance(record, dict):
+            break
+        separator = _SEPARATOR_RE.match(window.text, end)
+        next_pos = separator.end() if separator else end
+        records.append((record, _byte_length(window.text, pos, next_pos)))
+        if separator is None:  # No comma: end of the array
+            break
+        pos = next_pos
+    return records
+
+
+def _resync(window: _Window, reference_keys: set) -> Optional[int]:
+    """
+    Position of the first record boundary in the window
+
+    A candidate '{' must decode to an object that shares at least half of its
+    keys with records read at the start of the array, which rejects objects
+    nested inside records and text that merely looks like JSON.
+    """
+    for match in _RECORD_START_RE.finditer(window.text):
+        pos = match.start(1)
+        record, _ = window.decode(pos)
+        if not isinstance(record, dict) or not record:
+            continue
+        if not reference_keys or len(reference_keys & record.keys()) * 2 >= len(record.keys()):
+            return pos
+    return None
+
+
+def _profile_ndjson(mm: mmap.mmap, offsets: List[int], records_per_sample: int,
+                    window_bytes: int) -> Tuple[List[Dict[str, Any]], List[int], List[Tuple[int, int]]]:
+    """Sample NDJSON records: resync is simply the next newline"""
+    records, spans, newline_density = [], [], []
+    for offset in offsets:
+        start = 0 if offset == 0 else mm.find(b'\n', offset) + 1
+        if start <= 0 and offset:
+            continue
+        end = min(len(mm), start + window_bytes)
+        chunk = mm[start:end]
+        newline_density.append((chunk.count(b'\n'), len(chunk)))
+        lines = chunk.split(b'\n')
+        if end < len(mm):
+            lines = lines[:-1]  # Possibly cut off
+        taken = 0
+        for line in lines:
+            if taken == records_per_sample:
+                break
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records.append(record)
+            spans.append(len(line) + 1)
+            taken += 1
+    return records, spans, newline_density
+
+
+def profile_json_file(file_path: Union[str, Path],
+                      samples: int = 16,
+                      records_per_sample: int = 4,
+                      window_bytes: int = 256 * 1024,
+                      max_window_bytes: int = 32 * 1024 * 1024,
+                      seed: int = 0) -> Dict[str, Any]:
+    """
+    Profile a JSON, JSON-array or NDJSON file by sampling records across it
+
+    Work is bounded by samples x window size, independent of the file size.
+
+    Args:
+        file_path: File to profile
+        samples: Number of stratified random byte offsets to sample
+        records_per_sample: Consecutive records decoded at each offset
+        window_bytes: Bytes read around each offset
+        max_window_bytes: Largest window a single oversized record may grow to
+        seed: Seed for the sampled offsets
+
+    Returns:
+        Root structure, record path, field frequencies and types, record size and
+        count estimates, and the sampled records
+    """
+    started = time.perf_counter()
+    file_path = Path(file_path)
+    file_size = file_path.stat().st_size
+    profile = {
+        'file_path': str(file_path),
+        'file_size_bytes': file_size,
+        'root_structure': 'unknown',
+        'json_path': None,
+        'records_sampled': 0,
+        'avg_record_bytes': 0.0,
+        'estimated_records': 0,
+        'estimated_lines': 0,
+        'fields': {},
+        'sample_records': [],
+        'profile_seconds': 0.0
+    }
+    if file_size == 0:
+        return profile
+
+    rng = random.Random(seed)
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if looks_like_ndjson(file_path):
+            profile['root_structure'], profile['json_path'] = 'ndjson', 'ndjson'
+            region_start, region_end = 0, file_size
+            windows = min(samples, -(-file_size // window_bytes))
+            per_window = records_per_sample if windows > 1 else samples * records_per_sample
+            offsets = [0] + [int((i + rng.random()) * file_size / windows) for i in range(1, windows)]
+            records, spans, density = _profile_ndjson(mm, offsets, per_window, window_bytes)
+            exact_count = len(records) if windows == 1 and len(records) < per_window else None
+        else:
+            root, json_path, array_start = _locate_records(mm, window_bytes, max_window_bytes)
+            profile['root_structure'], profile['json_path'] = root, json_path
+            if array_start is None:
+                profile['profile_seconds'] = time.perf_counter() - started
+                return profile
+
+            # The records end at the last ']' (only whitespace or the root's '}' follow)
+            tail_start = max(array_start, file_size - 4096)
+            region_start, region_end = array_start + 1, max(array_start + 1, mm.rfind(b']', tail_start))
+            span = region_end - region_start
+
+            # Small files are read from the start in one window instead of overlapping samples
+            windows = min(samples, -(-span // window_bytes))
+            per_window = records_per_sample if windows > 1 else samples * records_per_sample
+
+            records, spans, density = [], [], []
+            reference_keys: set = set()
+            for i in range(windows):
+                offset = region_start if i == 0 else region_start + int((i + rng.random()) * span / windows)
+                window = _Window(mm, offset, window_bytes, max_window_bytes)
+                density.append((window.text.count('\n'), window.end - window.start))
+                if i == 0:
+                    pos = _WHITESPACE_RE.match(window.text, 0).end()
+                else:
+                    pos = _resync(window, reference_keys)
+                    if pos is None:
+                        continue
+                sampled = _read_records(window, pos, per_window)
+                if i == 0:
+                    for record, _ in sampled:
+                        reference_keys.update(record.keys())
+                for record, record_bytes in sampled:
+                    records.append(record)
+                    spans.append(record_bytes)
+
+            # A single window that ran out of records has read the whole array
+            exact_count = len(records) if windows == 1 and len(records) < per_window else None
+
+    profile['records_sampled'] = len(records)
+    profile['sample_records'] = records
+    if spans:
+        profile['avg_record_bytes'] = sum(spans) / len(spans)
+        profile['estimated_records'] = exact_count if exact_count is not None else int(
+            (region_end - region_start) / profile['avg_record_bytes']
+        )
+    newlines = sum(count for count, _ in density)
+    sampled_bytes = sum(size for _, size in density)
+    if sampled_bytes:
+        profile['estimated_lines'] = int(newlines / sampled_bytes * file_size)
+
+    field_counts: Dict[str, int] = {}
+    field_types: Dict[str, set] = {}
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        for key, value in record.items():
+            field_counts[key] = field_counts.get(key, 0) + 1
+            field_types.setdefault(key, set()).add(type(value).__name__)
+    profile['fields'] = {
+        key: {'frequency': count / len(records), 'types': sorted(field_types[key])}
+        for key, count in sorted(field_counts.items(), key=lambda item: -item[1])
+    }
+    profile['profile_seconds'] = time.perf_counter() - started
+    return profile
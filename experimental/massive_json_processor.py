@@ -25,15 +25,29 @@ Date: July 2025
 Purpose: Handle FDA-scale JSON datasets and similar massive structured data
 """
 
+import functools
+import itertools
 import json
 import ijson
+import multiprocessing
 import os
+import queue
 import sys
-from typing import Dict, List, Any, Iterator, Optional, Union
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Any, Iterator, Optional, Union
 from pathlib import Path
 import time
 from datetime import datetime
 
+from experimental.json_array_reader import JSONArrayReader, parse_item_path
+from experimental.ndjson_reader import NDJSONReader, worker_pool_context
+from experimental.json_structure_profiler import profile_json_file
+from experimental.chunk_dedup import NearDuplicateDetector
+
+# Queue sentinel marking the end of a pipeline stage's output
+_PIPELINE_END = object()
+
 # CognitiveLattice core imports
 try:
     from CognitiveLattice_advanced_rag import CognitiveLatticeAdvancedRAG
@@ -61,7 +75,14 @@ class MassiveJSONProcessor:
                  CognitiveLattice_rag: Optional['CognitiveLatticeAdvancedRAG'] = None,
                  chunk_size: int = 1000,
                  enable_progress_saving: bool = True,
-                 temp_dir: str = "massive_json_temp"):
+                 temp_dir: str = "massive_json_temp",
+                 extraction_workers: int = 4,
+                 embed_batch_size: int = 256,
+                 queue_depth: int = 4,
+                 shard_workers: int = 1,
+                 parse_workers: Optional[int] = None,
+                 deduplicate: bool = False,
+                 dedup_threshold: float = 0.8):
         """
         Initialize the massive JSON processor
         
@@ -70,10 +91,28 @@ class MassiveJSONProcessor:
             chunk_size: Number of JSON records to process in each batch
             enable_progress_saving: Save progress periodically for recovery
             temp_dir: Directory for temporary files and progress tracking
+            extraction_workers: Processes converting parsed records into chunks (1 extracts in-process)
+            embed_batch_size: Chunks handed to the embedding stage at once
+            queue_depth: Parsed batches buffered between stages (bounds memory)
+            shard_workers: Processes used by process_multiple_files (one file per process)
+            parse_workers: Processes parsing NDJSON byte ranges and extracting their chunks
+                (defaults to the CPU count)
+            deduplicate: Embed one representative per cluster of near-duplicate chunks
+                (chunks only fold when all their numbers and units match; duplicates
+                reach the chunk sink with duplicate_of set)
+            dedup_threshold: Estimated Jaccard similarity at which chunks count as duplicates
         """
         self.CognitiveLattice_rag = CognitiveLattice_rag
         self.chunk_size = chunk_size
         self.enable_progress_saving = enable_progress_saving
+        self.extraction_workers = max(1, extraction_workers)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.queue_depth = max(1, queue_depth)
+        self.shard_workers = max(1, shard_workers)
+        self.parse_workers = parse_workers
+        self.deduplicator = NearDuplicateDetector(threshold=dedup_threshold) if deduplicate else None
+        self.chunk_id_prefix = ""  # Set per shard so ids stay unique across parallel files
+        self._delivered_log_rows = {}  # chunk log path -> logged chunks this instance already embedded
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
         
@@ -101,6 +140,13 @@ class MassiveJSONProcessor:
         print("   → This bypass is for demonstration of massive-scale JSON processing")
         print()
     
+    def __getstate__(self):
+        """Drop the RAG system when shipped to shard worker processes (embedding stays in the parent)"""
+        state = self.__dict__.copy()
+        state['CognitiveLattice_rag'] = None
+        state['deduplicator'] = None  # Deduplication runs in the parent's embedding stage
+        return state
+    
     def load_progress(self):
         """Load previous processing progress if available"""
         if self.progress_file.exists():
@@ -148,53 +194,31 @@ class MassiveJSONProcessor:
             'sample_keys': set(),
             'nested_levels': 0,
             'recommended_chunk_size': self.chunk_size,
-            'parsing_strategy': 'items'
+            'parsing_strategy': 'fallback'
         }
         
         try:
-            with open(file_path, 'rb') as file:
-                # Try to detect if it's an array of objects or object with array property
-                file_start = file.read(1024).decode('utf-8', errors='ignore')
-                
-                if file_start.strip().startswith('['):
-                    structure_info['root_structure'] = 'array'
-                    structure_info['parsing_strategy'] = 'item'
-                elif file_start.strip().startswith('{'):
-                    structure_info['root_structure'] = 'object'
-                    structure_info['parsing_strategy'] = 'items'  # Will need to adjust based on actual structure
-                
-                # Sample some records to understand structure
-                file.seek(0)
-                try:
-                    if structure_info['root_structure'] == 'array':
-                        parser = ijson.items(file, 'item')
-                    else:
-                        # For objects, we'll need to detect the array property
-                        # This is a simplified approach - may need adjustment for specific APIs
-                        parser = ijson.items(file, '*.item')
-                    
-                    sample_count = 0
-                    for record in parser:
-                        if isinstance(record, dict):
-                            structure_info['sample_keys'].update(record.keys())
-                            # Estimate nesting level
-                            max_depth = self._calculate_dict_depth(record)
-                            structure_info['nested_levels'] = max(structure_info['nested_levels'], max_depth)
-                        
-                        sample_count += 1
-                        if sample_count >= sample_size:
-                            break
-                    
-                    structure_info['estimated_records'] = sample_count * (structure_info['file_size_mb'] / 10)  # Rough estimate
-                    
-                except Exception as parsing_error:
-                    print(f"⚠️ Could not parse sample records: {parsing_error}")
-                    structure_info['parsing_strategy'] = 'fallback'
-        
+            # Records are sampled across the whole file, so this is bounded time for any file size
+            profile = profile_json_file(file_path, samples=max(1, sample_size // 4), records_per_sample=4)
         except Exception as e:
             print(f"❌ Error analyzing file structure: {e}")
+            structure_info['parsing_strategy'] = 'fallback'
+            structure_info['sample_keys'] = list(structure_info['sample_keys'])
             return structure_info
         
+        structure_info['root_structure'] = profile['root_structure']
+        # ijson path of the records ('item', 'results.item') or 'ndjson' for the parallel fast path
+        structure_info['parsing_strategy'] = profile['json_path'] or 'fallback'
+        structure_info['estimated_records'] = profile['estimated_records']
+        structure_info['avg_record_bytes'] = profile['avg_record_bytes']
+        structure_info['fields'] = profile['fields']
+        for record in profile['sample_records']:
+            if isinstance(record, dict):
+                structure_info['sample_keys'].update(record.keys())
+                structure_info['nested_levels'] = max(
+                    structure_info['nested_levels'], self._calculate_dict_depth(record)
+                )
+        
         # Convert set to list for JSON serialization
         structure_info['sample_keys'] = list(structure_info['sample_keys'])
         
@@ -205,6 +229,7 @@ class MassiveJSONProcessor:
         print(f"   🔑 Sample keys: {', '.join(list(structure_info['sample_keys'])[:10])}")
         print(f"   📐 Max nesting depth: {structure_info['nested_levels']}")
         print(f"   ⚙️ Parsing strategy: {structure_info['parsing_strategy']}")
+        print(f"   ⏱️ Profiled {profile['records_sampled']} sampled records in {profile['profile_seconds']:.2f}s")
         print()
         
         return structure_info
@@ -239,41 +264,80 @@ class MassiveJSONProcessor:
         Yields:
             Lists of JSON records (chunks)
         """
+        for chunk, _ in self._stream_record_batches(file_path, json_path, progress_callback):
+            yield chunk
+    
+    def _iter_records(self, file_path: Path,
+                      json_path: str,
+                      start_offset: Optional[int] = None,
+                      start_record: int = 0) -> Iterator[Any]:
+        """
+        Yield (record, byte offset just past the record)
+        
+        'ndjson' uses the parallel NDJSONReader. Plain key paths ('item',
+        'results.item') are read with JSONArrayReader. Both can seek straight to
+        start_offset. Other paths go through ijson, have no offsets (None) and
+        resume by skipping start_record records.
+        """
+        if json_path == 'ndjson':
+            yield from NDJSONReader(file_path, workers=self.parse_workers).iter_records(start_offset)
+            return
+        
+        if parse_item_path(json_path) is not None:
+            yield from JSONArrayReader(file_path, json_path).iter_records(start_offset)
+            return
+        
+        with open(file_path, 'rb') as file:
+            for record in itertools.islice(ijson.items(file, json_path), start_record, None):
+                yield record, None
+    
+    def _stream_record_batches(self, file_path: Union[str, Path],
+                               json_path: str = 'item',
+                               progress_callback: Optional[callable] = None,
+                               start_offset: Optional[int] = None,
+                               start_record: int = 0) -> Iterator[Any]:
+        """
+        Stream record batches together with the input position after each batch
+        
+        Yields:
+            (records, {'byte_offset': offset or None, 'record_index': records consumed from the array start})
+        """
         file_path = Path(file_path)
         print(f"🌊 Starting streaming parse: {file_path.name}")
         print(f"   📍 JSON path: {json_path}")
         print(f"   📦 Chunk size: {self.chunk_size:,} records")
+        if start_record:
+            print(f"   ⏩ Resuming after record {start_record:,}"
+                  + (f" (byte {start_offset:,})" if start_offset is not None else ""))
         
         chunk = []
         record_count = 0
+        byte_offset = start_offset
         start_time = time.time()
         
         try:
-            with open(file_path, 'rb') as file:
-                parser = ijson.items(file, json_path)
+            for record, byte_offset in self._iter_records(file_path, json_path, start_offset, start_record):
+                chunk.append(record)
+                record_count += 1
                 
-                for record in parser:
-                    chunk.append(record)
-                    record_count += 1
+                # Yield chunk when it reaches target size
+                if len(chunk) >= self.chunk_size:
+                    elapsed = time.time() - start_time
+                    rate = record_count / elapsed if elapsed > 0 else 0
                     
-                    # Yield chunk when it reaches target size
-                    if len(chunk) >= self.chunk_size:
-                        elapsed = time.time() - start_time
-                        rate = record_count / elapsed if elapsed > 0 else 0
-                        
-                        print(f"   📊 Processed {record_count:,} records ({rate:.1f} records/sec)")
-                        
-                        if progress_callback:
-                            progress_callback(record_count, len(chunk))
-                        
-                        yield chunk
-                        chunk = []
-                
-                # Yield final chunk if it has records
-                if chunk:
-                    print(f"   📦 Final chunk: {len(chunk)} records")
-                    yield chunk
+                    print(f"   📊 Processed {record_count:,} records ({rate:.1f} records/sec)")
                     
+                    if progress_callback:
+                        progress_callback(record_count, len(chunk))
+                    
+                    yield chunk, {'byte_offset': byte_offset, 'record_index': start_record + record_count}
+                    chunk = []
+            
+            # Yield final chunk if it has records
+            if chunk:
+                print(f"   📦 Final chunk: {len(chunk)} records")
+                yield chunk, {'byte_offset': byte_offset, 'record_index': start_record + record_count}
+                
         except Exception as e:
             error_msg = f"Error streaming {file_path}: {e}"
             print(f"❌ {error_msg}")
@@ -288,14 +352,115 @@ class MassiveJSONProcessor:
         rate = record_count / total_time if total_time > 0 else 0
         print(f"✅ Streaming complete: {record_count:,} records in {total_time:.1f}s ({rate:.1f} records/sec)")
     
+    def _checkpoint_path(self, file_path: Path) -> Path:
+        """Checkpoint file for one input file"""
+        return self.temp_dir / f"{file_path.stem}.checkpoint.json"
+    
+    def load_checkpoint(self, file_path: Union[str, Path], json_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the last committed position for a file, if it matches the file on disk
+        
+        Returns:
+            Checkpoint dict, or None when there is nothing valid to resume
+        """
+        file_path = Path(file_path)
+        checkpoint_path = self._checkpoint_path(file_path)
+        if not checkpoint_path.exists():
+            return None
+        
+        try:
+            with open(checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not load checkpoint {checkpoint_path.name}: {e}")
+            return None
+        
+        stat = file_path.stat()
+        if (checkpoint.get('json_path') != json_path
+                or checkpoint.get('file_size') != stat.st_size
+                or checkpoint.get('file_mtime') != int(stat.st_mtime)):
+            print(f"♻️ Ignoring stale checkpoint for {file_path.name}")
+            return None
+        
+        # Committed chunks are only recoverable from the chunk log
+        log_bytes = checkpoint.get('index_state', {}).get('chunk_log_bytes')
+        log_path = self._chunk_log_path(file_path)
+        if log_bytes is None or not log_path.exists() or log_path.stat().st_size < log_bytes:
+            print(f"♻️ Ignoring checkpoint for {file_path.name}: its chunk log is missing or short")
+            return None
+        
+        return checkpoint
+    
+    def save_checkpoint(self, file_path: Path, checkpoint: Dict[str, Any]):
+        """Atomically write the committed position for a file"""
+        checkpoint_path = self._checkpoint_path(file_path)
+        try:
+            with open(checkpoint_path.with_suffix('.tmp'), 'w') as f:
+                json.dump(checkpoint, f, indent=2, default=str)
+            os.replace(checkpoint_path.with_suffix('.tmp'), checkpoint_path)
+        except Exception as e:
+            print(f"⚠️ Could not save checkpoint: {e}")
+    
+    def clear_checkpoint(self, file_path: Union[str, Path]):
+        """Remove the checkpoint and chunk log once a file has been fully processed"""
+        checkpoint_path = self._checkpoint_path(Path(file_path))
+        if checkpoint_path.exists():
+            checkpoint_path.unlink()
+        log_path = self._chunk_log_path(Path(file_path))
+        self._delivered_log_rows.pop(str(log_path), None)
+        if log_path.exists():
+            log_path.unlink()
+    
+    def _chunk_log_path(self, file_path: Path) -> Path:
+        """Durable log of the chunks embedded from one input file"""
+        return self.temp_dir / f"{file_path.stem}.chunks.jsonl"
+    
+    def _replay_chunk_log(self, file_path: Path,
+                          log_bytes: int,
+                          structure_info: Optional[Dict[str, Any]],
+                          chunk_sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> int:
+        """
+        Cut the chunk log back to its committed length and re-embed what this instance lacks
+        
+        The RAG system and deduplicator live in memory, so after a restart they hold
+        none of the committed chunks; replaying the log through the embedding stage
+        rebuilds both (and feeds the sink) before new records are processed.
+        
+        Returns:
+            Chunks in the committed log
+        """
+        log_path = self._chunk_log_path(file_path)
+        delivered = self._delivered_log_rows.get(str(log_path), 0)
+        rows = 0
+        batch = []
+        with open(log_path, 'r+b') as log:
+            log.truncate(log_bytes)
+            log.seek(0)
+            for line in log:
+                rows += 1
+                if rows <= delivered:
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) >= self.embed_batch_size:
+                    self._embed_chunks(batch, file_path, 0, structure_info, chunk_sink)
+                    batch = []
+        if batch:
+            self._embed_chunks(batch, file_path, 0, structure_info, chunk_sink)
+        if rows > delivered:
+            print(f"♻️ Replayed {rows - delivered:,} committed chunks from {log_path.name}")
+        self._delivered_log_rows[str(log_path)] = rows
+        return rows
+    
     def extract_meaningful_chunks(self, json_records: List[Dict[str, Any]], 
-                                 extraction_config: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+                                 extraction_config: Optional[Dict[str, Any]] = None,
+                                 record_offset: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Convert raw JSON records into meaningful text chunks for CognitiveLattice processing
         
         Args:
             json_records: List of JSON record dictionaries
             extraction_config: Configuration for field extraction and text generation
+            record_offset: Records preceding this batch, used for chunk ids (defaults to records processed so far)
             
         Returns:
             List of structured chunks suitable for CognitiveLattice RAG processing
@@ -310,6 +475,9 @@ class MassiveJSONProcessor:
                 'include_structure_info': True  # Include info about JSON structure
             }
         
+        if record_offset is None:
+            record_offset = self.stats['total_records_processed']
+        
         meaningful_chunks = []
         
         for i, record in enumerate(json_records):
@@ -317,10 +485,14 @@ class MassiveJSONProcessor:
                 chunk_text_parts = []
                 metadata = {}
                 
-                # Extract primary text content
+                # Extract primary text content (lists of strings too, when configured)
                 for field in extraction_config['primary_text_fields']:
-                    if field in record and isinstance(record[field], str):
-                        chunk_text_parts.append(f"{field.title()}: {record[field]}")
+                    value = record.get(field)
+                    if (extraction_config.get('join_list_fields', False) and isinstance(value, list)
+                            and value and all(isinstance(item, str) for item in value)):
+                        value = ' '.join(value)
+                    if isinstance(value, str):
+                        chunk_text_parts.append(f"{field.title()}: {value}")
                 
                 # Extract metadata
                 for field in extraction_config['metadata_fields']:
@@ -344,7 +516,7 @@ class MassiveJSONProcessor:
                 
                 # Create CognitiveLattice-compatible chunk
                 chunk_data = {
-                    "chunk_id": f"json_record_{self.stats['total_records_processed'] + i + 1}",
+                    "chunk_id": self._record_chunk_id(record_offset + i + 1),
                     "content": full_text,
                     "source_type": "structured_json",
                     "original_record_index": i,
@@ -377,18 +549,65 @@ class MassiveJSONProcessor:
         print(f"🔧 Extracted {len(meaningful_chunks)} meaningful chunks from {len(json_records)} JSON records")
         return meaningful_chunks
     
+    def _record_chunk_id(self, record_number: int) -> str:
+        """Chunk id of the record_number-th record (1-based, counted across files)"""
+        return f"{self.chunk_id_prefix}json_record_{record_number}"
+    
+    def _stream_extracted_ndjson_batches(self, file_path: Path,
+                                         extraction_config: Optional[Dict[str, Any]],
+                                         start_offset: Optional[int],
+                                         start_record: int,
+                                         record_offset: int) -> Iterator[Any]:
+        """
+        Stream chunk batches extracted inside the NDJSON parser processes
+        
+        Only chunks cross the process boundary, never the raw records. Workers do
+        not know how many records precede their byte range, so they number records
+        from zero and chunk ids are rewritten here in file order.
+        
+        Yields:
+            ((chunks, extraction seconds), records in the batch, position after the batch)
+        """
+        print(f"🌊 Starting streaming parse with in-worker extraction: {file_path.name}")
+        print(f"   📦 Chunk size: {self.chunk_size:,} records")
+        if start_offset is not None:
+            print(f"   ⏩ Resuming after record {start_record:,} (byte {start_offset:,})")
+        
+        reader = NDJSONReader(file_path, workers=self.parse_workers)
+        transform = functools.partial(
+            _extract_timed, self.extract_meaningful_chunks, extraction_config=extraction_config, record_offset=0
+        )
+        record_index = start_record
+        for (chunks, seconds), record_count, byte_offset in reader.iter_batches(
+                self.chunk_size, start_offset=start_offset, transform=transform):
+            for chunk in chunks:
+                chunk['chunk_id'] = self._record_chunk_id(record_offset + chunk['original_record_index'] + 1)
+            record_offset += record_count
+            record_index += record_count
+            yield (chunks, seconds), record_count, {'byte_offset': byte_offset, 'record_index': record_index}
+    
     def process_single_file(self, file_path: Union[str, Path], 
                            json_path: str = 'item',
                            extraction_config: Optional[Dict[str, Any]] = None,
-                           save_intermediate: bool = True) -> Dict[str, Any]:
+                           save_intermediate: bool = True,
+                           chunk_sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                           resume: bool = True) -> Dict[str, Any]:
         """
         Process a single massive JSON file through the complete pipeline
         
+        Parsing, chunk extraction and embedding run as concurrent stages, so the
+        parser keeps reading while earlier batches are extracted and embedded.
+        With progress saving enabled, embedded chunks are appended to a durable
+        chunk log and every batch whose chunks are all logged is checkpointed; a
+        later call replays the log into the RAG system and resumes after it.
+        
         Args:
             file_path: Path to the JSON file
             json_path: JSONPath for parsing
             extraction_config: Configuration for chunk extraction
             save_intermediate: Save intermediate results for recovery
+            chunk_sink: Optional callback receiving each embedding-sized batch of chunks
+            resume: Continue from this file's checkpoint if one exists
             
         Returns:
             Processing results and statistics
@@ -404,69 +623,28 @@ class MassiveJSONProcessor:
         # Analyze file structure
         structure_info = self.detect_json_structure(file_path)
         
-        # Adjust JSON path based on structure analysis
-        if json_path == 'item' and structure_info['parsing_strategy'] != 'item':
+        # Adjust JSON path based on structure analysis (NDJSON always takes the fast path)
+        if structure_info['parsing_strategy'] == 'ndjson' and json_path != 'ndjson':
+            json_path = 'ndjson'
+            print(f"🔄 Adjusted JSON path to: {json_path}")
+        elif json_path == 'item' and structure_info['parsing_strategy'] not in ('item', 'fallback'):
             json_path = structure_info['parsing_strategy']
             print(f"🔄 Adjusted JSON path to: {json_path}")
         
-        total_chunks_processed = 0
-        batch_count = 0
+        checkpoint = None
+        if resume and self.enable_progress_saving:
+            checkpoint = self.load_checkpoint(file_path, json_path)
+            if checkpoint:
+                print(f"📍 Resuming {file_path.name} from checkpoint: "
+                      f"{checkpoint['record_index']:,} records, batch {checkpoint['batch_number']}")
         
         try:
-            # Stream process the file
-            for json_chunk in self.stream_json_chunks(file_path, json_path):
-                batch_count += 1
-                print(f"\n📦 Processing batch {batch_count}...")
-                
-                # Extract meaningful chunks
-                meaningful_chunks = self.extract_meaningful_chunks(json_chunk, extraction_config)
-                
-                if not meaningful_chunks:
-                    print("⚠️ No meaningful chunks extracted from this batch")
-                    continue
-                
-                # Process through CognitiveLattice RAG if available
-                if self.CognitiveLattice_rag and CognitiveLattice_AVAILABLE:
-                    try:
-                        doc_info = {
-                            "source": str(file_path),
-                            "type": "massive_json_dataset",
-                            "batch_number": batch_count,
-                            "structure_info": structure_info,
-                            "processing_method": "streaming_bypass",
-                            "encryption_bypassed": True
-                        }
-                        
-                        self.CognitiveLattice_rag.process_document_chunks(meaningful_chunks, doc_info)
-                        print(f"   ✅ Added {len(meaningful_chunks)} chunks to CognitiveLattice RAG")
-                        
-                    except Exception as e:
-                        print(f"   ⚠️ CognitiveLattice RAG processing error: {e}")
-                        # Continue processing even if RAG fails
-                
-                # Save intermediate results
-                if save_intermediate and batch_count % 10 == 0:  # Save every 10 batches
-                    intermediate_file = self.temp_dir / f"{file_path.stem}_batch_{batch_count}.json"
-                    try:
-                        with open(intermediate_file, 'w') as f:
-                            json.dump({
-                                'batch_number': batch_count,
-                                'chunks_processed': len(meaningful_chunks),
-                                'timestamp': datetime.now().isoformat(),
-                                'file_source': str(file_path)
-                            }, f, indent=2)
-                        print(f"   💾 Saved intermediate results to {intermediate_file.name}")
-                    except Exception as e:
-                        print(f"   ⚠️ Could not save intermediate results: {e}")
-                
-                total_chunks_processed += len(meaningful_chunks)
-                self.stats['total_records_processed'] += len(json_chunk)
-                self.stats['total_chunks_created'] += len(meaningful_chunks)
-                
-                # Save progress periodically
-                if batch_count % 5 == 0:
-                    self.save_progress()
-        
+            # Parse, extract and embed concurrently through bounded queues
+            pipeline_results = self._run_ingestion_pipeline(
+                file_path, json_path, extraction_config, structure_info,
+                save_intermediate=save_intermediate, chunk_sink=chunk_sink,
+                checkpoint=checkpoint
+            )
         except Exception as e:
             error_msg = f"Critical error processing {file_path}: {e}"
             print(f"❌ {error_msg}")
@@ -477,8 +655,13 @@ class MassiveJSONProcessor:
             })
             raise
         
+        batch_count = pipeline_results['batches_processed']
+        total_chunks_processed = pipeline_results['total_chunks_created']
+        
         # Update statistics
         self.stats['total_files_processed'] += 1
+        self.save_progress()
+        self.clear_checkpoint(file_path)
         
         # Final results
         results = {
@@ -486,6 +669,10 @@ class MassiveJSONProcessor:
             'batches_processed': batch_count,
             'total_chunks_created': total_chunks_processed,
             'structure_analysis': structure_info,
+            'stage_throughput': pipeline_results['stage_throughput'],
+            'records_per_second': pipeline_results['records_per_second'],
+            'resumed_from_record': checkpoint['record_index'] if checkpoint else 0,
+            'deduplication': self.deduplicator.get_stats() if self.deduplicator else None,
             'processing_time': datetime.now().isoformat(),
             'errors': len([e for e in self.stats['errors'] if e.get('file') == str(file_path)])
         }
@@ -493,29 +680,491 @@ class MassiveJSONProcessor:
         print(f"\n✅ File processing complete!")
         print(f"   📊 Batches processed: {batch_count}")
         print(f"   🧩 Total chunks created: {total_chunks_processed:,}")
+        print(f"   🚀 End-to-end: {results['records_per_second']:.1f} records/sec")
+        for stage, stage_stats in results['stage_throughput'].items():
+            print(f"      {stage:<8} {stage_stats['records_per_sec']:10.1f} records/sec "
+                  f"({stage_stats['busy_seconds']:.1f}s busy)")
+        if self.deduplicator:
+            dedup_stats = results['deduplication']
+            print(f"   🧬 Deduplication: {dedup_stats['representatives']:,} embedded, "
+                  f"{dedup_stats['exact_duplicates'] + dedup_stats['near_duplicates']:,} duplicates folded "
+                  f"({dedup_stats['duplication_rate']:.1%})")
         print(f"   ⚠️ Errors encountered: {results['errors']}")
         
         return results
     
+    def _run_ingestion_pipeline(self, file_path: Path,
+                                json_path: str,
+                                extraction_config: Optional[Dict[str, Any]],
+                                structure_info: Dict[str, Any],
+                                save_intermediate: bool = True,
+                                chunk_sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                                checkpoint: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run parse -> extract -> embed as a bounded-queue pipeline
+        
+        A parser thread streams record batches, a process pool extracts chunks
+        (extraction is CPU-bound, so threads would serialize on the GIL), and
+        the calling thread feeds the embedding stage in order, regrouping
+        chunks into embed_batch_size batches across parse batches. Full queues
+        block the upstream stage, so at most queue_depth batches are in flight.
+        NDJSON read by several parser processes is extracted inside them instead.
+        
+        A batch is committed once all of its chunks have been embedded and fsynced
+        to the chunk log: stats are updated and a checkpoint records the input
+        position after that batch together with the log length. A batch the RAG
+        system rejects raises, so it is never counted or checkpointed.
+        
+        Returns:
+            Batch/chunk counts plus per-stage and end-to-end records/sec
+        """
+        parse_queue = queue.Queue(maxsize=self.queue_depth)
+        extract_queue = queue.Queue(maxsize=max(self.queue_depth, self.extraction_workers))
+        stop_event = threading.Event()
+        failures = []
+        stats_lock = threading.Lock()
+        stage_stats = {
+            stage: {'records': 0, 'busy_seconds': 0.0, 'first_start': None, 'last_end': None}
+            for stage in ('parse', 'extract', 'embed')
+        }
+        if checkpoint:
+            base_offset = checkpoint['record_offset_base']
+            start_offset = checkpoint['byte_offset']
+            start_record = checkpoint['record_index']
+            start_batch = checkpoint['batch_number']
+            chunks_committed_before = checkpoint['index_state']['chunks_committed']
+            skip_chunks = checkpoint['index_state']['chunks_embedded_past_checkpoint']
+            last_chunk_id = checkpoint['index_state']['last_chunk_id']
+            chunk_log_bytes = checkpoint['index_state']['chunk_log_bytes']
+        else:
+            base_offset = self.stats['total_records_processed']
+            start_offset, start_record, start_batch, chunks_committed_before = None, 0, 0, 0
+            skip_chunks, last_chunk_id, chunk_log_bytes = 0, None, 0
+        file_stat = file_path.stat()
+        pipeline_start = time.perf_counter()
+        
+        def record_stage(stage, started, records, ended=None):
+            ended = time.perf_counter() if ended is None else ended
+            with stats_lock:
+                entry = stage_stats[stage]
+                entry['records'] += records
+                entry['busy_seconds'] += ended - started
+                entry['first_start'] = started if entry['first_start'] is None else min(entry['first_start'], started)
+                entry['last_end'] = ended if entry['last_end'] is None else max(entry['last_end'], ended)
+        
+        def put(target_queue, item):
+            # Block under backpressure, but give up once another stage has failed
+            while not stop_event.is_set():
+                try:
+                    target_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def get(source_queue):
+            while True:
+                try:
+                    return source_queue.get(timeout=0.1)
+                except queue.Empty:
+                    if stop_event.is_set():
+                        return _PIPELINE_END
+        
+        def parse_stage():
+            try:
+                record_offset = base_offset + start_record
+                batch_number = start_batch
+                if extract_while_parsing:
+                    batches = self._stream_extracted_ndjson_batches(
+                        file_path, extraction_config, start_offset, start_record, record_offset
+                    )
+                else:
+                    batches = (
+                        (json_chunk, len(json_chunk), position) for json_chunk, position in
+                        self._stream_record_batches(file_path, json_path, start_offset=start_offset,
+                                                    start_record=start_record)
+                    )
+                while not stop_event.is_set():
+                    started = time.perf_counter()
+                    payload, record_count, position = next(batches, (None, 0, None))
+                    if payload is None:
+                        break
+                    record_stage('parse', started, record_count)
+                    batch_number += 1
+                    if not put(parse_queue, (batch_number, record_offset, record_count, payload, position)):
+                        return
+                    record_offset += record_count
+            except Exception as e:
+                failures.append(e)
+                stop_event.set()
+            finally:
+                put(parse_queue, _PIPELINE_END)
+        
+        def dispatch_stage(pool):
+            # Submit in parse order; the embed stage consumes the futures in the same order
+            try:
+                while True:
+                    item = get(parse_queue)
+                    if item is _PIPELINE_END:
+                        break
+                    batch_number, record_offset, record_count, payload, position = item
+                    if extract_while_parsing:
+                        future = Future()  # The parser processes already extracted the chunks
+                        future.set_result(payload)
+                    elif pool is not None:
+                        future = pool.submit(_extract_in_worker, payload, extraction_config, record_offset)
+                    else:
+                        future = Future()
+                        future.set_result(_extract_timed(
+                            self.extract_meaningful_chunks, payload, extraction_config, record_offset
+                        ))
+                    if not put(extract_queue, (batch_number, record_count, position, future)):
+                        return
+            except Exception as e:
+                failures.append(e)
+                stop_event.set()
+            finally:
+                put(extract_queue, _PIPELINE_END)
+        
+        batch_count = start_batch
+        total_chunks_processed = 0
+        pending_chunks = []
+        pending_records = 0
+        uncommitted = []  # (batch number, records, chunks, cumulative chunks, position, last chunk id)
+        chunks_received = 0
+        chunks_embedded = 0
+        committed = {
+            'batch_number': start_batch,
+            'position': {'byte_offset': start_offset, 'record_index': start_record},
+            'chunks_received': 0,
+            'last_chunk_id': last_chunk_id
+        }
+        
+        def write_checkpoint():
+            # Position after the last committed batch, plus how many chunks beyond
+            # it were already embedded (skipped on resume so nothing is embedded twice)
+            if not self.enable_progress_saving:
+                return
+            self.save_checkpoint(file_path, {
+                'file': str(file_path),
+                'file_size': file_stat.st_size,
+                'file_mtime': int(file_stat.st_mtime),
+                'json_path': json_path,
+                'byte_offset': committed['position']['byte_offset'],
+                'record_index': committed['position']['record_index'],
+                'batch_number': committed['batch_number'],
+                'record_offset_base': base_offset,
+                'index_state': {
+                    'chunks_committed': chunks_committed_before + total_chunks_processed,
+                    'chunks_embedded_past_checkpoint': chunks_embedded - committed['chunks_received'],
+                    'last_chunk_id': committed['last_chunk_id'],
+                    'chunk_log_bytes': chunk_log_bytes
+                },
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        def embed(chunks, records, last_batch):
+            nonlocal chunks_embedded, chunk_log_bytes
+            started = time.perf_counter()
+            # Serialized before embedding, which may annotate the chunks
+            log_lines = b''.join(
+                (json.dumps(chunk, default=str) + '\n').encode('utf-8') for chunk in chunks
+            ) if chunk_log is not None else None
+            self._embed_chunks(chunks, file_path, last_batch, structure_info, chunk_sink)
+            record_stage('embed', started, records)
+            if chunk_log is not None:
+                self._delivered_log_rows[str(log_path)] += len(chunks)
+                chunk_log.write(log_lines)
+                chunk_log.flush()
+                os.fsync(chunk_log.fileno())
+                chunk_log_bytes += len(log_lines)
+            chunks_embedded += len(chunks)
+            write_checkpoint()
+        
+        def commit_embedded_batches():
+            # Commit, in order, every batch whose chunks have all been embedded
+            nonlocal total_chunks_processed
+            committed_any = False
+            while uncommitted and uncommitted[0][3] <= chunks_embedded:
+                batch_number, record_count, chunk_count, cumulative_chunks, position, batch_last_chunk_id = uncommitted.pop(0)
+                total_chunks_processed += chunk_count
+                self.stats['total_records_processed'] += record_count
+                self.stats['total_chunks_created'] += chunk_count
+                committed.update({
+                    'batch_number': batch_number,
+                    'position': position,
+                    'chunks_received': cumulative_chunks,
+                    'last_chunk_id': batch_last_chunk_id or committed['last_chunk_id']
+                })
+                committed_any = True
+            
+            if committed_any:
+                write_checkpoint()
+                self.save_progress()
+        
+        # Chunks are only committed once they are in the durable chunk log
+        chunk_log = None
+        log_path = self._chunk_log_path(file_path)
+        if self.enable_progress_saving:
+            if checkpoint:
+                self._replay_chunk_log(file_path, chunk_log_bytes, structure_info, chunk_sink)
+            else:
+                self._delivered_log_rows[str(log_path)] = 0
+            chunk_log = open(log_path, 'ab' if checkpoint else 'wb')
+        
+        # NDJSON parser processes extract chunks themselves; other formats use the extraction pool
+        extract_while_parsing = (
+            json_path == 'ndjson' and NDJSONReader(file_path, workers=self.parse_workers).workers > 1
+        )
+        pool = None
+        if self.extraction_workers > 1 and not extract_while_parsing:
+            # Workers receive the extractor once (it may be an FDA extractor patched onto this instance)
+            pool = ProcessPoolExecutor(
+                max_workers=self.extraction_workers,
+                mp_context=worker_pool_context(),  # The pipeline threads are already running
+                initializer=_init_extraction_worker,
+                initargs=(self.extract_meaningful_chunks,)
+            )
+        
+        try:
+            parser_thread = threading.Thread(target=parse_stage, name="json-parse", daemon=True)
+            dispatch_thread = threading.Thread(target=dispatch_stage, args=(pool,), name="json-extract", daemon=True)
+            parser_thread.start()
+            dispatch_thread.start()
+            
+            try:
+                while True:
+                    item = get(extract_queue)
+                    if item is _PIPELINE_END:
+                        break
+                    batch_number, record_count, position, future = item
+                    meaningful_chunks, extract_seconds = future.result()
+                    ended = time.perf_counter()
+                    record_stage('extract', ended - extract_seconds, record_count, ended)
+                    batch_count = batch_number
+                    print(f"\n📦 Processing batch {batch_count}...")
+                    
+                    chunks_received += len(meaningful_chunks)
+                    uncommitted.append((
+                        batch_number, record_count, len(meaningful_chunks), chunks_received, position,
+                        meaningful_chunks[-1]['chunk_id'] if meaningful_chunks else None
+                    ))
+                    
+                    # On resume, drop chunks that were embedded before the restart
+                    if skip_chunks:
+                        already_embedded = min(skip_chunks, len(meaningful_chunks))
+                        skip_chunks -= already_embedded
+                        chunks_embedded += already_embedded
+                        meaningful_chunks = meaningful_chunks[already_embedded:]
+                    
+                    if not meaningful_chunks:
+                        print("⚠️ No meaningful chunks extracted from this batch")
+                        commit_embedded_batches()
+                        continue
+                    
+                    # Regroup chunks into full embedding batches
+                    pending_chunks.extend(meaningful_chunks)
+                    pending_records += record_count
+                    while len(pending_chunks) >= self.embed_batch_size:
+                        embed_chunks = pending_chunks[:self.embed_batch_size]
+                        pending_chunks = pending_chunks[self.embed_batch_size:]
+                        embed_records = pending_records if not pending_chunks else round(
+                            pending_records * len(embed_chunks) / (len(embed_chunks) + len(pending_chunks))
+                        )
+                        embed(embed_chunks, embed_records, batch_count)
+                        pending_records -= embed_records
+                    
+                    # Save intermediate results
+                    if save_intermediate and batch_count % 10 == 0:  # Save every 10 batches
+                        intermediate_file = self.temp_dir / f"{file_path.stem}_batch_{batch_count}.json"
+                        try:
+                            with open(intermediate_file, 'w') as f:
+                                json.dump({
+                                    'batch_number': batch_count,
+                                    'chunks_processed': len(meaningful_chunks),
+                                    'timestamp': datetime.now().isoformat(),
+                                    'file_source': str(file_path)
+                                }, f, indent=2)
+                            print(f"   💾 Saved intermediate results to {intermediate_file.name}")
+                        except Exception as e:
+                            print(f"   ⚠️ Could not save intermediate results: {e}")
+                    
+                    commit_embedded_batches()
+                
+                if failures:
+                    raise failures[0]
+                
+                # Flush the final partial embedding batch
+                if pending_chunks:
+                    embed(pending_chunks, pending_records, batch_count)
+                commit_embedded_batches()
+            
+            finally:
+                stop_event.set()
+                parser_thread.join()
+                dispatch_thread.join()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if chunk_log is not None:
+                chunk_log.close()
+        
+        elapsed = time.perf_counter() - pipeline_start
+        total_records = stage_stats['parse']['records']
+        stage_throughput = {}
+        for stage, entry in stage_stats.items():
+            window = (entry['last_end'] - entry['first_start']) if entry['first_start'] is not None else 0.0
+            stage_throughput[stage] = {
+                'records': entry['records'],
+                'busy_seconds': entry['busy_seconds'],
+                'records_per_sec': entry['records'] / window if window > 0 else 0.0
+            }
+        
+        return {
+            'batches_processed': batch_count,
+            'total_chunks_created': total_chunks_processed,
+            'stage_throughput': stage_throughput,
+            'records_per_second': total_records / elapsed if elapsed > 0 else 0.0
+        }
+    
+    def _embed_chunks(self, chunks: List[Dict[str, Any]],
+                      file_path: Union[str, Path],
+                      batch_number: int,
+                      structure_info: Optional[Dict[str, Any]],
+                      chunk_sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        """
+        Embedding stage: hand a batch of chunks to the RAG system and the optional sink
+        
+        Raises when the RAG system rejects the batch, so the caller never counts
+        or checkpoints chunks that were not embedded.
+        """
+        # Only cluster representatives are embedded, carrying references to their duplicates
+        # in this batch; every chunk still reaches the sink, in input order
+        batch = chunks
+        if self.deduplicator is not None:
+            chunks, _ = self.deduplicator.deduplicate(batch)
+        
+        # Process through CognitiveLattice RAG if available
+        if chunks and self.CognitiveLattice_rag and CognitiveLattice_AVAILABLE:
+            try:
+                doc_info = {
+                    "source": str(file_path),
+                    "type": "massive_json_dataset",
+                    "batch_number": batch_number,
+                    "structure_info": structure_info,
+                    "processing_method": "streaming_bypass",
+                    "encryption_bypassed": True
+                }
+                
+                self.CognitiveLattice_rag.process_document_chunks(chunks, doc_info)
+                print(f"   ✅ Added {len(chunks)} chunks to CognitiveLattice RAG")
+                
+            except Exception as e:
+                print(f"   ❌ CognitiveLattice RAG processing error: {e}")
+                raise
+        
+        if chunk_sink is not None and batch:
+            chunk_sink(batch)
+    
     def process_multiple_files(self, file_paths: List[Union[str, Path]], 
+                              max_workers: Optional[int] = None,
                               **kwargs) -> Dict[str, Any]:
         """
-        Process multiple massive JSON files sequentially
+        Process multiple massive JSON files, one shard per worker process
         
         Args:
             file_paths: List of paths to JSON files
+            max_workers: Shard processes to run at once (defaults to shard_workers; 1 is sequential)
             **kwargs: Arguments passed to process_single_file
             
         Returns:
             Comprehensive processing results
         """
+        workers = min(max_workers or self.shard_workers, len(file_paths))
+        
         print(f"🚀 Starting massive JSON processing pipeline")
         print(f"📁 Files to process: {len(file_paths)}")
+        print(f"⚙️ Shard workers: {workers}")
         print("=" * 60)
         
-        all_results = []
         overall_start_time = time.time()
         
+        if workers > 1:
+            all_results = self._process_shards_parallel(file_paths, workers, **kwargs)
+        else:
+            all_results = self._process_files_sequential(file_paths, overall_start_time, **kwargs)
+        
+        return self._summarize_multiple_files(file_paths, all_results, overall_start_time)
+    
+    def _process_shards_parallel(self, file_paths: List[Union[str, Path]],
+                                 workers: int,
+                                 chunk_sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                                 **kwargs) -> List[Dict[str, Any]]:
+        """
+        Parse and extract shards in worker processes, embedding in this process
+        
+        Workers stream embed-sized chunk batches back through a bounded queue;
+        the single embedding stage here merges every shard into one index.
+        """
+        all_results = [None] * len(file_paths)
+        embed_stats = {'chunks': 0, 'busy_seconds': 0.0}
+        
+        with multiprocessing.Manager() as manager:
+            chunk_queue = manager.Queue(maxsize=self.queue_depth * workers)
+            
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(_process_shard, self, str(file_path), chunk_queue, kwargs): index
+                    for index, file_path in enumerate(file_paths)
+                }
+                pending = set(futures)
+                
+                # Shared embedding stage: drain chunk batches until every shard is done
+                while True:
+                    try:
+                        shard_path, batch_number, chunks = chunk_queue.get(timeout=0.2)
+                    except queue.Empty:
+                        pending = {future for future in pending if not future.done()}
+                        if not pending and chunk_queue.empty():
+                            break
+                        continue
+                    
+                    started = time.perf_counter()
+                    self._embed_chunks(chunks, shard_path, batch_number, None, chunk_sink)
+                    embed_stats['busy_seconds'] += time.perf_counter() - started
+                    embed_stats['chunks'] += len(chunks)
+                
+                for future, index in futures.items():
+                    file_path = file_paths[index]
+                    try:
+                        result, shard_stats = future.result()
+                    except Exception as e:
+                        print(f"❌ Failed to process {file_path}: {e}")
+                        all_results[index] = {
+                            'file_processed': str(file_path),
+                            'error': str(e),
+                            'failed': True
+                        }
+                        continue
+                    
+                    # Merge shard counters into this processor's stats
+                    self.stats['total_files_processed'] += 1
+                    self.stats['total_records_processed'] += shard_stats['total_records_processed']
+                    self.stats['total_chunks_created'] += shard_stats['total_chunks_created']
+                    self.stats['errors'].extend(shard_stats['errors'])
+                    all_results[index] = result
+                    print(f"✅ Shard complete: {Path(file_path).name} ({result['total_chunks_created']:,} chunks)")
+        
+        self.save_progress()
+        print(f"🧠 Shared embedding stage: {embed_stats['chunks']:,} chunks in {embed_stats['busy_seconds']:.1f}s busy")
+        return all_results
+    
+    def _process_files_sequential(self, file_paths: List[Union[str, Path]],
+                                  overall_start_time: float,
+                                  **kwargs) -> List[Dict[str, Any]]:
+        """Process files one after another in this process"""
+        all_results = []
+        
         for i, file_path in enumerate(file_paths, 1):
             print(f"\n🎯 Processing file {i}/{len(file_paths)}: {Path(file_path).name}")
             print("-" * 40)
@@ -542,6 +1191,12 @@ class MassiveJSONProcessor:
                 })
                 continue
         
+        return all_results
+    
+    def _summarize_multiple_files(self, file_paths: List[Union[str, Path]],
+                                  all_results: List[Dict[str, Any]],
+                                  overall_start_time: float) -> Dict[str, Any]:
+        """Build, print and save the summary for a multi-file run"""
         # Final summary
         total_time = time.time() - overall_start_time
         successful_files = len([r for r in all_results if not r.get('failed', False)])
@@ -555,6 +1210,7 @@ class MassiveJSONProcessor:
             'total_processing_time_minutes': total_time / 60,
             'average_time_per_file_minutes': (total_time / len(file_paths)) / 60,
             'processing_rate_chunks_per_minute': total_chunks / (total_time / 60) if total_time > 0 else 0,
+            'deduplication': self.deduplicator.get_stats() if self.deduplicator else None,
             'individual_results': all_results,
             'final_stats': self.stats
         }
@@ -578,6 +1234,68 @@ class MassiveJSONProcessor:
         return summary
 
 
+_worker_extract = None
+
+
+def _init_extraction_worker(extract: Callable[..., List[Dict[str, Any]]]):
+    """Extraction-pool initializer: keep the (unpickled) extractor for every batch"""
+    global _worker_extract
+    _worker_extract = extract
+
+
+def _extract_timed(extract: Callable[..., List[Dict[str, Any]]],
+                   json_records: List[Any],
+                   extraction_config: Optional[Dict[str, Any]],
+                   record_offset: int):
+    """Run an extractor on one batch, returning (chunks, seconds spent)"""
+    started = time.perf_counter()
+    chunks = extract(json_records, extraction_config, record_offset=record_offset)
+    return chunks, time.perf_counter() - started
+
+
+def _extract_in_worker(json_records: List[Any],
+                       extraction_config: Optional[Dict[str, Any]],
+                       record_offset: int):
+    """Extraction-pool entry point for one batch"""
+    return _extract_timed(_worker_extract, json_records, extraction_config, record_offset)
+
+
+def _process_shard(processor: MassiveJSONProcessor,
+                   file_path: str,
+                   chunk_queue,
+                   kwargs: Dict[str, Any]):
+    """
+    Worker-process entry point for one shard
+    
+    Runs the parse/extract pipeline on a pickled copy of the processor (without
+    its RAG system) and sends embed-sized chunk batches to the parent's queue.
+    
+    Returns:
+        (process_single_file results, shard statistics)
+    """
+    processor.stats = {
+        'total_files_processed': 0,
+        'total_records_processed': 0,
+        'total_chunks_created': 0,
+        'processing_start_time': None,
+        'current_file': None,
+        'errors': []
+    }
+    processor.enable_progress_saving = False  # The parent owns the progress file
+    processor.parse_workers = 1  # Shards already run one process each
+    processor.extraction_workers = 1
+    processor.chunk_id_prefix = f"{Path(file_path).stem}:"
+    
+    batch_counter = [0]
+    
+    def send_to_parent(chunks):
+        batch_counter[0] += 1
+        chunk_queue.put((file_path, batch_counter[0], chunks))
+    
+    result = processor.process_single_file(file_path, chunk_sink=send_to_parent, **kwargs)
+    return result, processor.stats
+
+
 def main():
     """
     Demo/test function for the massive JSON processor
@@ -0,0 +1,207 @@
+"""
+NDJSON Reader for CognitiveLattice
+Fast path for newline-delimited JSON: the file is memory-mapped, split into newline-aligned
+byte ranges, and the ranges are parsed (and optionally transformed) in parallel worker processes
+"""
+
+import json
+import mmap
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+# Readers run inside pipeline threads; forking a multi-threaded process can copy held locks
+_POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_worker_transform = None
+
+
+def worker_pool_context():
+    """Multiprocessing context for pools created by a process that may already run threads"""
+    return multiprocessing.get_context(_POOL_START_METHOD)
+
+
+def looks_like_ndjson(file_path: Union[str, Path], probe_bytes: int = 1024 * 1024) -> bool:
+    """
+    True if the file starts with at least two lines that are each a complete JSON object
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(probe_bytes)
+
+    lines = head.split(b'\n')
+    if len(head) == probe_bytes:
+        lines = lines[:-1]  # The last probed line may be cut off
+    lines = [line for line in lines if line.strip()][:10]
+    if len(lines) < 2:
+        return False
+
+    try:
+        return all(isinstance(json.loads(line), dict) for line in lines)
+    except ValueError:
+        return False
+
+
+def split_newline_ranges(file_path: Union[str, Path], start: int = 0,
+                         range_bytes: int = 16 * 1024 * 1024) -> List[Tuple[int, int]]:
+    """
+    Split [start, EOF) into byte ranges of about range_bytes that end on a newline
+    """
+    size = os.path.getsize(file_path)
+    if start >= size:
+        return []
+
+    ranges = []
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        range_start = start
+        while range_start < size:
+            target = range_start + range_bytes
+            if target >= size:
+                ranges.append((range_start, size))
+                break
+            newline = mm.find(b'\n', target)
+            range_end = size if newline == -1 else newline + 1
+            ranges.append((range_start, range_end))
+            range_start = range_end
+    return ranges
+
+
+def parse_ndjson_range(file_path: str, start: int, end: int) -> Tuple[List[Any], List[int]]:
+    """
+    Parse every line in a byte range (worker-process entry point)
+
+    Returns:
+        (records, byte offset just past each record's line)
+    """
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+
+    records = []
+    offsets = []
+    line_end = start
+    loads = json.loads
+    for line in data.split(b'\n'):
+        line_end += len(line) + 1
+        if line.strip():
+            try:
+                records.append(loads(line))
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON line ending at byte {line_end - 1} of {file_path}: {e}")
+            offsets.append(min(line_end, end))
+    return records, offsets
+
+
+def _init_transform_worker(transform: Optional[Callable[[List[Any]], Any]]):
+    """Pool initializer: keep the batch transform for every range"""
+    global _worker_transform
+    _worker_transform = transform
+
+
+def parse_ndjson_batches(file_path: str, start: int, end: int, batch_size: int,
+                         transform: Optional[Callable[[List[Any]], Any]] = None) -> List[Tuple[Any, int, int]]:
+    """
+    Parse a byte range into record batches and apply the transform to each
+
+    Returns:
+        (transformed batch, records in the batch, byte offset past its last record) per batch
+    """
+    records, offsets = parse_ndjson_range(file_path, start, end)
+    batches = []
+    for batch_start in range(0, len(records), batch_size):
+        batch = records[batch_start:batch_start + batch_size]
+        batch_end = offsets[batch_start + len(batch) - 1]
+        batches.append((transform(batch) if transform else batch, len(batch), batch_end))
+    return batches
+
+
+def _parse_batches_in_worker(file_path: str, start: int, end: int, batch_size: int) -> List[Tuple[Any, int, int]]:
+    """Worker-process entry point for iter_batches, using the transform from the pool initializer"""
+    return parse_ndjson_batches(file_path, start, end, batch_size, _worker_transform)
+
+
+class NDJSONReader:
+    """
+    Parallel reader for newline-delimited JSON files
+
+    Ranges are parsed by a process pool with a bounded number in flight, and
+    records are yielded in file order with the byte offset past each one, so
+    iteration can resume from any yielded offset. iter_batches also runs a
+    transform (e.g. chunk extraction) in the workers, so only its results are
+    sent back to the parent.
+    """
+
+    def __init__(self, file_path: Union[str, Path], workers: Optional[int] = None,
+                 range_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            file_path: Path to the NDJSON file
+            workers: Parser processes (defaults to the CPU count; 1 parses in-process)
+            range_bytes: Approximate size of each newline-aligned range
+        """
+        self.file_path = Path(file_path)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.range_bytes = range_bytes
+
+    def iter_records(self, start_offset: Optional[int] = None) -> Iterator[Tuple[Any, int]]:
+        """
+        Yield (record, byte offset just past the record's line)
+
+        Args:
+            start_offset: Offset previously yielded by this reader, to resume after that record
+        """
+        for records, offsets in self._iter_ranges(start_offset, parse_ndjson_range, parse_ndjson_range, ()):
+            yield from zip(records, offsets)
+
+    def iter_batches(self, batch_size: int, start_offset: Optional[int] = None,
+                     transform: Optional[Callable[[List[Any]], Any]] = None) -> Iterator[Tuple[Any, int, int]]:
+        """
+        Yield (transformed batch, records in the batch, byte offset past its last record)
+
+        Batches hold up to batch_size records and never span two ranges. The
+        transform runs in the worker processes and must be picklable.
+
+        Args:
+            batch_size: Records per batch
+            start_offset: Offset previously yielded by this reader, to resume after that batch
+            transform: Callable applied to each list of records (None yields the records)
+        """
+        def parse_in_process(file_path, start, end, size):
+            return parse_ndjson_batches(file_path, start, end, size, transform)
+
+        for batches in self._iter_ranges(start_offset, parse_in_process, _parse_batches_in_worker,
+                                         (batch_size,), transform):
+            yield from batches
+
+    def _iter_ranges(self, start_offset: Optional[int],
+                     parse_in_process: Callable[..., Any],
+                     parse_in_worker: Callable[..., Any],
+                     extra_args: Tuple[Any, ...],
+                     transform: Optional[Callable[[List[Any]], Any]] = None) -> Iterator[Any]:
+        """Parse results for every range after start_offset, in file order"""
+        ranges = split_newline_ranges(self.file_path, start_offset or 0, self.range_bytes)
+        if not ranges:
+            return
+
+        if self.workers == 1 or len(ranges) == 1:
+            for start, end in ranges:
+                yield parse_in_process(str(self.file_path), start, end, *extra_args)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=worker_pool_context(),
+                                 initializer=_init_transform_worker, initargs=(transform,)) as pool:
+            in_flight = deque()
+            remaining = iter(ranges)
+            # Keep a bounded window of ranges parsing ahead of the consumer
+            for start, end in remaining:
+                in_flight.append(pool.submit(parse_in_worker, str(self.file_path), start, end, *extra_args))
+                if len(in_flight) >= self.workers * 2:
+                    break
+
+            while in_flight:
+                result = in_flight.popleft().result()
+                next_range = next(remaining, None)
+                if next_range is not None:
+                    in_flight.append(pool.submit(parse_in_worker, str(self.file_path), *next_range, *extra_args))
+                yield result
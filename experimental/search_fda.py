@@ -11,6 +11,9 @@ import os
 import sys
 from pathlib import Path
 from experimental.integrated_json_rag import IntegratedJSONRAG
+from experimental.fda_json_integration import FDAJSONProcessor
+from core.retrieval_daemon import get_retrieval_client
+from core.embedding_cache import default_cache_dir
 
 # Global RAG system instance
 rag_system = None
@@ -36,6 +39,27 @@ def initialize_rag_system():
 # Global RAG system instance
 rag_system = None
 
+# Embeddings persisted here are reopened on the next run instead of re-embedding
+FDA_EMBEDDING_STORE = default_cache_dir("fda_store")
+
+# Facet filter applied before vector search for pediatric questions
+# (set on every embedded chunk by FDAJSONProcessor.extract_fda_chunks)
+PEDIATRIC_FILTERS = {"pediatric_relevant": True}
+
+def use_fda_extraction(rag):
+    """
+    Route the RAG system's JSON ingestion through FDA chunk extraction
+    
+    The embedded chunks then carry drug_classification, pediatric_relevant,
+    safety_flags and medical_complexity, which the facet index serves to
+    filtered queries.
+    """
+    rag._ensure_json_processor()
+    fda_processor = FDAJSONProcessor(enable_CognitiveLattice_rag=False)
+    fda_processor.processor = rag.json_processor
+    rag.json_processor.extract_meaningful_chunks = fda_processor.extract_fda_chunks
+    rag.extraction_mode = "fda"
+
 def initialize_rag_system():
     """
     Initialize the integrated RAG system
@@ -46,16 +70,33 @@ def initialize_rag_system():
         print("� Initializing CognitiveLattice Integrated RAG System...")
         print("=" * 60)
         
+        # A running retrieval daemon already holds the embedded FDA chunks
+        retrieval_client = get_retrieval_client()
+        if retrieval_client is not None:
+            rag_system = IntegratedJSONRAG(  # Adaptive mode loads no model until one is needed
+                llm_provider="openai",
+                max_context_tokens=80000
+            )
+            rag_system.retrieval_client = retrieval_client
+            print(f"✅ System ready! Searching through the retrieval daemon at {retrieval_client.address}")
+            return True
+        
         rag_system = IntegratedJSONRAG(
             embedding_model="all-MiniLM-L6-v2",  # Fast, lightweight model
             llm_provider="openai",
             chunk_size=100,  # Reasonable chunk size
-            max_context_tokens=80000  # Leave room for response
+            max_context_tokens=80000,  # Leave room for response
+            embedding_store_dir=FDA_EMBEDDING_STORE
         )
         
         # Process FDA file if it exists
         fda_file = "drug-label-0001-of-0013.json"
         if os.path.exists(fda_file):
+            use_fda_extraction(rag_system)
+            if rag_system.load_embedding_store(source_file=fda_file, json_path="results.item"):
+                print(f"✅ System ready! Reopened {len(rag_system.chunk_metadata):,} embedded chunks")
+                return True
+            
             print(f"\n📁 Processing FDA file: {fda_file}")
             
             processing_results = rag_system.process_json_file(
@@ -76,9 +117,11 @@ def initialize_rag_system():
     
     return True
 
-def search_fda_chunks(query, max_results=10):
+def search_fda_chunks(query, max_results=10, filters=None):
     """
     Search through processed FDA chunks using integrated RAG system
+    
+    filters (e.g. PEDIATRIC_FILTERS) restrict the search to chunks with matching facets
     """
     if not initialize_rag_system():
         print("❌ Could not initialize RAG system")
@@ -93,7 +136,8 @@ def search_fda_chunks(query, max_results=10):
     results = rag_system.integrated_query(
         query,
         top_k_chunks=50,  # Consider more chunks for better results
-        similarity_threshold=0.2  # Lower threshold for broader results
+        similarity_threshold=0.2,  # Lower threshold for broader results
+        filters=filters
     )
     
     # Display results in user-friendly format
@@ -146,7 +190,7 @@ def print_query_results(results, max_results=10):
     print(f"Chunks used in context: {context_info['chunks_used']}")
     print(f"Search method: {search_info['search_method']}")
     print(f"Processing time: {results['processing_time_seconds']:.2f}s")
-    print(f"Context tokens: ~{context_info['estimated_tokens']:,}")
+    print(f"Context tokens: ~{context_info['estimated_tokens']:,} ({context_info.get('tokens_saved', 0):,} saved by packing)")
     
     if context_info['chunk_ids']:
         print(f"Source chunks: {', '.join(context_info['chunk_ids'][:5])}{'...' if len(context_info['chunk_ids']) > 5 else ''}")
@@ -168,7 +212,7 @@ def query_pediatric_drugs():
     for i, query in enumerate(queries, 1):
         print(f"\n� Query {i}: {query}")
         print("-" * 40)
-        search_fda_chunks(query)
+        search_fda_chunks(query, filters=PEDIATRIC_FILTERS)
         
         if i < len(queries):
             input("\nPress Enter to continue to next query...")
@@ -276,8 +320,16 @@ def show_system_status():
     print(f"Embeddings created: {len(rag_system.chunk_embeddings) if hasattr(rag_system, 'chunk_embeddings') else 'N/A'}")
     print(f"Verbatim chunks stored: {len(rag_system.verbatim_chunks):,}")
     
-    temp_dir = Path(rag_system.json_processor.temp_dir)
-    if temp_dir.exists():
+    if rag_system.embedding_store_dir:
+        print(f"Embedding store: {rag_system.embedding_store_dir} ({rag_system.embedding_dtype})")
+    
+    pediatric_counts = rag_system.facet_index.value_counts("pediatric_relevant")
+    if pediatric_counts:
+        print(f"Pediatric-relevant chunks: {pediatric_counts.get(True, 0):,}")
+    
+    # The JSON processor only exists once JSON ingestion has been set up
+    temp_dir = Path(rag_system.json_processor.temp_dir) if rag_system.json_processor else None
+    if temp_dir and temp_dir.exists():
         batch_files = list(temp_dir.glob("*_batch_*.json"))
         print(f"Processed batch files: {len(batch_files)}")
     
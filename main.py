@@ -8,6 +8,7 @@ from core.external_api_client import ExternalAPIClient
 from core.tool_manager import ToolManager
 from core.cognitive_lattice import CognitiveLattice, SessionManager
 from core.llama_client import diagnose_user_intent
+from core.intent_classifier import get_intent_stats, local_intent_enabled
 from tools.web_automation.cognitive_lattice_web_coordinator import execute_cognitive_web_task
 import asyncio
 
@@ -23,6 +24,11 @@ async def main():
     print("📋 CognitiveLattice Interactive Agent")
     print("=" * 50)
     
+    # Local intent classification is opt-in until its thresholds are measured
+    use_local_intent = local_intent_enabled()
+    if use_local_intent:
+        print("⚡ Local intent classifier enabled (LLaMA answers uncertain requests)")
+    
     # Initialize external API client
     try:
         external_api = ExternalAPIClient()
@@ -41,6 +47,10 @@ async def main():
         try:
             user_query = input("\nYour request: ")
             if user_query.lower() in ['exit', 'quit']:
+                if use_local_intent:
+                    stats = get_intent_stats()
+                    print(f"📊 Intents answered locally: {stats['local']}/{stats['local'] + stats['fallback']} "
+                          f"({stats['local_mean_ms']:.1f} ms local, {stats['fallback_mean_ms']:.1f} ms LLaMA)")
                 print("✅ Exiting interactive session.")
                 break
 
@@ -86,7 +96,7 @@ async def main():
             else:
                 # No active task, do normal intent detection
                 print("🧠 Diagnosing user intent...")
-                intent_info = diagnose_user_intent(user_query)
+                intent_info = diagnose_user_intent(user_query, use_local_classifier=use_local_intent)
                 intent = intent_info.get("intent", "query")
                 action = intent_info.get("action", "query")
                 
@@ -121,7 +131,7 @@ async def main():
                 if external_api:
                     try:
                         # Direct API call for simple chat - no chunking, no RAG
-                        chat_response = external_api.query_external_api(user_query)
+                        chat_response = external_api.query_external_api(user_query, use_cache=False)
                         print(f"✅ Chat response received")
                         print(f"\n💬 Response: {chat_response}")
                         
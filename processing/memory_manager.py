@@ -3,7 +3,84 @@ Memory Management Module for CognitiveLattice
 Handles memory search and chunk memory operations with semantic search capabilities
 """
 
+from collections import OrderedDict
+from itertools import islice
 
+from core.bm25_index import BM25Index, reciprocal_rank_fusion
+
+# Inverted indexes over memory dicts / chunk lists, keyed by id() of the indexed container.
+# Each entry holds the container itself so its id cannot be reused while cached. Indexes are
+# maintained at write time through index_memory / index_chunks; searches only look them up.
+_keyword_indexes = OrderedDict()  # id(container) -> (container, BM25Index)
+MAX_KEYWORD_INDEXES = 8
+
+
+def _get_keyword_index(container, entries_from, rebuild=False):
+    """
+    Get the BM25 index for a memory dict or chunk list, indexing only appended entries
+
+    Appends are detected by length alone, so a lookup costs O(1) when nothing was added.
+    Entries edited or replaced in place are not detected: writers that do that pass
+    rebuild=True. A container that shrank is rebuilt automatically.
+
+    Args:
+        container: The memory dict or chunk metadata list being searched
+        entries_from: Callable(start) returning (document_id, text) pairs from position start on
+        rebuild: Discard the existing index and index every entry again
+    """
+    cached = _keyword_indexes.get(id(container))
+    if cached is None or cached[0] is not container or rebuild or len(cached[1]) > len(container):
+        index = BM25Index()
+        _keyword_indexes[id(container)] = (container, index)
+    else:
+        index = cached[1]
+    if len(index) < len(container):
+        index.add_documents((doc_id, str(text)) for doc_id, text in entries_from(len(index)))
+
+    _keyword_indexes.move_to_end(id(container))
+    while len(_keyword_indexes) > MAX_KEYWORD_INDEXES:
+        _keyword_indexes.popitem(last=False)
+    return index
+
+
+def index_memory(memory, rebuild=False):
+    """
+    Index memory entries for literal search (call after writing to memory)
+    
+    Args:
+        memory: Dictionary of chunk_id -> summary mappings
+        rebuild: Reindex everything, needed after existing entries were edited or replaced
+    """
+    return _get_keyword_index(memory, lambda start: islice(memory.items(), start, None), rebuild)
+
+
+def index_chunks(chunks, rebuild=False):
+    """
+    Index chunk metadata for literal and hybrid search (call after appending chunks)
+    
+    Args:
+        chunks: List of chunk dictionaries with chunk_id and content
+        rebuild: Reindex everything, needed after existing chunks were edited or replaced
+    """
+    return _get_keyword_index(
+        chunks,
+        lambda start: ((position, chunks[position].get('content', '')) for position in range(start, len(chunks))),
+        rebuild
+    )
+
+
+def add_to_memory(memory, chunk_id, summary):
+    """
+    Store a chunk summary and keep the memory's keyword index current
+    
+    Args:
+        memory: Dictionary of chunk_id -> summary mappings
+        chunk_id: Chunk identifier
+        summary: Summary text
+    """
+    replaced = chunk_id in memory
+    memory[chunk_id] = summary
+    index_memory(memory, rebuild=replaced)
 
 
 def search_memory(memory, keyword, use_semantic=True, max_results=5):
@@ -69,10 +146,9 @@ def _literal_search(memory, keyword):
         memory: Dictionary of chunk_id -> summary mappings
         keyword: Keyword to search for literally
     """
-    results = []
-    for chunk_id, summary in memory.items():
-        if keyword.lower() in summary.lower():
-            results.append((chunk_id, summary))
+    # Candidates come from the inverted index; matches are ranked by BM25
+    index = index_memory(memory)
+    results = [(chunk_id, memory[chunk_id]) for chunk_id, _ in index.literal_search(keyword, k=len(index))]
 
     if results:
         print(f"\n� Found {len(results)} literal matches:")
@@ -100,37 +176,59 @@ def search_memory_advanced(query, search_type="semantic", max_results=5, include
     
     results = []
     
+    def make_result(chunk, search_method, relevance, score):
+        return {
+            "chunk_id": chunk.get('chunk_id', 'unknown'),
+            "content": chunk.get('content', ''),
+            "source_type": chunk.get('source_type', 'unknown'),
+            "search_method": search_method,
+            "key_facts": chunk.get('key_facts', {}),
+            "relevance": relevance,
+            "score": score
+        }
+    
+    semantic_results = []
     if search_type in ["semantic", "hybrid"] and len(chunk_metadata) > 0:
         # Semantic search
         semantic_results = retrieve_similar_summaries(query, k=max_results)
+    
+    if search_type == "semantic":
+        for rank, chunk in enumerate(semantic_results):
+            results.append(make_result(chunk, "semantic", "high", 1.0 / (rank + 1)))
+    
+    elif search_type == "literal":
+        # Exact matches from the inverted index, ranked by BM25
+        index = index_chunks(chunk_metadata)
+        for position, score in index.literal_search(query, k=max_results):
+            results.append(make_result(chunk_metadata[position], "literal", "exact_match", score))
+    
+    elif search_type == "hybrid":
+        # Fuse semantic ranking with BM25 ranking via reciprocal rank fusion
+        index = index_chunks(chunk_metadata)
+        keyword_ranking = index.search(query, k=max_results * 4)
+        exact_matches = {position for position, _ in index.literal_search(query, k=max_results * 4)}
         
+        chunks_by_key = {}
+        semantic_keys = []
         for chunk in semantic_results:
-            chunk_info = {
-                "chunk_id": chunk.get('chunk_id', 'unknown'),
-                "content": chunk.get('content', ''),
-                "source_type": chunk.get('source_type', 'unknown'),
-                "search_method": "semantic",
-                "key_facts": chunk.get('key_facts', {}),
-                "relevance": "high"  # Could implement actual scoring
-            }
-            results.append(chunk_info)
-    
-    if search_type in ["literal", "hybrid"]:
-        # Literal search through chunk metadata
-        for chunk in chunk_metadata:
-            content = chunk.get('content', '')
-            if query.lower() in content.lower():
-                chunk_info = {
-                    "chunk_id": chunk.get('chunk_id', 'unknown'),
-                    "content": content,
-                    "source_type": chunk.get('source_type', 'unknown'),
-                    "search_method": "literal",
-                    "key_facts": chunk.get('key_facts', {}),
-                    "relevance": "exact_match"
-                }
-                # Avoid duplicates in hybrid search
-                if not any(r["chunk_id"] == chunk_info["chunk_id"] for r in results):
-                    results.append(chunk_info)
+            key = chunk.get('chunk_id', id(chunk))
+            chunks_by_key[key] = chunk
+            semantic_keys.append(key)
+        keyword_keys = []
+        for position, _ in keyword_ranking:
+            chunk = chunk_metadata[position]
+            key = chunk.get('chunk_id', id(chunk))
+            chunks_by_key.setdefault(key, chunk)
+            keyword_keys.append(key)
+        exact_keys = {chunk_metadata[p].get('chunk_id', id(chunk_metadata[p])) for p in exact_matches}
+        
+        semantic_key_set, keyword_key_set = set(semantic_keys), set(keyword_keys)
+        for key, score in reciprocal_rank_fusion([semantic_keys, keyword_keys]):
+            in_semantic = key in semantic_key_set
+            in_keyword = key in keyword_key_set
+            method = "hybrid" if in_semantic and in_keyword else ("semantic" if in_semantic else "literal")
+            relevance = "exact_match" if key in exact_keys else ("high" if in_semantic else "keyword")
+            results.append(make_result(chunks_by_key[key], method, relevance, score))
     
     # Display results
     if results:
@@ -140,7 +238,7 @@ def search_memory_advanced(query, search_type="semantic", max_results=5, include
             print(f"\n📄 Result {i}: {result['chunk_id']}")
             print(f"   📋 Type: {result['source_type']}")
             print(f"   🔍 Method: {result['search_method']}")
-            print(f"   📊 Relevance: {result['relevance']}")
+            print(f"   📊 Relevance: {result['relevance']} (score: {result['score']:.3f})")
             print(f"   📝 Content: {result['content'][:200]}{'...' if len(result['content']) > 200 else ''}")
             
             # Show relevant key facts
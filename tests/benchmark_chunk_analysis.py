@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Chunk Analysis Throughput Benchmark
+Compares the old serial loop (one request at a time, 1 s sleep between chunks)
+against the concurrent, rate-limited ExternalAPIClient.analyze_multiple_chunks,
+against a local mock of the OpenAI chat-completions API that answers with a
+fixed latency and returns 429 + Retry-After once its own rate limit is exceeded.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+
+from core.external_api_client import ExternalAPIClient
+from core.http_session import close_sessions
+from core.llm_response_cache import configure_llm_cache
+from core.rate_limiter import TokenBucketRateLimiter
+
+
+class MockChatServer:
+    """OpenAI look-alike with fixed latency and a requests-per-second limit"""
+
+    def __init__(self, latency_ms: float, server_rps: float):
+        self.requests = 0
+        self.throttled = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._allowance = server_rps
+        self._updated = time.monotonic()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if not server._admit():
+                    self._reply(429, {"error": {"message": "Rate limit reached"}}, {"Retry-After": "1"})
+                    return
+                with server._lock:
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                time.sleep(latency_ms / 1000)
+                with server._lock:
+                    server._in_flight -= 1
+                prompt = body["messages"][-1]["content"]
+                chunk_id = prompt.split("CHUNK ID: ", 1)[1].split("\n", 1)[0]
+                self._reply(200, {
+                    "model": body["model"],
+                    "choices": [{"message": {"content": json.dumps({"chunk": chunk_id})}}],
+                    "usage": {"total_tokens": 350}
+                })
+
+            def _reply(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server_rps = server_rps
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _admit(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            self._allowance = min(self.server_rps, self._allowance + (now - self._updated) * self.server_rps)
+            self._updated = now
+            if self._allowance < 1:
+                self.throttled += 1
+                return False
+            self._allowance -= 1
+            return True
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_chunks(count: int) -> List[Dict[str, Any]]:
+    return [{
+        "chunk_id": f"chunk_{i:03d}",
+        "content": f"Section {i}: installation steps, torque specifications and safety notes. " * 20,
+        "source_type": "manual"
+    } for i in range(count)]
+
+
+def legacy_serial(client: ExternalAPIClient, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The loop analyze_multiple_chunks used before: serial with a fixed 1 s sleep"""
+    results = []
+    for i, chunk in enumerate(chunks):
+        results.append(client.analyze_chunk_with_external_api(chunk, "comprehensive"))
+        if i < len(chunks) - 1:
+            time.sleep(1)
+    return results
+
+
+def run(name: str, fn, chunks: List[Dict[str, Any]], server: MockChatServer) -> Dict[str, Any]:
+    before_requests, before_throttled = server.requests, server.throttled
+    start = time.perf_counter()
+    results = fn(chunks)
+    elapsed = time.perf_counter() - start
+    in_order = [r["chunk_id"] for r in results] == [c["chunk_id"] for c in chunks]
+    failed = sum(1 for r in results if r.get("analysis_type") == "error")
+    return {
+        "name": name,
+        "seconds": elapsed,
+        "chunks_per_second": len(chunks) / elapsed,
+        "http_requests": server.requests - before_requests,
+        "throttled_429": server.throttled - before_throttled,
+        "in_order": in_order,
+        "failed": failed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs concurrent external chunk analysis")
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks to analyze")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Mock API response latency")
+    parser.add_argument("--server-rps", type=float, default=10, help="Requests per second the mock API admits before 429")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel requests for the concurrent run")
+    parser.add_argument("--skip-legacy", action="store_true", help="Skip the slow serial baseline")
+    args = parser.parse_args()
+
+    configure_llm_cache(enabled=False)  # Every run must reach the mock API; cached answers would skew timings
+    chunks = make_chunks(args.chunks)
+    rows = []
+    with MockChatServer(args.latency_ms, args.server_rps) as server:
+        client = ExternalAPIClient(max_concurrency=args.concurrency)
+        client.base_url = server.base_url
+
+        if not args.skip_legacy:
+            rows.append(run("legacy serial + sleep(1)", lambda c: legacy_serial(client, c), chunks, server))
+
+        # Client budget above the server's limit: exercises 429 + Retry-After backoff
+        client.rate_limiter = TokenBucketRateLimiter(requests_per_minute=6000, burst_seconds=1)
+        rows.append(run("concurrent, limiter above server limit",
+                        client.analyze_multiple_chunks, chunks, server))
+
+        # Client budget just under the server's limit: the token bucket avoids 429s
+        time.sleep(1.5)  # Let the mock's bucket refill
+        client.rate_limiter = TokenBucketRateLimiter(requests_per_minute=args.server_rps * 60 * 0.9,
+                                                     burst_seconds=1)
+        rows.append(run("concurrent, limiter under server limit",
+                        client.analyze_multiple_chunks, chunks, server))
+        peak_in_flight = server.max_in_flight
+        close_sessions()
+
+    print(f"\n📊 {args.chunks} chunks, {args.latency_ms:.0f} ms latency, server limit {args.server_rps:g} req/s, "
+          f"concurrency {args.concurrency} (peak in flight {peak_in_flight})")
+    for row in rows:
+        print(f"   {row['name']:<40} {row['seconds']:7.2f} s   {row['chunks_per_second']:6.2f} chunks/s   "
+              f"requests {row['http_requests']:3d}   429s {row['throttled_429']:3d}   "
+              f"in order {'✅' if row['in_order'] else '❌'}   failed {row['failed']}")
+    if not args.skip_legacy:
+        print(f"🚀 Speedup over serial: {rows[0]['seconds'] / rows[-1]['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Facet Filter Benchmark
+Builds FDA-style drug records, indexes them through the same extraction the FDA search
+embeds (FDAJSONProcessor.extract_fda_chunks), and compares an unfiltered search
+against the pediatric facet filter used by experimental/search_fda.py.
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+
+from experimental.fda_json_integration import FDAJSONProcessor
+from experimental.integrated_json_rag import IntegratedJSONRAG
+from experimental.search_fda import PEDIATRIC_FILTERS
+
+DRUGS = ["ibuprofen", "acetaminophen", "amoxicillin", "cetirizine", "loratadine", "omeprazole", "naproxen"]
+ADULT_INDICATIONS = "For the temporary relief of minor aches and pains in adults due to headache and muscular aches."
+PEDIATRIC_INDICATIONS = "For the temporary relief of fever and minor aches in children and pediatric patients 2 years and older."
+
+
+def build_records(n_records: int, pediatric_rate: float, seed: int = 0):
+    """FDA drug-label records, a pediatric_rate share of them mentioning children"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(n_records):
+        drug = rng.choice(DRUGS)
+        pediatric = rng.random() < pediatric_rate
+        records.append({
+            "openfda": {"brand_name": [f"{drug.title()} {i}"], "generic_name": [drug]},
+            "indications_and_usage": [PEDIATRIC_INDICATIONS if pediatric else ADULT_INDICATIONS],
+            "dosage_and_administration": [f"Take {rng.choice([100, 200, 400])} mg every 6 hours."]
+        })
+    return records
+
+
+def timed_search(rag: IntegratedJSONRAG, query: str, filters, repeats: int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = rag.semantic_search(query, top_k=len(rag.chunk_metadata), similarity_threshold=0.0,
+                                      filters=filters)
+    return results, (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark facet-filtered FDA search")
+    parser.add_argument("--records", type=int, default=2000, help="Drug records to index")
+    parser.add_argument("--pediatric-rate", type=float, default=0.2, help="Share of records mentioning children")
+    parser.add_argument("--query", default="fever relief dose", help="Search query")
+    parser.add_argument("--repeats", type=int, default=3, help="Searches per measurement")
+    args = parser.parse_args()
+
+    rag = IntegratedJSONRAG(use_gpu=False)
+    fda_processor = FDAJSONProcessor(enable_CognitiveLattice_rag=False)
+    chunks = fda_processor.extract_fda_chunks(build_records(args.records, args.pediatric_rate), record_offset=0)
+    rag._create_embeddings_for_chunks(chunks, [chunk["content"] for chunk in chunks])
+
+    unfiltered, unfiltered_s = timed_search(rag, args.query, None, args.repeats)
+    filtered, filtered_s = timed_search(rag, args.query, PEDIATRIC_FILTERS, args.repeats)
+
+    expected = rag.facet_index.value_counts("pediatric_relevant").get(True, 0)
+    assert 0 < len(filtered) < len(unfiltered), "pediatric filter did not narrow the search"
+    assert all(chunk["pediatric_relevant"] for chunk in filtered), "filter let adult-only labels through"
+    assert len(filtered) <= expected
+
+    print(f"\n📊 {len(chunks):,} drug records, {expected:,} with pediatric information")
+    print(f"   {'unfiltered':<12} {len(unfiltered):6,} results   {unfiltered_s * 1000:8.1f} ms")
+    print(f"   {'pediatric':<12} {len(filtered):6,} results   {filtered_s * 1000:8.1f} ms   filters {PEDIATRIC_FILTERS}")
+    print("✅ Pediatric facet filter narrows the search to pediatric labels")
+
+
+if __name__ == "__main__":
+    main()
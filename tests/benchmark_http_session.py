@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+HTTP Session Latency Benchmark
+Compares a new connection per request (plain requests.post) against the pooled
+keep-alive sessions of core.http_session, against a local stand-in LLM server
+over HTTP and, when openssl is available, HTTPS with a self-signed certificate.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from core.http_session import close_sessions, post_json
+
+PAYLOAD = {
+    "prompt": "[INST] Classify this request: find a hotel near the airport [/INST]",
+    "n_predict": 16,
+    "temperature": 0.3,
+    "stream": False
+}
+
+
+class StandInServer:
+    """llama-server look-alike answering every POST with a small completion"""
+
+    def __init__(self, certfile: Optional[str] = None, connect_delay_ms: float = 0.0):
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # As real servers do; avoids delayed-ACK stalls on keep-alive
+
+            def setup(self):
+                server.connections += 1
+                # Emulate the network round trips of a handshake to a remote host
+                time.sleep(connect_delay_ms / 1000)
+                super().setup()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                body = json.dumps({"content": "hotel_search"}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+            scheme = "https"
+        self.url = f"{scheme}://127.0.0.1:{self.httpd.server_address[1]}/completion"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_self_signed_cert(directory: str) -> Optional[str]:
+    """PEM file with a self-signed key and certificate for 127.0.0.1, or None without openssl"""
+    if not shutil.which("openssl"):
+        return None
+    path = os.path.join(directory, "standin.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", path, "-out", path],
+        check=True, capture_output=True
+    )
+    return path
+
+
+def time_calls(fn: Callable[[], requests.Response], repeats: int) -> List[float]:
+    """Milliseconds per call"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = fn()
+        response.raise_for_status()
+        response.json()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_mode(certfile: Optional[str], repeats: int, connect_delay_ms: float) -> Dict[str, Dict[str, float]]:
+    verify = certfile if certfile else True
+    results = {}
+    with StandInServer(certfile, connect_delay_ms) as server:
+        fresh = lambda: requests.post(server.url, json=PAYLOAD, timeout=30, verify=verify)
+        pooled = lambda: post_json(server.url, PAYLOAD, endpoint="llama_completion", verify=verify)
+
+        for name, fn in (("per_request_connection", fresh), ("pooled_keep_alive", pooled)):
+            fn()  # Warm up imports and, for the pool, the first connection
+            before = server.connections
+            timings = time_calls(fn, repeats)
+            results[name] = {
+                "mean_ms": statistics.mean(timings),
+                "p50_ms": statistics.median(timings),
+                "p95_ms": sorted(timings)[int(len(timings) * 0.95) - 1],
+                "connections": server.connections - before
+            }
+        close_sessions()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled keep-alive sessions against per-request connections")
+    parser.add_argument("--repeats", type=int, default=200, help="Requests per measurement")
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0,
+                        help="Server-side delay per new connection, emulating handshake round trips to a remote API")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        modes = {"http": None}
+        certfile = make_self_signed_cert(directory)
+        if certfile:
+            modes["https"] = certfile
+        else:
+            print("⚠️ openssl not found - skipping the HTTPS (TLS handshake) measurement")
+
+        for mode, cert in modes.items():
+            results = run_mode(cert, args.repeats, args.connect_delay_ms)
+            print(f"\n📊 {mode.upper()} ({args.repeats} sequential requests, "
+                  f"{args.connect_delay_ms:.0f} ms per new connection)")
+            for name, stats in results.items():
+                print(f"   {name:<24} mean {stats['mean_ms']:7.3f} ms   p50 {stats['p50_ms']:7.3f} ms   "
+                      f"p95 {stats['p95_ms']:7.3f} ms   connections {stats['connections']}")
+            fresh, pooled = results["per_request_connection"], results["pooled_keep_alive"]
+            print(f"🚀 Saved {fresh['mean_ms'] - pooled['mean_ms']:.3f} ms per call "
+                  f"({fresh['mean_ms'] / pooled['mean_ms']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Intent Classifier Benchmark
+Tracks intent accuracy and latency on the labeled set in tests/intent_eval_set.json for
+the local nearest-centroid classifier alone, diagnose_user_intent with the local classifier
+in front of LLaMA, and LLaMA alone (the last two need a running llama-server).
+"""
+
+import argparse
+import json
+import os
+
+import requests
+
+from core.intent_classifier import configure_intent_classifier, evaluate_intent_classifier
+from core.llama_client import diagnose_user_intent
+from core.llm_response_cache import configure_llm_cache
+
+EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_eval_set.json")
+
+
+def llama_reachable(server_url: str) -> bool:
+    try:
+        requests.post(server_url, json={"prompt": "hi", "n_predict": 1}, timeout=5).raise_for_status()
+        return True
+    except requests.exceptions.RequestException:
+        return False
+
+
+def print_report(name: str, report: dict):
+    print(f"   {name:<28} intent acc {report['intent_accuracy']:6.1%}   action acc {report['action_accuracy']:6.1%}   "
+          f"mean {report['mean_ms']:8.1f} ms   p50 {report['p50_ms']:8.1f} ms   p95 {report['p95_ms']:8.1f} ms   "
+          f"sources {report['sources']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local intent classification against LLaMA")
+    parser.add_argument("--eval-set", default=EVAL_SET, help="JSON list of {query, intent, action}")
+    parser.add_argument("--server-url", default="http://localhost:8080/completion", help="llama-server completion URL")
+    parser.add_argument("--min-similarity", type=float, default=None, help="Override the confidence threshold")
+    parser.add_argument("--min-margin", type=float, default=None, help="Override the margin threshold")
+    parser.add_argument("--show-errors", action="store_true", help="List misclassified queries")
+    args = parser.parse_args()
+
+    with open(args.eval_set, "r", encoding="utf-8") as f:
+        labeled = json.load(f)
+
+    thresholds = {}
+    if args.min_similarity is not None:
+        thresholds["min_similarity"] = args.min_similarity
+    if args.min_margin is not None:
+        thresholds["min_margin"] = args.min_margin
+    classifier = configure_intent_classifier(**thresholds)  # Also used by diagnose_user_intent
+    classifier.classify("warm up")  # Load the model and build the centroids outside the timings
+
+    reports = {}
+    local_results = {}
+
+    def local(query):
+        result = classifier.classify(query)
+        local_results[query] = result
+        return {**result, "source": "local" if result["confident"] else "local (uncertain)"}
+
+    reports["local classifier (all)"] = evaluate_intent_classifier(labeled, local)
+    confident = [item for item in labeled if local_results[item["query"]]["confident"]]
+    if confident:
+        reports["local classifier (confident)"] = evaluate_intent_classifier(
+            confident, lambda query: {**local_results[query], "source": "local"})
+
+    configure_llm_cache(enabled=False)  # Measure real LLaMA latency
+    if llama_reachable(args.server_url):
+        reports["local + LLaMA fallback"] = evaluate_intent_classifier(
+            labeled, lambda query: diagnose_user_intent(query, args.server_url, use_local_classifier=True))
+        reports["LLaMA only"] = evaluate_intent_classifier(
+            labeled, lambda query: diagnose_user_intent(query, args.server_url, use_local_classifier=False))
+    else:
+        print(f"⚠️ llama-server not reachable at {args.server_url} - skipping the LLaMA measurements")
+
+    print(f"\n📊 {len(labeled)} labeled queries, {len(confident)} ({len(confident) / len(labeled):.0%}) "
+          f"answered locally (similarity >= {classifier.min_similarity}, margin >= {classifier.min_margin})")
+    for name, report in reports.items():
+        print_report(name, report)
+        if args.show_errors:
+            for error in report["errors"]:
+                print(f"      ❌ {error['query']!r}: expected {error['expected']}, got {error['got']} ({error['source']})")
+
+
+if __name__ == "__main__":
+    main()
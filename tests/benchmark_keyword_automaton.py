@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Keyword Automaton Microbenchmark
+Compares per-keyword scanning against the precompiled KeywordAutomaton used by
+DocumentTypeDetector and SafetyAuditor on long chunk text.
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+from core.bidirectional_rag import DocumentTypeDetector, SafetyAuditor
+from core.keyword_automaton import KeywordAutomaton, AHOCORASICK_AVAILABLE
+
+FILLER_WORDS = (
+    "the patient was observed during the study period and results were recorded "
+    "according to the protocol with standard follow up visits and laboratory values "
+    "reported for each cohort including baseline characteristics among participants"
+).split()
+
+
+def build_chunk_text(n_words: int, keyword_rate: float, keywords: List[str], seed: int = 0) -> str:
+    """Generate chunk-like text with keywords sprinkled in at the given rate"""
+    rng = random.Random(seed)
+    words = []
+    for _ in range(n_words):
+        if rng.random() < keyword_rate:
+            words.append(rng.choice(keywords))
+        else:
+            words.append(rng.choice(FILLER_WORDS))
+    return " ".join(words)
+
+
+def legacy_detect_scores(type_keywords: Dict[str, List[str]], text: str) -> Dict[str, float]:
+    """Per-keyword scoring as DocumentTypeDetector did before the automaton"""
+    text_lower = text.lower()
+    scores = {}
+    for doc_type, keywords in type_keywords.items():
+        score = sum(1 for keyword in keywords if keyword in text_lower)
+        for keyword in keywords:
+            score += text_lower.count(keyword) * 0.5
+        scores[doc_type] = score
+    return scores
+
+
+def automaton_detect_scores(detector: DocumentTypeDetector, text: str) -> Dict[str, float]:
+    """Same scores computed from a single automaton pass"""
+    counts = detector.keyword_automaton.count(text)
+    return {
+        doc_type: sum(1 for k in keywords if k in counts) + sum(counts.get(k, 0) for k in keywords) * 0.5
+        for doc_type, keywords in detector.type_keywords.items()
+    }
+
+
+def legacy_risk_terms(risk_terms: List[str], text: str) -> List[str]:
+    """Per-term membership scan as SafetyAuditor did before the automaton"""
+    text_lower = text.lower()
+    return [term for term in risk_terms if term in text_lower]
+
+
+def time_call(fn: Callable[[], object], repeats: int) -> float:
+    """Average milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword scanning on long chunk text")
+    parser.add_argument("--words", type=int, default=8000, help="Words per synthetic chunk")
+    parser.add_argument("--keyword-rate", type=float, default=0.01, help="Fraction of words that are keywords")
+    parser.add_argument("--repeats", type=int, default=200, help="Calls per measurement")
+    args = parser.parse_args()
+
+    detector = DocumentTypeDetector()
+    auditor = SafetyAuditor()
+    all_keywords = [k for keywords in detector.type_keywords.values() for k in keywords]
+    risk_terms = auditor.high_risk_keywords + auditor.verification_required_phrases
+
+    text = build_chunk_text(args.words, args.keyword_rate, all_keywords + risk_terms)
+
+    print(f"📏 Chunk length: {len(text):,} characters")
+    print(f"⚙️ pyahocorasick available: {AHOCORASICK_AVAILABLE}")
+
+    # Correctness: both paths must produce identical scores and risk terms
+    assert legacy_detect_scores(detector.type_keywords, text) == automaton_detect_scores(detector, text)
+    text_lower = text.lower()
+    legacy_risk = {term: text_lower.count(term) for term in risk_terms if term in text_lower}
+    assert legacy_risk == KeywordAutomaton(risk_terms).count(text)
+    assert set(legacy_risk_terms(risk_terms, text)) == auditor.risk_automaton.present(text)
+
+    results = {
+        "detect_legacy_ms": time_call(lambda: legacy_detect_scores(detector.type_keywords, text), args.repeats),
+        "detect_automaton_ms": time_call(lambda: detector.detect_document_type(text), args.repeats),
+        "audit_legacy_ms": time_call(lambda: legacy_risk_terms(risk_terms, text), args.repeats),
+        "audit_automaton_ms": time_call(lambda: auditor.risk_automaton.present(text), args.repeats),
+    }
+
+    print("\n📊 RESULTS (ms per call)")
+    for name, value in results.items():
+        print(f"   {name:<22} {value:8.3f}")
+    print(f"\n🚀 Detection speedup: {results['detect_legacy_ms'] / results['detect_automaton_ms']:.2f}x")
+    print(f"🚀 Audit scan speedup: {results['audit_legacy_ms'] / results['audit_automaton_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Retrieval Daemon Benchmark
+Compares in-process semantic_search against the same backend served by RetrievalDaemon
+over localhost TCP and a Unix socket, for one session and for several concurrent ones.
+Also checks the client's contract: index writes are sent once and never retried, and
+shutdown closes the connections clients keep alive.
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+from core.retrieval_daemon import RetrievalClient, RetrievalDaemon
+
+
+class VectorBackend:
+    """semantic_search over random normalized vectors, standing in for a loaded IntegratedJSONRAG"""
+
+    def __init__(self, n_chunks: int, dim: int):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((n_chunks, dim)).astype(np.float32)
+        self.embeddings = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.chunk_metadata = [{"chunk_id": f"chunk_{i}", "content": f"Drug label section {i}"}
+                               for i in range(n_chunks)]
+        self.current_document_domain = "medical_pharmaceutical"
+        self.dim = dim
+
+    def semantic_search(self, query: str, top_k: int = 50, similarity_threshold: float = 0.3,
+                        search_mode: str = "semantic", filters=None) -> List[Dict[str, Any]]:
+        query_vector = np.random.default_rng(zlib.crc32(query.encode("utf-8"))).standard_normal(self.dim)
+        scores = self.embeddings @ (query_vector / np.linalg.norm(query_vector)).astype(np.float32)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.chunk_metadata[i], "similarity_score": float(scores[i])} for i in top]
+
+
+class CountingRoutingBackend:
+    """Routing backend that records every add_document_chunks call"""
+
+    def __init__(self):
+        self.added_calls = 0
+
+    def add_document_chunks(self, chunks):
+        self.added_calls += 1
+
+    def get_system_info(self):
+        return {"added_calls": self.added_calls}
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def latencies(search, queries: List[str], top_k: int) -> List[float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query, top_k=top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def concurrent_throughput(address: str, queries: List[str], sessions: int, top_k: int) -> float:
+    """Queries per second with one client per session thread"""
+    clients = [RetrievalClient(address) for _ in range(sessions)]
+
+    def session(client):
+        for query in queries:
+            client.semantic_search(query, top_k=top_k)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, clients))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+    return sessions * len(queries) / elapsed
+
+
+def check_contract(address: str, backend: VectorBackend) -> None:
+    """Writes go out exactly once; shutdown closes kept-alive connections"""
+    routing = CountingRoutingBackend()
+    daemon = RetrievalDaemon(routing, backend, address).start()
+    client = RetrievalClient(address, timeout=5)
+    client.semantic_search("warm", top_k=1)  # Leaves a kept-alive connection
+    client.add_document_chunks([{"chunk_id": "new", "content": "new label"}])
+    assert routing.added_calls == 1, f"add_document_chunks applied {routing.added_calls} times"
+
+    daemon.shutdown()
+    try:
+        client.semantic_search("after shutdown", top_k=1)
+    except (OSError, http.client.HTTPException):
+        pass
+    else:
+        raise AssertionError("a kept-alive connection was still answered after shutdown")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the retrieval daemon against in-process search")
+    parser.add_argument("--chunks", type=int, default=50000, help="Indexed chunks")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per session")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions")
+    args = parser.parse_args()
+
+    backend = VectorBackend(args.chunks, args.dim)
+    queries = [f"query {i}" for i in range(args.queries)]
+    socket_dir = tempfile.mkdtemp()
+    addresses = {"tcp": f"127.0.0.1:{free_port()}"}
+    if hasattr(socket, "AF_UNIX"):
+        addresses["unix"] = f"unix:{os.path.join(socket_dir, 'retrieval.sock')}"
+
+    results = {"in-process": latencies(backend.semantic_search, queries, args.top_k)}
+    throughput = {}
+    for kind, address in addresses.items():
+        daemon = RetrievalDaemon(json_rag=backend, address=address).start()
+        client = RetrievalClient(address)
+        client.semantic_search("warm up", top_k=args.top_k)
+        results[f"daemon {kind}"] = latencies(client.semantic_search, queries, args.top_k)
+        client.close()
+        throughput[kind] = concurrent_throughput(address, queries, args.sessions, args.top_k)
+        daemon.shutdown()
+        check_contract(address, backend)
+
+    print(f"\n📊 {args.chunks:,} chunks x {args.dim} dims, top {args.top_k}, {args.queries} queries per session")
+    for name, timings in results.items():
+        timings.sort()
+        print(f"   {name:<14} mean {statistics.mean(timings):7.2f} ms   p50 {statistics.median(timings):7.2f} ms   "
+              f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms")
+    for kind, qps in throughput.items():
+        print(f"🚀 daemon {kind}: {qps:,.0f} queries/s across {args.sessions} concurrent sessions")
+    print("✅ Writes were sent once and shutdown closed kept-alive connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Streaming Completion Benchmark
+Compares waiting for the full completion against streaming with an early stop at the
+first complete JSON object, for run_llama_inference and ExternalAPIClient.query_external_api,
+against local mock servers that decode tokens at a fixed rate and keep generating
+trailing text after the JSON answer (as models do until n_predict / max_tokens).
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+
+from core.external_api_client import ExternalAPIClient
+from core.http_session import close_sessions
+from core.llama_client import run_llama_inference
+from core.llm_response_cache import configure_llm_cache
+
+ANSWER = '{"intent": "web_automation", "action": "web_navigate"}'
+
+
+def make_tokens(trailing_tokens: int) -> List[str]:
+    """The JSON answer split into small pieces, followed by trailing chatter"""
+    answer = [ANSWER[i:i + 4] for i in range(0, len(ANSWER), 4)]
+    return answer + [" and then some explanation"] * trailing_tokens
+
+
+class MockStreamingServer:
+    """Serves llama-server /completion and OpenAI /v1/chat/completions, streamed or not"""
+
+    def __init__(self, token_ms: float, trailing_tokens: int):
+        self.tokens = make_tokens(trailing_tokens)
+        self.decoded = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                openai = self.path.endswith("/chat/completions")
+                if not body.get("stream"):
+                    time.sleep(len(server.tokens) * token_ms / 1000)
+                    server.decoded += len(server.tokens)
+                    text = "".join(server.tokens)
+                    if openai:
+                        payload = {"model": body["model"], "choices": [{"message": {"content": text}}],
+                                   "usage": {"total_tokens": 100 + len(server.tokens)}}
+                    else:
+                        payload = {"content": text, "stop": True}
+                    data = json.dumps(payload).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in server.tokens:
+                        time.sleep(token_ms / 1000)
+                        server.decoded += 1
+                        if openai:
+                            event = {"model": body["model"], "choices": [{"delta": {"content": token}}]}
+                        else:
+                            event = {"content": token, "stop": False}
+                        self._chunk(f"data: {json.dumps(event)}\n\n")
+                    if openai:
+                        usage = {"model": body["model"], "choices": [],
+                                 "usage": {"total_tokens": 100 + len(server.tokens)}}
+                        self._chunk(f"data: {json.dumps(usage)}\n\ndata: [DONE]\n\n")
+                    else:
+                        self._chunk(f"data: {json.dumps({'content': '', 'stop': True})}\n\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client hung up: stop decoding, as llama-server does
+                    self.close_connection = True
+
+            def _chunk(self, text: str):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        port = self.httpd.server_address[1]
+        self.llama_url = f"http://127.0.0.1:{port}/completion"
+        self.openai_base_url = f"http://127.0.0.1:{port}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def measure(server: MockStreamingServer, fn, repeats: int) -> Dict[str, float]:
+    timings = []
+    decoded = []
+    for _ in range(repeats):
+        before = server.decoded
+        start = time.perf_counter()
+        text = fn()
+        timings.append(time.perf_counter() - start)
+        time.sleep(0.05)  # Let the server notice a cancelled stream before counting
+        decoded.append(server.decoded - before)
+        assert json.loads(text[text.find("{"):text.find("}") + 1])["intent"] == "web_automation"
+    return {"seconds": sum(timings) / repeats, "decoded_tokens": sum(decoded) / repeats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full completions against streaming with early JSON stop")
+    parser.add_argument("--token-ms", type=float, default=10, help="Mock decode time per token")
+    parser.add_argument("--trailing-tokens", type=int, default=200, help="Tokens generated after the JSON answer")
+    parser.add_argument("--repeats", type=int, default=3, help="Calls per measurement")
+    args = parser.parse_args()
+
+    configure_llm_cache(enabled=False)
+    with MockStreamingServer(args.token_ms, args.trailing_tokens) as server:
+        client = ExternalAPIClient()
+        client.base_url = server.openai_base_url
+        cases = {
+            "llama full completion": lambda: run_llama_inference("classify", server.llama_url),
+            "llama stream, stop at JSON": lambda: run_llama_inference("classify", server.llama_url, stop_at_json=True),
+            "openai full completion": lambda: client.query_external_api("classify"),
+            "openai stream, stop at JSON": lambda: client.query_external_api("classify", stop_at_json=True)
+        }
+        results = {name: measure(server, fn, args.repeats) for name, fn in cases.items()}
+        close_sessions()
+
+    print(f"\n📊 {len(make_tokens(args.trailing_tokens))} tokens per completion "
+          f"({args.trailing_tokens} after the JSON answer), {args.token_ms:g} ms per token")
+    for name, stats in results.items():
+        print(f"   {name:<30} {stats['seconds'] * 1000:8.1f} ms   decoded tokens {stats['decoded_tokens']:6.1f}")
+    for backend in ("llama", "openai"):
+        full, early = results[f"{backend} full completion"], results[f"{backend} stream, stop at JSON"]
+        print(f"🚀 {backend}: {full['seconds'] / early['seconds']:.1f}x faster, "
+              f"{full['decoded_tokens'] - early['decoded_tokens']:.0f} fewer tokens decoded")
+
+
+if __name__ == "__main__":
+    main()
@@ -54,7 +54,18 @@ def document_processor(source_file: str, processing_mode: str = "full", enable_e
             rag_system = result.get("advanced_rag_system")
             rag_system_status = "not_initialized"
             
-            if rag_system and session_manager:
+            # A running retrieval daemon indexes the chunks once, shared by every session
+            from core.retrieval_daemon import get_retrieval_client
+            retrieval_client = get_retrieval_client()
+            if retrieval_client is not None and result.get("chunks"):
+                try:
+                    retrieval_client.add_document_chunks(result["chunks"])
+                    rag_system_status = "indexed_in_daemon"
+                    print(f"✅ Chunks indexed by retrieval daemon at {retrieval_client.address}")
+                except Exception as daemon_error:
+                    print(f"⚠️ Retrieval daemon indexing failed, keeping the in-process RAG system: {daemon_error}")
+            
+            if rag_system and session_manager and rag_system_status == "not_initialized":
                 from core.rag_manager import get_rag_manager
                 rag_manager = get_rag_manager()
                 
@@ -179,6 +190,32 @@ def document_query(query: str, rag_system=None, max_chunks: int = 5, session_man
     """
     print(f"🔍 DOCUMENT QUERY: Searching for '{query}'")
     
+    # Documents indexed by a running retrieval daemon are searched there first
+    from core.retrieval_daemon import get_retrieval_client
+    retrieval_client = get_retrieval_client()
+    if retrieval_client is not None:
+        try:
+            results = retrieval_client.query_with_routing(query, max_chunks=max_chunks)
+            daemon_chunks = results.get("results", [])
+            if daemon_chunks:
+                enhanced_answer = "\n\n".join([
+                    f"**Chunk {i+1}:** {chunk.get('content', '')[:500]}..."
+                    for i, chunk in enumerate(daemon_chunks[:3])
+                ])
+                return {
+                    "status": "success",
+                    "query": query,
+                    "method": "retrieval_daemon_query",
+                    "domain_detected": results.get("domain_detected"),
+                    "relevant_chunks_found": len(daemon_chunks),
+                    "enhanced_answer": enhanced_answer,
+                    "raw_results": results,
+                    "summary": f"Found {len(daemon_chunks)} relevant chunks using the shared retrieval daemon.",
+                    "timestamp": datetime.now().isoformat()
+                }
+        except Exception as e:
+            print(f"⚠️ Retrieval daemon query failed, falling back to session RAG system: {e}")
+    
     # Try to get RAG system from session manager first
     if session_manager is not None:
         from core.rag_manager import get_rag_manager
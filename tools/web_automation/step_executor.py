@@ -147,7 +147,7 @@ class StepExecutor:
             
             while api_retry_count < max_api_retries:
                 try:
-                    raw_response = self.llm.query_external_api(prompt)
+                    raw_response = self.llm.query_external_api(prompt, stop_at_json=True)
                     
                     # Check for connection error patterns in response
                     if ("I apologize, but I'm having trouble connecting" in raw_response or 
@@ -258,7 +258,7 @@ class StepExecutor:
                 
                 try:
                     await asyncio.sleep(2)  # Wait before retry
-                    raw_response = self.llm.query_external_api(prompt)
+                    raw_response = self.llm.query_external_api(prompt, stop_at_json=True)
                     
                     # Check if retry succeeded
                     if not ("I apologize, but I'm having trouble connecting" in raw_response or 
@@ -471,7 +471,7 @@ Respond with JSON:
             
             while api_retry_count < max_retries:
                 try:
-                    verification_response = self.llm.query_external_api(verification_prompt)
+                    verification_response = self.llm.query_external_api(verification_prompt, stop_at_json=True)
                     
                     # Check for connection errors
                     if ("I apologize, but I'm having trouble connecting" in verification_response or 
@@ -555,7 +555,7 @@ Respond with JSON:
             fallback_prompt = self._build_fallback_prompt_with_full_dom(goal, ctx, full_skeleton, recent_actions)
             
             # Query LLM with richer context
-            raw_response = self.llm.query_external_api(fallback_prompt)
+            raw_response = self.llm.query_external_api(fallback_prompt, stop_at_json=True)
             
             # Debug: Save fallback prompt and response
             try: